@@ -21,6 +21,15 @@ case "$cmd" in
             echo "Model file not found. Assuming it'll be at app default location."
         fi
 
+        # The online feature store, if the model was trained with one,
+        # never the one of a previous model
+        rm -f ./assets/api/feature_store.pickle
+        if cp /opt/ml/model/feature_store.pickle ./assets/api/ 2>/dev/null; then
+            echo "Feature store file found and copied."
+        else
+            echo "Feature store file not found. Requests must send the aggregated features."
+        fi
+
         # Start the Uvicorn server
         poetry run python serve.py
         ;;
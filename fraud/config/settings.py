@@ -61,6 +61,27 @@ class Settings(BaseSettings):
     if not os.path.exists(ASSETS_PATH):
         os.makedirs(ASSETS_PATH)
 
+    # Seconds between checks for new model artifacts, 0 disables reloads.
+    MODEL_RELOAD_INTERVAL: float = 60
+
+    # Micro-batching of the prediction requests, a max size of 1 predicts
+    # every request on its own and a max queue size of 0 is unbounded.
+    MICRO_BATCH_MAX_SIZE: int = 64
+
+    MICRO_BATCH_MAX_WAIT_MS: float = 2
+
+    MICRO_BATCH_MAX_QUEUE_SIZE: int = 1024
+
+    # Maximum size of the utils.cacher entries, the least recently used
+    # are evicted beyond it.
+    CACHE_MAX_BYTES: int = 5 * 1024 * 1024 * 1024
+
+    # Maximum size of the utils.cacher results kept in memory by a process.
+    MEMORY_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # Scoring backend of the served algorithm, NATIVE or NUMPY.
+    SCORING_BACKEND: str = "NATIVE"
+
     # Logging settings.
     LOG_FILE_NAME: str = "log.log"
 
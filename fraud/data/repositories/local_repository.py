@@ -51,32 +51,6 @@ class LocalRepository(DataRepository):
             ),
         )
 
-        data = feature_transformations.aggregate_feature(
-            transactions_df=data,
-            windows_size_in_days=[5],
-            time_unit=feature_transformations.TimeUnits.DAYS,
-            feature_name="tx_amount",
-            agg_func_list=[
-                feature_transformations.AggFunc.MEAN,
-            ],
-            datetime_col="tx_datetime",
-            index_name="transaction_id",
-            grouping_column="customer_id",
-            delay_period=0,
-        )
-
-        data = feature_transformations.aggregate_feature(
-            transactions_df=data,
-            windows_size_in_days=[5],
-            time_unit=feature_transformations.TimeUnits.DAYS,
-            feature_name="tx_fraud",
-            agg_func_list=[
-                feature_transformations.AggFunc.MEAN,
-            ],
-            datetime_col="tx_datetime",
-            index_name="transaction_id",
-            grouping_column="terminal_id",
-            delay_period=7,
-        )
+        data = self.aggregate_features(data=data)
 
         return data
@@ -3,9 +3,12 @@ from abc import (
     ABC,
     abstractmethod,
 )
+from typing import List
 
 import pandas as pd
 
+from fraud.domain import feature_transformations
+
 
 class DataRepository(ABC):
     """Data Repository.
@@ -14,6 +17,28 @@ class DataRepository(ABC):
     the estimator.
     """
 
+    # Aggregated features computed in preprocess, and online at inference.
+    aggregated_features_params: List[
+        feature_transformations.AggregatedFeatureParams
+    ] = [
+        feature_transformations.AggregatedFeatureParams(
+            grouping_column="customer_id",
+            feature_name="tx_amount",
+            windows_size_in_days=[5],
+            agg_func_list=[feature_transformations.AggFunc.MEAN],
+            time_unit=feature_transformations.TimeUnits.DAYS,
+            delay_period=0,
+        ),
+        feature_transformations.AggregatedFeatureParams(
+            grouping_column="terminal_id",
+            feature_name="tx_fraud",
+            windows_size_in_days=[5],
+            agg_func_list=[feature_transformations.AggFunc.MEAN],
+            time_unit=feature_transformations.TimeUnits.DAYS,
+            delay_period=7,
+        ),
+    ]
+
     @abstractmethod
     def load_data(self) -> pd.DataFrame:
         """Load the credit card transactional data.
@@ -31,3 +56,49 @@ class DataRepository(ABC):
             pd.DataFrame: Credit card transactional data.
         """
         raise NotImplementedError
+
+    def aggregate_features(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Compute the aggregated features of the transactional data.
+
+        Args:
+            data: pd.DataFrame
+                Credit card transactional data.
+
+        Returns:
+            pd.DataFrame: Transactional data with the aggregated features.
+        """
+        for params in self.aggregated_features_params:
+            data = feature_transformations.aggregate_feature(
+                transactions_df=data,
+                windows_size_in_days=params.windows_size_in_days,
+                time_unit=params.time_unit,
+                feature_name=params.feature_name,
+                agg_func_list=params.agg_func_list,
+                datetime_col="tx_datetime",
+                index_name="transaction_id",
+                grouping_column=params.grouping_column,
+                delay_period=params.delay_period,
+            )
+
+        return data
+
+    def get_feature_store(
+        self, data: pd.DataFrame
+    ) -> feature_transformations.OnlineFeatureStore:
+        """Get an online feature store warmed with the transactional data.
+
+        Args:
+            data: pd.DataFrame
+                Credit card transactional data, before preprocessing.
+
+        Returns:
+            feature_transformations.OnlineFeatureStore:
+                Feature store that computes the aggregated features online.
+        """
+        feature_store = feature_transformations.OnlineFeatureStore(
+            features_params=self.aggregated_features_params,
+            datetime_col="tx_datetime",
+        )
+        feature_store.warm(transactions_df=data)
+
+        return feature_store
@@ -28,6 +28,7 @@ class SyntheticParams:
     nb_days: int = 30
     radius: float = 5
     random_state: int = 0
+    n_jobs: int = -1
 
 
 @dataclass
@@ -26,6 +26,7 @@ class Synthetic(DataRepository):
         nb_days: int,
         radius: float,
         random_state: int,
+        n_jobs: int = -1,
     ):
         """Instantiate synthetic data repository.
 
@@ -61,6 +62,9 @@ class Synthetic(DataRepository):
                 a terminal.
             random_state: int
                 Random seed for reproducibility purposes.
+            n_jobs: int
+                Number of processes used to simulate the data, -1 means using
+                all the CPUs.
         """
         self.n_customers = n_customers
         self.n_terminals = n_terminals
@@ -78,6 +82,8 @@ class Synthetic(DataRepository):
 
         self.random_state = random_state
 
+        self.n_jobs = n_jobs
+
     @utils.timer
     def load_data(self) -> pd.DataFrame:
         """Simulate the credit card transactional data.
@@ -98,6 +104,7 @@ class Synthetic(DataRepository):
             start_date=self.start_date,
             nb_days=self.nb_days,
             random_state=self.random_state,
+            n_jobs=self.n_jobs,
         )
 
         transactions_df["transaction_id"] = range(len(transactions_df))
@@ -120,32 +127,6 @@ class Synthetic(DataRepository):
             ),
         )
 
-        data = feature_transformations.aggregate_feature(
-            transactions_df=data,
-            windows_size_in_days=[5],
-            time_unit=feature_transformations.TimeUnits.DAYS,
-            feature_name="tx_amount",
-            agg_func_list=[
-                feature_transformations.AggFunc.MEAN,
-            ],
-            datetime_col="tx_datetime",
-            index_name="transaction_id",
-            grouping_column="customer_id",
-            delay_period=0,
-        )
-
-        data = feature_transformations.aggregate_feature(
-            transactions_df=data,
-            windows_size_in_days=[5],
-            time_unit=feature_transformations.TimeUnits.DAYS,
-            feature_name="tx_fraud",
-            agg_func_list=[
-                feature_transformations.AggFunc.MEAN,
-            ],
-            datetime_col="tx_datetime",
-            index_name="transaction_id",
-            grouping_column="terminal_id",
-            delay_period=7,
-        )
+        data = self.aggregate_features(data=data)
 
         return data
@@ -3,27 +3,33 @@ from fraud.domain.data_simulator import (
     add_frauds,
     generate_customer_profiles_list,
     generate_terminal_profiles_list,
-    generate_transaction,
     generate_transaction_table,
-    get_available_terminals_for_customer,
+    generate_transaction_table_sharded,
+    get_available_terminals,
     simulate_credit_card_transactions_data,
+    simulate_transactions_block,
 )
 from fraud.domain.kpis import card_precision_top_k
 from fraud.domain.models import (
+    AvailableTerminals,
     CustomerProfile,
     TerminalProfiles,
     Transaction,
 )
+from fraud.domain.spatial_index import TerminalGridIndex
 
 __all__ = [
     "add_frauds",
+    "AvailableTerminals",
     "CustomerProfile",
     "generate_customer_profiles_list",
     "generate_terminal_profiles_list",
-    "generate_transaction",
     "generate_transaction_table",
-    "get_available_terminals_for_customer",
+    "generate_transaction_table_sharded",
+    "get_available_terminals",
     "simulate_credit_card_transactions_data",
+    "simulate_transactions_block",
+    "TerminalGridIndex",
     "TerminalProfiles",
     "Transaction",
     "card_precision_top_k",
@@ -1,8 +1,12 @@
 """Data simulator functions."""
+import os
+import pathlib
 import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from typing import (
     List,
-    Optional,
+    Tuple,
 )
 
 import numpy as np
@@ -10,7 +14,15 @@ import pandas as pd
 from numpy.typing import NDArray
 
 from fraud import utils
-from fraud.domain import models
+from fraud.domain import (
+    models,
+    spatial_index,
+    transaction_index,
+)
+
+# Number of consecutive customers that share the same random stream when
+# simulating transactions.
+CUSTOMERS_PER_RANDOM_STREAM = 1024
 
 
 @utils.timer
@@ -140,149 +152,344 @@ def generate_terminal_profiles_list(
     return terminal_profile_list
 
 
-def get_available_terminals_for_customer(
-    x_y_customer: NDArray,
+@utils.timer
+def get_available_terminals(
+    x_y_customers: NDArray,
     x_y_terminals: NDArray,
     radius: float,
-) -> List[int]:
-    """Get the customer valid terminals.
+) -> models.AvailableTerminals:
+    """Get the valid terminals of every customer.
 
     We will assume that customers only make transactions on terminals that are
-    within a radius of r of their geographical locations.
+    within a radius of r of their geographical locations. All the customers
+    are answered in one batched query over a grid index of the terminals.
 
     Args:
-        x_y_customer: NDArray
-            Array containing the customer location in a 100 x 100 grid.
+        x_y_customers: NDArray
+            Array containing the customer locations in a 100 x 100 grid.
         x_y_terminals: NDArray
-            Array containing the terminal location in a 100 x 100 grid.
+            Array containing the terminal locations in a 100 x 100 grid.
         radius: float
             Radius representing the maximum distance for a customer to use a
             terminal.
-    """
-    squared_diff_x_y = np.square(x_y_customer - x_y_terminals)
-
-    dist_x_y = np.sqrt(np.sum(squared_diff_x_y, axis=1))
 
-    available_terminals = list(np.where(dist_x_y < radius)[0])
+    Returns:
+        models.AvailableTerminals:
+            Valid terminals of every customer.
+    """
+    terminal_index = spatial_index.TerminalGridIndex(
+        x_y_terminals=x_y_terminals, cell_size=radius
+    )
 
-    return available_terminals
+    return terminal_index.query_radius(x_y_points=x_y_customers, radius=radius)
 
 
-def generate_transaction(
-    customer_profile: models.CustomerProfile,
+def generate_transaction_table(
+    customer_profiles_df: pd.DataFrame,
+    available_terminals: models.AvailableTerminals,
     start_date: pd.Timestamp,
-    day: int,
-) -> Optional[models.Transaction]:
-    """Generate a random transaction.
+    nb_days: int,
+    random_state: int = 0,
+    block_size: int = CUSTOMERS_PER_RANDOM_STREAM,
+) -> pd.DataFrame:
+    """Generate the transaction table for all the customers at once.
+
+    Customers are simulated in blocks of `block_size` consecutive ids. Every
+    block draws from its own random stream, derived from `random_state` and
+    the block number, so the output only depends on the seed and on the
+    customer ids, never on how many customers are simulated together.
 
     Args:
-        customer_profile: models.CustomerProfile
-            Customer profile.
+        customer_profiles_df: pd.DataFrame
+            DataFrame containing the customer profile data, sorted by
+            customer_id.
+        available_terminals: models.AvailableTerminals
+            Valid terminals of every customer, in the customer_profiles_df
+            order.
         start_date: pd.Timestamp
             Date from which the transactions will be generated.
-        day: int
-            Number of days after the start date from which the transaction will
-            be simulated.
+        nb_days: int
+            Number of days to simulate the data.
+        random_state: int
+            Random seed for reproducibility purposes.
+        block_size: int
+            Number of customers that share a random stream.
 
     Returns:
-        Optional[models.Transaction]:
-            Transaction instance in case the customer profile has valid
-            terminals and the simulated hour of the daty falls on the same day.
-
+        pd.DataFrame:
+            Transactional data.
     """
-    # Time of transaction: Around noon, std 20000 seconds. This choice
-    # aims at simulating the fact that most transactions occur during
-    # the day.
-    time_tx = int(np.random.normal(86400 / 2, 20000))
-
-    # If transaction time between 0 and 86400 (same day), let us keep
-    # it, otherwise, let us discard it.
-    if (time_tx > 0) and (time_tx < 86400):
+    customer_ids = customer_profiles_df.customer_id.values.astype(np.int64)
+    mean_amount = customer_profiles_df.mean_amount.values.astype(float)
+    std_amount = customer_profiles_df.std_amount.values.astype(float)
+    mean_nb_tx_per_day = customer_profiles_df.mean_nb_tx_per_day.values.astype(
+        float
+    )
 
-        # Amount is drawn from a normal distribution
-        amount = np.random.normal(
-            loc=customer_profile.mean_amount, scale=customer_profile.std_amount
-        )
+    nb_available_terminals = available_terminals.counts
 
-        # If amount negative, draw from a uniform distribution
-        if amount < 0:
-            amount = np.random.uniform(
-                low=0, high=customer_profile.mean_amount * 2
-            )
+    block_ids = customer_ids // block_size
+    block_bounds = np.flatnonzero(np.diff(block_ids)) + 1
 
-        amount = np.round(amount, decimals=2)
+    blocks = []
+    for rows in np.split(np.arange(len(customer_ids)), block_bounds):
+        if len(rows) == 0:
+            continue
 
-        if len(customer_profile.available_terminals) > 0:
-            terminal_id = random.choice(
-                seq=customer_profile.available_terminals
+        rng = np.random.default_rng(
+            np.random.SeedSequence(
+                entropy=random_state, spawn_key=(int(block_ids[rows[0]]),)
             )
+        )
 
-            return models.Transaction(
-                tx_datetime=(
-                    start_date
-                    + pd.Timedelta(value=day, unit="day")
-                    + pd.Timedelta(value=time_tx, unit="seconds")
-                ),
-                customer_id=customer_profile.customer_id,
-                terminal_id=terminal_id,
-                tx_amount=amount,
+        blocks.append(
+            simulate_transactions_block(
+                rng=rng,
+                first_row=rows[0],
+                mean_amount=mean_amount[rows],
+                std_amount=std_amount[rows],
+                mean_nb_tx_per_day=mean_nb_tx_per_day[rows],
+                nb_available_terminals=nb_available_terminals[rows],
+                nb_days=nb_days,
             )
+        )
 
-    return None
+    if blocks:
+        tx_row, tx_seconds, tx_amount, tx_terminal_rank = (
+            np.concatenate(column) for column in zip(*blocks)
+        )
+    else:
+        tx_row = tx_seconds = tx_terminal_rank = np.array([], dtype=np.int64)
+        tx_amount = np.array([], dtype=float)
 
+    tx_datetime = start_date.to_datetime64() + tx_seconds.astype(
+        "timedelta64[s]"
+    )
 
-def generate_transaction_table(
-    customer_profile: models.CustomerProfile,
+    return pd.DataFrame(
+        {
+            "tx_datetime": tx_datetime.astype("datetime64[ns]"),
+            "customer_id": customer_ids[tx_row],
+            "terminal_id": available_terminals.terminal_ids[
+                available_terminals.offsets[tx_row] + tx_terminal_rank
+            ].astype(np.int64),
+            "tx_amount": tx_amount,
+        }
+    )
+
+
+def generate_transaction_table_sharded(
+    customer_profiles_df: pd.DataFrame,
+    available_terminals: models.AvailableTerminals,
     start_date: pd.Timestamp,
     nb_days: int,
+    random_state: int = 0,
+    n_jobs: int = -1,
+    block_size: int = CUSTOMERS_PER_RANDOM_STREAM,
 ) -> pd.DataFrame:
-    """Generate transaction table.
+    """Generate the transaction table splitting the customers across processes.
+
+    Customers are split in contiguous shards made of whole random stream
+    blocks, every worker writes its shard to disk column by column and the
+    shards are concatenated in order, so the output is identical to
+    generate_transaction_table.
 
     Args:
-        customer_profile: models.CustomerProfile
-            Customer profile.
+        customer_profiles_df: pd.DataFrame
+            DataFrame containing the customer profile data, sorted by
+            customer_id.
+        available_terminals: models.AvailableTerminals
+            Valid terminals of every customer, in the customer_profiles_df
+            order.
         start_date: pd.Timestamp
             Date from which the transactions will be generated.
         nb_days: int
             Number of days to simulate the data.
+        random_state: int
+            Random seed for reproducibility purposes.
+        n_jobs: int
+            Number of worker processes, -1 means using all the CPUs.
+        block_size: int
+            Number of customers that share a random stream.
 
     Returns:
         pd.DataFrame:
             Transactional data.
     """
-    customer_transactions = []
+    if n_jobs < 1:
+        n_jobs = os.cpu_count()
+
+    block_ids = customer_profiles_df.customer_id.values // block_size
+    block_starts = np.flatnonzero(np.diff(block_ids, prepend=-1))
+    shard_starts = [
+        blocks[0]
+        for blocks in np.array_split(block_starts, n_jobs)
+        if len(blocks) > 0
+    ]
+    shard_bounds = list(zip(shard_starts, shard_starts[1:] + [len(block_ids)]))
 
-    random.seed(int(customer_profile.customer_id))
-    np.random.seed(int(customer_profile.customer_id))
+    if len(shard_bounds) <= 1:
+        return generate_transaction_table(
+            customer_profiles_df=customer_profiles_df,
+            available_terminals=available_terminals,
+            start_date=start_date,
+            nb_days=nb_days,
+            random_state=random_state,
+            block_size=block_size,
+        )
 
-    # For all days
-    for day in range(nb_days):
+    with tempfile.TemporaryDirectory() as tmp_path, ProcessPoolExecutor(
+        max_workers=n_jobs
+    ) as executor:
+        futures = [
+            executor.submit(
+                simulate_transactions_shard,
+                customer_profiles_df=customer_profiles_df.iloc[start:end],
+                available_terminals=available_terminals.slice(
+                    start=start, end=end
+                ),
+                start_date=start_date,
+                nb_days=nb_days,
+                random_state=random_state,
+                block_size=block_size,
+                file_path=pathlib.Path(tmp_path) / f"shard_{shard}",
+            )
+            for shard, (start, end) in enumerate(shard_bounds)
+        ]
 
-        # Random number of transactions for that day
-        nb_tx = np.random.poisson(customer_profile.mean_nb_tx_per_day)
+        shards = [
+            utils.load_frame_columns(file_path=future.result())
+            for future in futures
+        ]
 
-        # If nb_tx positive, let us generate transactions
-        if nb_tx <= 0:
-            continue
+        return pd.concat(shards, ignore_index=True)
 
-        for tx in range(nb_tx):
 
-            transaction = generate_transaction(
-                customer_profile=customer_profile,
-                start_date=start_date,
-                day=day,
-            )
+def simulate_transactions_shard(
+    customer_profiles_df: pd.DataFrame,
+    available_terminals: models.AvailableTerminals,
+    start_date: pd.Timestamp,
+    nb_days: int,
+    random_state: int,
+    block_size: int,
+    file_path: pathlib.Path,
+) -> pathlib.Path:
+    """Generate the transactions of a shard of customers and dump them.
+
+    Args:
+        customer_profiles_df: pd.DataFrame
+            DataFrame containing the profiles of the shard customers.
+        available_terminals: models.AvailableTerminals
+            Valid terminals of the shard customers.
+        start_date: pd.Timestamp
+            Date from which the transactions will be generated.
+        nb_days: int
+            Number of days to simulate the data.
+        random_state: int
+            Random seed for reproducibility purposes.
+        block_size: int
+            Number of customers that share a random stream.
+        file_path: pathlib.Path
+            Directory where the shard will be saved.
+
+    Returns:
+        pathlib.Path:
+            Directory where the shard was saved.
+    """
+    transactions_df = generate_transaction_table(
+        customer_profiles_df=customer_profiles_df,
+        available_terminals=available_terminals,
+        start_date=start_date,
+        nb_days=nb_days,
+        random_state=random_state,
+        block_size=block_size,
+    )
+
+    utils.dump_frame_columns(data=transactions_df, file_path=file_path)
 
-            if transaction is None:
-                continue
+    return file_path
 
-            customer_transactions.append(transaction)
 
-    customer_transactions = pd.DataFrame.from_records(
-        [ct.__dict__ for ct in customer_transactions]
+def simulate_transactions_block(
+    rng: np.random.Generator,
+    first_row: int,
+    mean_amount: NDArray,
+    std_amount: NDArray,
+    mean_nb_tx_per_day: NDArray,
+    nb_available_terminals: NDArray,
+    nb_days: int,
+) -> Tuple[NDArray, NDArray, NDArray, NDArray]:
+    """Simulate the transactions of a block of customers.
+
+    All the random draws of the block are done as arrays: the number of
+    transactions per customer and day, the time of the day, the amount and
+    the rank of the chosen terminal among the customer available terminals.
+
+    Args:
+        rng: np.random.Generator
+            Random stream of the block.
+        first_row: int
+            Position of the first customer of the block in the profiles table.
+        mean_amount: NDArray
+            Mean transaction amount of each customer.
+        std_amount: NDArray
+            Standard deviation of the transaction amount of each customer.
+        mean_nb_tx_per_day: NDArray
+            Average number of transactions per day of each customer.
+        nb_available_terminals: NDArray
+            Number of available terminals of each customer.
+        nb_days: int
+            Number of days to simulate the data.
+
+    Returns:
+        Tuple[NDArray, NDArray, NDArray, NDArray]:
+            Customer row, seconds since the start date, amount and terminal
+            rank of every transaction.
+    """
+    n_customers = len(mean_nb_tx_per_day)
+
+    # Random number of transactions per customer and day.
+    nb_tx = rng.poisson(
+        lam=mean_nb_tx_per_day[:, None], size=(n_customers, nb_days)
+    )
+
+    tx_customer = np.repeat(np.arange(n_customers), nb_tx.sum(axis=1))
+    tx_day = np.repeat(np.tile(np.arange(nb_days), n_customers), nb_tx.ravel())
+
+    # Time of transaction: Around noon, std 20000 seconds. This choice
+    # aims at simulating the fact that most transactions occur during
+    # the day.
+    time_tx = rng.normal(loc=86400 / 2, scale=20000, size=len(tx_customer))
+    time_tx = time_tx.astype(np.int64)
+
+    # If transaction time between 0 and 86400 (same day), let us keep
+    # it, otherwise, let us discard it. Customers without terminals do not
+    # make transactions.
+    is_valid = (
+        (time_tx > 0)
+        & (time_tx < 86400)
+        & (nb_available_terminals[tx_customer] > 0)
+    )
+    tx_customer = tx_customer[is_valid]
+    tx_seconds = tx_day[is_valid] * 86400 + time_tx[is_valid]
+
+    # Amount is drawn from a normal distribution
+    tx_mean_amount = mean_amount[tx_customer]
+    amount = rng.normal(loc=tx_mean_amount, scale=std_amount[tx_customer])
+
+    # If amount negative, draw from a uniform distribution
+    is_negative = amount < 0
+    amount[is_negative] = rng.uniform(
+        low=0, high=tx_mean_amount[is_negative] * 2
     )
 
-    return customer_transactions
+    amount = np.round(amount, decimals=2)
+
+    terminal_rank = rng.integers(
+        low=0, high=nb_available_terminals[tx_customer]
+    )
+
+    return tx_customer + first_row, tx_seconds, amount, terminal_rank
 
 
 @utils.timer
@@ -316,37 +523,53 @@ def add_frauds(
         pd.DataFrame
             DataFrame containing all the transactions and the simulated frauds.
     """
+    tx_days = transaction_index.get_transaction_days(
+        tx_datetime=transactions_df.tx_datetime, start_date=start_date
+    )
+    terminal_day_index = transaction_index.TransactionDayIndex(
+        entity_ids=transactions_df.terminal_id.values, tx_days=tx_days
+    )
+    customer_day_index = transaction_index.TransactionDayIndex(
+        entity_ids=transactions_df.customer_id.values, tx_days=tx_days
+    )
+
+    tx_amount = transactions_df.tx_amount.values.astype(float)
+
     # By default, all transactions are genuine
-    transactions_df["tx_fraud"] = 0
-    transactions_df["tx_fraud_scenario"] = 0
+    tx_fraud_scenario = np.zeros(len(transactions_df), dtype=np.int64)
 
     # Scenario 1
-    transactions_df = simulate_baseline_fraud(transactions_df=transactions_df)
+    tx_fraud_scenario[simulate_baseline_fraud(tx_amount=tx_amount)] = 1
 
     for day in range(nb_days):
         # Scenario 2
-        transactions_df = simulate_phishing(
+        compromised_rows = simulate_phishing(
             terminal_profiles_df=terminal_profiles_df,
-            transactions_df=transactions_df,
+            terminal_day_index=terminal_day_index,
             day=day,
-            start_date=start_date,
         )
+        tx_fraud_scenario[compromised_rows] = 2
 
         # Scenario 3
-        transactions_df = simulate_card_not_present_fraud(
+        fraud_rows = simulate_card_not_present_fraud(
             customer_profiles_df=customer_profiles_df,
-            transactions_df=transactions_df,
+            customer_day_index=customer_day_index,
             day=day,
-            start_date=start_date,
         )
+        tx_amount[fraud_rows] = tx_amount[fraud_rows] * 5
+        tx_fraud_scenario[fraud_rows] = 3
+
+    transactions_df["tx_amount"] = tx_amount
+    transactions_df["tx_fraud"] = (tx_fraud_scenario > 0).astype(np.int64)
+    transactions_df["tx_fraud_scenario"] = tx_fraud_scenario
 
     return transactions_df
 
 
 def simulate_baseline_fraud(
-    transactions_df: pd.DataFrame,
+    tx_amount: NDArray,
     amount_threshold: int = 220,
-) -> pd.DataFrame:
+) -> NDArray:
     """Simulate a baseline fraud.
 
     Any transaction whose amount is more than 220 is a fraud. This scenario is
@@ -354,32 +577,24 @@ def simulate_baseline_fraud(
     fraud pattern that should be detected by any baseline fraud detector.
 
     Args:
-        transactions_df: pd.DataFrame
-            DataFrame containing all the transactions
+        tx_amount: NDArray
+            Amount of every transaction.
         amount_threshold: int:
             Any transaction with an amount larger that this threshold will be
             considered as fraud.
 
     Returns:
-        pd.DataFrame
-            DataFrame containing all the transactions and the simulated frauds.
+        NDArray
+            Rows of the fraudulent transactions.
     """
-    transactions_df.loc[
-        transactions_df.tx_amount > amount_threshold, "tx_fraud"
-    ] = 1
-    transactions_df.loc[
-        transactions_df.tx_amount > amount_threshold, "tx_fraud_scenario"
-    ] = 1
-
-    return transactions_df
+    return np.flatnonzero(tx_amount > amount_threshold)
 
 
 def simulate_phishing(
     terminal_profiles_df: pd.DataFrame,
-    transactions_df: pd.DataFrame,
+    terminal_day_index: transaction_index.TransactionDayIndex,
     day: int,
-    start_date: pd.Timestamp,
-) -> pd.DataFrame:
+) -> NDArray:
     """Simulate fraudulent transaction via phishing.
 
     Every day, a list of two terminals is drawn at random. All transactions on
@@ -388,48 +603,30 @@ def simulate_phishing(
     Args:
         terminal_profiles_df: pd.DataFrame
             DataFrame containing all the terminal profiles.
-        transactions_df: pd.DataFrame
-            DataFrame containing all the transactions
+        terminal_day_index: transaction_index.TransactionDayIndex
+            Index of the transactions by terminal and day.
         day: int
             Number of days after the start day from which the fraudulent
             transaction are drawn.
-        start_date: pd.Timestamp
-            Date from which the transactions will be generated.
 
     Returns:
-        pd.DataFrame
-            DataFrame containing all the transactions and the simulated frauds.
+        NDArray
+            Rows of the fraudulent transactions.
     """
     compromised_terminals = terminal_profiles_df.terminal_id.sample(
         n=2, random_state=day
     )
 
-    compromised_transactions = transactions_df[
-        (
-            transactions_df.tx_datetime
-            >= start_date + pd.Timedelta(value=day, unit="days")
-        )
-        & (
-            transactions_df.tx_datetime
-            < start_date + pd.Timedelta(value=day + 28, unit="days")
-        )
-        & (transactions_df.terminal_id.isin(compromised_terminals))
-    ]
-
-    transactions_df.loc[compromised_transactions.index, "tx_fraud"] = 1
-    transactions_df.loc[
-        compromised_transactions.index, "tx_fraud_scenario"
-    ] = 2
-
-    return transactions_df
+    return terminal_day_index.get_rows(
+        entity_ids=compromised_terminals, first_day=day, end_day=day + 28
+    )
 
 
 def simulate_card_not_present_fraud(
     customer_profiles_df: pd.DataFrame,
-    transactions_df: pd.DataFrame,
+    customer_day_index: transaction_index.TransactionDayIndex,
     day: int,
-    start_date: pd.Timestamp,
-) -> pd.DataFrame:
+) -> NDArray:
     """Simulate where the credentials of a customer have been leaked.
 
     Every day, a list of 3 customers is drawn at random. In the next 14 days,
@@ -441,53 +638,37 @@ def simulate_card_not_present_fraud(
     Args:
         customer_profiles_df: pd.DataFrame
             DataFrame containing the customer profile data.
-        transactions_df: pd.DataFrame
-            DataFrame containing all the transactions
+        customer_day_index: transaction_index.TransactionDayIndex
+            Index of the transactions by customer and day.
         day: int
             Number of days after the start day from which the fraudulent
             transaction are drawn.
-        start_date: pd.Timestamp
-            Date from which the transactions will be generated.
 
     Returns:
-        pd.DataFrame
-            DataFrame containing all the transactions and the simulated frauds.
+        NDArray
+            Rows of the fraudulent transactions.
     """
     compromised_customers = customer_profiles_df.customer_id.sample(
         n=3, random_state=day
     ).values
 
-    compromised_transactions = transactions_df[
-        (
-            transactions_df.tx_datetime
-            >= start_date + pd.Timedelta(value=day, unit="days")
-        )
-        & (
-            transactions_df.tx_datetime
-            < start_date + pd.Timedelta(value=day + 14, unit="days")
-        )
-        & (transactions_df.customer_id.isin(compromised_customers))
-    ]
+    compromised_rows = customer_day_index.get_rows(
+        entity_ids=compromised_customers, first_day=day, end_day=day + 14
+    )
 
-    nb_compromised_transactions = len(compromised_transactions)
+    nb_compromised_transactions = len(compromised_rows)
 
     random.seed(day)
 
-    index_fauds = random.sample(
-        list(compromised_transactions.index.values),
+    fraud_rows = random.sample(
+        list(compromised_rows),
         k=int(nb_compromised_transactions / 3),
     )
 
-    transactions_df.loc[index_fauds, "tx_amount"] = (
-        transactions_df.loc[index_fauds, "tx_amount"] * 5
-    )
-    transactions_df.loc[index_fauds, "tx_fraud"] = 1
-    transactions_df.loc[index_fauds, "tx_fraud_scenario"] = 3
-
-    return transactions_df
+    return np.array(fraud_rows, dtype=np.int64)
 
 
-@utils.cacher
+@utils.cacher(ignore=["n_jobs"])
 def simulate_credit_card_transactions_data(
     n_terminals: int,
     n_customers: int,
@@ -501,6 +682,7 @@ def simulate_credit_card_transactions_data(
     start_date: pd.Timestamp,
     nb_days: int,
     random_state: int,
+    n_jobs: int = -1,
 ) -> pd.DataFrame:
     """Simulate credit card transaction date.
 
@@ -536,6 +718,10 @@ def simulate_credit_card_transactions_data(
             a terminal.
         random_state: int
             Random seed for reproducibility purposes.
+        n_jobs: int
+            Number of processes used to generate the transactions, -1 means
+            using all the CPUs. The data does not depend on it, so it is
+            not part of the cache key.
 
     Returns:
         pd.DataFrame:
@@ -571,26 +757,31 @@ def simulate_credit_card_transactions_data(
         [c.__dict__ for c in customer_profiles_list]
     )
 
-    customer_profiles_df["available_terminals"] = customer_profiles_df.apply(
-        lambda row: get_available_terminals_for_customer(
-            x_y_customer=row[["x_customer_id", "y_customer_id"]].values.astype(
-                float
-            ),
-            x_y_terminals=x_y_terminals,
-            radius=radius,
-        ),
-        axis=1,
+    available_terminals = get_available_terminals(
+        x_y_customers=customer_profiles_df[
+            ["x_customer_id", "y_customer_id"]
+        ].values.astype(float),
+        x_y_terminals=x_y_terminals,
+        radius=radius,
     )
 
-    transactions_df = (
-        customer_profiles_df.groupby("customer_id")
-        .apply(
-            lambda x: generate_transaction_table(
-                x.iloc[0], start_date=start_date, nb_days=nb_days
-            )
+    if n_jobs == 1:
+        transactions_df = generate_transaction_table(
+            customer_profiles_df=customer_profiles_df,
+            available_terminals=available_terminals,
+            start_date=start_date,
+            nb_days=nb_days,
+            random_state=random_state,
+        )
+    else:
+        transactions_df = generate_transaction_table_sharded(
+            customer_profiles_df=customer_profiles_df,
+            available_terminals=available_terminals,
+            start_date=start_date,
+            nb_days=nb_days,
+            random_state=random_state,
+            n_jobs=n_jobs,
         )
-        .reset_index(drop=True)
-    )
 
     transactions_df = add_frauds(
         customer_profiles_df=customer_profiles_df,
@@ -1,9 +1,11 @@
 """Feature transformations library."""
 from fraud.domain.feature_transformations.aggregated_features import (
     AggFunc,
+    AggregatedFeatureParams,
     TimeUnits,
     aggregate_feature,
     aggregate_feature_by_time_window,
+    get_aggregated_feature_name,
     get_time_since_previous_transaction,
     time_since_previous_transaction,
 )
@@ -11,13 +13,21 @@ from fraud.domain.feature_transformations.binary_encoding import (
     is_night,
     is_weekday,
 )
+from fraud.domain.feature_transformations.online_aggregated_features import (
+    LateTransactionError,
+    OnlineFeatureStore,
+)
 
 __all__ = [
     "aggregate_feature_by_time_window",
     "aggregate_feature",
     "AggFunc",
+    "AggregatedFeatureParams",
+    "get_aggregated_feature_name",
     "is_weekday",
     "is_night",
+    "LateTransactionError",
+    "OnlineFeatureStore",
     "TimeUnits",
     "get_time_since_previous_transaction",
     "time_since_previous_transaction",
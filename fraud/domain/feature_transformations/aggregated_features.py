@@ -1,8 +1,17 @@
 """Aggregated features."""
 import enum
-from typing import List
-
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
 import pandas as pd
+from numpy.typing import NDArray
+from pandas.api.indexers import BaseIndexer
 
 from fraud import utils
 
@@ -22,6 +31,60 @@ class AggFunc(str, enum.Enum):
     MEAN = "mean"
 
 
+@dataclass
+class AggregatedFeatureParams:
+    """Definition of a feature aggregated by time window and entity.
+
+    Holds the aggregate_feature arguments that define the features, so the
+    same definition can be computed in batch and online.
+    """
+
+    grouping_column: str
+    feature_name: str
+    windows_size_in_days: List[int]
+    agg_func_list: List[AggFunc]
+    time_unit: TimeUnits = TimeUnits.DAYS
+    delay_period: int = 0
+
+
+def get_aggregated_feature_name(
+    grouping_column: str,
+    agg_func: AggFunc,
+    feature_name: str,
+    window_size: int,
+    time_unit: TimeUnits,
+) -> str:
+    """Get the name of an aggregated feature column.
+
+    Args:
+        grouping_column: str
+            Outer grouping variable.
+        agg_func: AggFunc
+            Aggregation function.
+        feature_name: str
+            Name of the aggregated feature.
+        window_size: int
+            Window size.
+        time_unit: TimeUnits
+            Time unit for the window size.
+
+    Returns:
+        str:
+            Column name, e.g., customer_id_mean_tx_amount_5_days.
+    """
+    return (
+        grouping_column
+        + "_"
+        + agg_func.value
+        + "_"
+        + feature_name
+        + "_"
+        + str(window_size)
+        + "_"
+        + time_unit.value
+    )
+
+
 def aggregate_feature(
     transactions_df: pd.DataFrame,
     windows_size_in_days: List[int],
@@ -35,6 +98,9 @@ def aggregate_feature(
 ) -> pd.DataFrame:
     """Aggregate a feature by a time window and another grouping variable.
 
+    Rows are returned sorted by grouping variable and timestamp, rows with the
+    same group and timestamp keep their original order.
+
     Args:
         transactions_df: pd.DataFrame
             Transactions data frame.
@@ -61,25 +127,154 @@ def aggregate_feature(
         pd.DataFrame
             Data frame with the aggregated features.
     """
-    transactions_df = transactions_df.groupby(by=grouping_column).apply(
-        lambda x: aggregate_feature_by_time_window(
-            data=x,
-            windows_size_in_days=windows_size_in_days,
-            time_unit=time_unit,
-            feature_name=feature_name,
-            agg_func_list=agg_func_list,
-            datetime_col=datetime_col,
-            index_name=index_name,
-            grouping_column=grouping_column,
-            delay_period=delay_period,
-        )
+    data = transactions_df.reset_index()
+    data = data[data[grouping_column].notna()]
+
+    # Sort once by (group, timestamp), every group becomes a contiguous
+    # segment and all the windows are computed in a single pass over them.
+    group_codes, _ = pd.factorize(data[grouping_column], sort=True)
+    timestamps = (
+        data[datetime_col].values.astype("datetime64[ns]").view(np.int64)
     )
+    sorted_rows = np.lexsort((timestamps, group_codes))
+
+    columns = [datetime_col] + [
+        col for col in data.columns if col not in (datetime_col, index_name)
+    ]
+    data = data.iloc[sorted_rows, data.columns.get_indexer(columns)]
+    data = data.reset_index(drop=True)
+
+    timestamps = timestamps[sorted_rows]
+    segment_starts = get_segment_starts(group_codes=group_codes[sorted_rows])
+
+    feature = data[feature_name]
+
+    window_indexers: Dict[pd.Timedelta, GroupedWindowIndexer] = {}
+
+    def rolling_agg(window: pd.Timedelta, agg_func: AggFunc) -> pd.Series:
+        """Aggregate the feature over a window, reusing the window bounds."""
+        if window not in window_indexers:
+            window_indexers[window] = GroupedWindowIndexer(
+                start=get_window_starts(
+                    timestamps=timestamps,
+                    segment_starts=segment_starts,
+                    window=window.value,
+                ),
+                end=np.arange(1, len(timestamps) + 1, dtype=np.int64),
+            )
 
-    transactions_df = transactions_df.reset_index(drop=True)
+        return feature.rolling(
+            window=window_indexers[window], min_periods=1
+        ).agg(agg_func.value)
 
-    transactions_df["transaction_id"] = range(len(transactions_df))
+    for window_size in windows_size_in_days:
 
-    return transactions_df.set_index("transaction_id")
+        for agg_func in agg_func_list:
+            aggregated_feature = rolling_agg(
+                window=pd.Timedelta(
+                    value=window_size + delay_period, unit=time_unit.value
+                ),
+                agg_func=agg_func,
+            )
+
+            if delay_period > 0:
+
+                aggregated_feature = aggregated_feature - rolling_agg(
+                    window=pd.Timedelta(
+                        value=delay_period, unit=TimeUnits.DAYS.value
+                    ),
+                    agg_func=agg_func,
+                )
+
+            feature_column = get_aggregated_feature_name(
+                grouping_column=grouping_column,
+                agg_func=agg_func,
+                feature_name=feature_name,
+                window_size=window_size,
+                time_unit=time_unit,
+            )
+            data[feature_column] = aggregated_feature.values
+
+    data["transaction_id"] = range(len(data))
+
+    return data.set_index("transaction_id")
+
+
+class GroupedWindowIndexer(BaseIndexer):
+    """Rolling window indexer with precomputed window bounds."""
+
+    def get_window_bounds(
+        self,
+        num_values: int = 0,
+        min_periods: Optional[int] = None,
+        center: Optional[bool] = None,
+        closed: Optional[str] = None,
+        step: Optional[int] = None,
+    ) -> Tuple[NDArray, NDArray]:
+        """Get the precomputed window bounds.
+
+        Returns:
+            Tuple[NDArray, NDArray]:
+                Start and end (exclusive) of the window of every row.
+        """
+        return self.start, self.end
+
+
+def get_segment_starts(group_codes: NDArray) -> NDArray:
+    """Get the first row of the contiguous segment of every row.
+
+    Args:
+        group_codes: NDArray
+            Group of every row, rows of the same group must be contiguous.
+
+    Returns:
+        NDArray:
+            Position of the first row of the group of every row.
+    """
+    rows = np.arange(len(group_codes))
+    is_first = np.diff(group_codes, prepend=np.nan) != 0
+
+    return np.maximum.accumulate(np.where(is_first, rows, 0))
+
+
+def get_window_starts(
+    timestamps: NDArray, segment_starts: NDArray, window: int
+) -> NDArray:
+    """Get the start of the right-closed time window of every row.
+
+    Same bounds as pandas time based rolling windows, applied within every
+    segment: the window of row i holds the rows j <= i of its segment such
+    that timestamps[j] > timestamps[i] - window. The bounds of all the rows
+    are found at once with a branchless binary search, whose probes stay
+    close to every row.
+
+    Args:
+        timestamps: NDArray
+            Integer timestamps, sorted within every segment.
+        segment_starts: NDArray
+            Position of the first row of the segment of every row.
+        window: int
+            Window length, in timestamps units.
+
+    Returns:
+        NDArray:
+            Position of the first row within the window of every row.
+    """
+    rows = np.arange(len(timestamps), dtype=np.int64)
+    thresholds = timestamps - window
+
+    starts = segment_starts.astype(np.int64)
+    max_length = (rows - starts).max(initial=0)
+
+    # Skip `step` rows while the last skipped row is out of the window, the
+    # row itself is always within it, so the probes never leave its segment.
+    step = 1 << int(max_length).bit_length()
+    while step > 0:
+        probes = np.minimum(starts + (step - 1), rows)
+        starts += step * (timestamps[probes] <= thresholds)
+        step >>= 1
+
+    return starts
 
 
 def aggregate_feature_by_time_window(
@@ -153,17 +348,14 @@ def aggregate_feature_by_time_window(
                     aggregated_feature - aggregated_feature_delay
                 )
 
-            data[
-                grouping_column
-                + "_"
-                + agg_func.value
-                + "_"
-                + feature_name
-                + "_"
-                + str(window_size)
-                + "_"
-                + time_unit.value
-            ] = list(aggregated_feature)
+            feature_column = get_aggregated_feature_name(
+                grouping_column=grouping_column,
+                agg_func=agg_func,
+                feature_name=feature_name,
+                window_size=window_size,
+                time_unit=time_unit,
+            )
+            data[feature_column] = list(aggregated_feature)
 
     data = data.reset_index().set_index(keys=index_name)
 
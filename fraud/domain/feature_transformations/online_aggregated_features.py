@@ -0,0 +1,993 @@
+"""Online aggregated features.
+
+Incremental counterpart of aggregate_feature for real time inference: the
+rolling windows of every entity are updated as the transactions are
+recorded.
+"""
+from __future__ import annotations
+
+import copy
+import functools
+import math
+import pathlib
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+
+from fraud import utils
+from fraud.domain.feature_transformations.aggregated_features import (
+    AggFunc,
+    AggregatedFeatureParams,
+    TimeUnits,
+    get_aggregated_feature_name,
+)
+
+
+class RollingWindowState:
+    """Running aggregations of the values within a rolling window.
+
+    Values are added and removed with the same Kahan compensated steps as the
+    pandas rolling sum and mean kernels, and the state is reset whenever the
+    window only holds the newest value, so the aggregations are bit-identical
+    to pandas rolling over the same rows.
+    """
+
+    def __init__(self):
+        """Instantiate an empty window."""
+        self.start = 0
+        self.reset(value=math.nan)
+
+    def reset(self, value: float) -> None:
+        """Empty the window.
+
+        Args:
+            value: float
+                Value that opens the new window.
+        """
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = value
+
+    def add(self, value: float) -> None:
+        """Add a value to the window, NaNs are ignored.
+
+        Args:
+            value: float
+                Value entering the window.
+        """
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+    def remove(self, value: float) -> None:
+        """Remove a value from the window, NaNs are ignored.
+
+        Args:
+            value: float
+                Value leaving the window.
+        """
+        if value == value:
+            self.nobs -= 1
+            y = -value - self.compensation_remove
+            t = self.sum_x + y
+            self.compensation_remove = t - self.sum_x - y
+            self.sum_x = t
+
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct -= 1
+
+    def get_aggregation(self, agg_func: AggFunc) -> float:
+        """Aggregate the values within the window.
+
+        Args:
+            agg_func: AggFunc
+                Aggregation function.
+
+        Returns:
+            float:
+                Aggregated value, NaN if the window has no values.
+        """
+        if agg_func == AggFunc.COUNT:
+            return float(self.nobs)
+
+        if self.nobs == 0:
+            return math.nan
+
+        if self.num_consecutive_same_value >= self.nobs:
+            if agg_func == AggFunc.SUM:
+                return self.prev_value * self.nobs
+            return self.prev_value
+
+        if agg_func == AggFunc.SUM:
+            return self.sum_x
+
+        result = self.sum_x / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+
+        return result
+
+
+class LateTransactionError(ValueError):
+    """Transaction older than the allowed lateness of its entity."""
+
+
+class EntityHistory:
+    """Recent values of an entity and their rolling windows.
+
+    The values are kept in a ring buffer, only as long as they are within
+    the largest window, or the retention period if it is longer, so the
+    windows of a transaction arriving late can still be rebuilt.
+    """
+
+    def __init__(self, windows: Iterable[int], retention: int = 0):
+        """Instantiate an empty history.
+
+        Args:
+            windows: Iterable[int]
+                Window lengths, in nanoseconds.
+            retention: int
+                Time the values are kept for, in nanoseconds, at least the
+                largest window.
+        """
+        self.timestamps: deque = deque()
+        self.values: deque = deque()
+        self.transaction_ids: deque = deque()
+        # Number of values dropped from the head of the buffers.
+        self.first_position = 0
+        self.windows = {window: RollingWindowState() for window in windows}
+        self.max_window = max(self.windows, default=0)
+        self.retention = max(retention, self.max_window)
+
+    def update(
+        self,
+        timestamp: int,
+        value: float,
+        transaction_id: Optional[Hashable] = None,
+    ) -> None:
+        """Add a value and slide the windows up to its timestamp.
+
+        A value older than the newest one is inserted in time order and the
+        windows are rebuilt, a value older than the retention period is
+        dropped as it is out of every window.
+
+        Args:
+            timestamp: int
+                Timestamp of the value, in nanoseconds.
+            value: float
+                New value.
+            transaction_id: Optional[Hashable]
+                Transaction of the value, to set it later with set_value.
+        """
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            self._insert(
+                timestamp=timestamp,
+                value=value,
+                transaction_id=transaction_id,
+            )
+            return
+
+        timestamps, values = self.timestamps, self.values
+        offset = self.first_position
+        position = offset + len(timestamps)
+        timestamps.append(timestamp)
+        values.append(value)
+        self.transaction_ids.append(transaction_id)
+
+        for window, state in self.windows.items():
+            threshold = timestamp - window
+            start = state.start
+            while timestamps[start - offset] <= threshold:
+                start += 1
+
+            if start >= position:
+                state.reset(value=value)
+            else:
+                for j in range(state.start - offset, start - offset):
+                    state.remove(value=values[j])
+            state.add(value=value)
+            state.start = start
+
+        threshold = timestamp - self.retention
+        first_start = offset
+        while timestamps[first_start - offset] <= threshold:
+            first_start += 1
+
+        for _ in range(first_start - offset):
+            timestamps.popleft()
+            values.popleft()
+            self.transaction_ids.popleft()
+        self.first_position = first_start
+
+    def get_window_states(
+        self, timestamp: int, value: float
+    ) -> Dict[int, RollingWindowState]:
+        """Get the windows as if a value were added, leaving them unchanged.
+
+        Args:
+            timestamp: int
+                Timestamp of the value, in nanoseconds.
+            value: float
+                New value.
+
+        Returns:
+            Dict[int, RollingWindowState]:
+                State of every window.
+
+        Raises:
+            LateTransactionError:
+                If the value is older than the newest one by more than the
+                retention period covers.
+        """
+        timestamps, values = self.timestamps, self.values
+        if not timestamps or timestamp >= timestamps[-1]:
+            offset = self.first_position
+            position = offset + len(timestamps)
+
+            states = {}
+            for window, state in self.windows.items():
+                threshold = timestamp - window
+                start = state.start
+                while start < position and (
+                    timestamps[start - offset] <= threshold
+                ):
+                    start += 1
+
+                new_state = copy.copy(state)
+                if start >= position:
+                    new_state.reset(value=value)
+                else:
+                    for j in range(state.start - offset, start - offset):
+                        new_state.remove(value=values[j])
+                new_state.add(value=value)
+                states[window] = new_state
+
+            return states
+
+        lateness = self.retention - self.max_window
+        if timestamp < timestamps[-1] - lateness:
+            raise LateTransactionError(
+                f"Transaction at {pd.Timestamp(timestamp)} is more than "
+                f"{pd.Timedelta(lateness)} older than the last one of its "
+                f"entity, at {pd.Timestamp(timestamps[-1])}"
+            )
+
+        end = self._get_insert_position(timestamp=timestamp)
+        states = {}
+        for window in self.windows:
+            state = RollingWindowState()
+            threshold = timestamp - window
+            for j in range(end):
+                if timestamps[j] > threshold:
+                    state.add(value=values[j])
+            state.add(value=value)
+            states[window] = state
+
+        return states
+
+    def set_value(self, transaction_id: Hashable, value: float) -> bool:
+        """Set the value of a transaction and rebuild the windows.
+
+        Args:
+            transaction_id: Hashable
+                Transaction whose value is set.
+            value: float
+                New value.
+
+        Returns:
+            bool:
+                False if the transaction is no longer in the history.
+        """
+        for j in range(len(self.transaction_ids) - 1, -1, -1):
+            if self.transaction_ids[j] == transaction_id:
+                self.values[j] = value
+                self._rebuild()
+                return True
+
+        return False
+
+    def _get_insert_position(self, timestamp: int) -> int:
+        """Get the buffer position of a value, after the older or equal."""
+        position = len(self.timestamps)
+        while position > 0 and self.timestamps[position - 1] > timestamp:
+            position -= 1
+
+        return position
+
+    def _insert(
+        self,
+        timestamp: int,
+        value: float,
+        transaction_id: Optional[Hashable],
+    ) -> None:
+        """Insert a value older than the newest one."""
+        if timestamp <= self.timestamps[-1] - self.retention:
+            return
+
+        position = self._get_insert_position(timestamp=timestamp)
+        self.timestamps.insert(position, timestamp)
+        self.values.insert(position, value)
+        self.transaction_ids.insert(position, transaction_id)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Aggregate the windows of the newest value from the buffer."""
+        timestamps = self.timestamps
+        for window, state in self.windows.items():
+            threshold = timestamps[-1] - window
+            start = 0
+            while timestamps[start] <= threshold:
+                start += 1
+
+            state.reset(value=math.nan)
+            for j in range(start, len(timestamps)):
+                state.add(value=self.values[j])
+            state.start = self.first_position + start
+
+
+@functools.lru_cache(maxsize=None)
+def get_unit_nanoseconds(unit: str) -> int:
+    """Get the number of nanoseconds of a time unit.
+
+    Args:
+        unit: str
+            Time unit, e.g., "ms".
+
+    Returns:
+        int:
+            Nanoseconds in the unit.
+    """
+    return pd.Timedelta(value=1, unit=unit).value
+
+
+def get_feature_windows(
+    params: AggregatedFeatureParams,
+) -> List[Tuple[str, AggFunc, int, Optional[int]]]:
+    """Get the rolling windows that compute every aggregated feature column.
+
+    Args:
+        params: AggregatedFeatureParams
+            Aggregated feature definition.
+
+    Returns:
+        List[Tuple[str, AggFunc, int, Optional[int]]]:
+            Column name, aggregation function, window length and delay window
+            length, in nanoseconds, of every feature column. The delay window
+            is None if there is no delay period.
+    """
+    delay_window = None
+    if params.delay_period > 0:
+        delay_window = pd.Timedelta(
+            value=params.delay_period, unit=TimeUnits.DAYS.value
+        ).value
+
+    feature_windows = []
+    for window_size in params.windows_size_in_days:
+        window = pd.Timedelta(
+            value=window_size + params.delay_period,
+            unit=params.time_unit.value,
+        ).value
+
+        for agg_func in params.agg_func_list:
+            feature_column = get_aggregated_feature_name(
+                grouping_column=params.grouping_column,
+                agg_func=agg_func,
+                feature_name=params.feature_name,
+                window_size=window_size,
+                time_unit=params.time_unit,
+            )
+            feature_windows.append(
+                (feature_column, agg_func, window, delay_window)
+            )
+
+    return feature_windows
+
+
+@dataclass
+class RecordedTransaction:
+    """Transaction recorded in the feature store.
+
+    Attributes:
+        timestamp: int
+            Timestamp of the transaction, in nanoseconds.
+        entities: List[Hashable]
+            Entity of the transaction of every feature definition.
+        features: Dict[str, float]
+            Aggregated features the transaction was recorded with.
+    """
+
+    timestamp: int
+    entities: List[Hashable]
+    features: Dict[str, float]
+
+
+class OnlineFeatureStore:
+    """In-process store of the aggregated features of every entity.
+
+    Reading the features of a transaction leaves the store unchanged, they
+    are the same aggregate_feature computes over the table of the recorded
+    transactions plus this one. Recording a transaction updates the rolling
+    windows of its customer, terminal, etc. in amortized constant time, and
+    recording it again, e.g., when a request is retried, is a no-op, so
+    scoring is idempotent. Transactions may arrive late by up to
+    allowed_lateness, older ones are rejected with LateTransactionError.
+
+    The label, e.g., tx_fraud, is only known once a transaction is
+    reviewed, so it is fed back with update_label. Unlabeled transactions
+    are not counted by the label features, and a window without labeled
+    transactions aggregates to 0, no known fraud, instead of NaN. In the
+    training data every transaction is labeled, so the features only differ
+    while labels are pending.
+
+    The state lives in the process, so the store must be served by a single
+    worker process, other processes would only see their share of the
+    transactions. Within the process, reads, records and label updates are
+    serialized by a lock, so the labels can be fed back from another thread
+    than the predictions.
+    """
+
+    def __init__(
+        self,
+        features_params: List[AggregatedFeatureParams],
+        datetime_col: str = "tx_datetime",
+        label_col: str = "tx_fraud",
+        allowed_lateness: pd.Timedelta = pd.Timedelta(minutes=10),
+    ):
+        """Instantiate an empty feature store.
+
+        Args:
+            features_params: List[AggregatedFeatureParams]
+                Aggregated features definitions.
+            datetime_col: str
+                Name of the timestamp column.
+            label_col: str
+                Name of the label column, set with update_label.
+            allowed_lateness: pd.Timedelta
+                How much older than the last transaction of its entities a
+                transaction can be.
+        """
+        self.features_params = list(features_params)
+        self.datetime_col = datetime_col
+        self.label_col = label_col
+        self.allowed_lateness = pd.Timedelta(allowed_lateness).value
+        self.histories: List[Dict[Hashable, EntityHistory]] = [
+            {} for _ in self.features_params
+        ]
+        self.features_windows = [
+            get_feature_windows(params=params)
+            for params in self.features_params
+        ]
+
+        # Recorded transactions, kept as long as their label can change a
+        # window.
+        self.recorded: Dict[Hashable, RecordedTransaction] = {}
+        self._recorded_order: deque = deque()
+        self.retention = self.allowed_lateness + max(
+            (
+                max(window, delay_window or 0)
+                for feature_windows in self.features_windows
+                for _, _, window, delay_window in feature_windows
+            ),
+            default=0,
+        )
+        self._lock = threading.RLock()
+
+    def get_grouping_columns(self) -> Dict[str, str]:
+        """Get the grouping column every aggregated feature is computed by.
+
+        Returns:
+            Dict[str, str]:
+                Grouping column, e.g., customer_id, of every feature column.
+        """
+        return {
+            column: params.grouping_column
+            for params, feature_windows in zip(
+                self.features_params, self.features_windows
+            )
+            for column, _, _, _ in feature_windows
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Get the state to pickle, without the lock."""
+        state = self.__dict__.copy()
+        state.pop("_lock", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the pickled state with a new lock."""
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def has_same_features(self, other: OnlineFeatureStore) -> bool:
+        """Check if another store computes the same features.
+
+        Args:
+            other: OnlineFeatureStore
+                Feature store to compare with.
+
+        Returns:
+            bool:
+                True if both have the same feature definitions, columns and
+                allowed lateness.
+        """
+        return (
+            self.features_params,
+            self.datetime_col,
+            self.label_col,
+            self.allowed_lateness,
+        ) == (
+            other.features_params,
+            other.datetime_col,
+            other.label_col,
+            other.allowed_lateness,
+        )
+
+    def get_features(
+        self,
+        transaction: Dict[str, Any],
+        transaction_id: Optional[Hashable] = None,
+    ) -> Dict[str, float]:
+        """Get the aggregated features of a transaction, without recording it.
+
+        Args:
+            transaction: Dict[str, Any]
+                Transaction record with the timestamp, the grouping columns
+                and the features to aggregate.
+            transaction_id: Optional[Hashable]
+                Transaction id, the features of a recorded transaction are
+                the ones it was recorded with.
+
+        Returns:
+            Dict[str, float]:
+                Aggregated features of the transaction.
+        """
+        with self._lock:
+            return self._get_features(
+                transaction=transaction,
+                timestamp=pd.Timestamp(transaction[self.datetime_col]).value,
+                transaction_id=transaction_id,
+            )
+
+    def record(
+        self, transaction: Dict[str, Any], transaction_id: Hashable
+    ) -> Dict[str, float]:
+        """Record a transaction, once, and get its aggregated features.
+
+        Args:
+            transaction: Dict[str, Any]
+                Transaction record.
+            transaction_id: Hashable
+                Transaction id, a transaction already recorded is not
+                recorded again.
+
+        Returns:
+            Dict[str, float]:
+                Aggregated features of the transaction.
+        """
+        with self._lock:
+            return self._record(
+                transaction=transaction,
+                timestamp=pd.Timestamp(transaction[self.datetime_col]).value,
+                transaction_id=transaction_id,
+            )
+
+    def update_label(self, transaction_id: Hashable, tx_fraud: float) -> bool:
+        """Set the label of a recorded transaction.
+
+        Args:
+            transaction_id: Hashable
+                Transaction id.
+            tx_fraud: float
+                Label of the transaction.
+
+        Returns:
+            bool:
+                False if the transaction is not recorded, or no longer
+                within any window.
+        """
+        with self._lock:
+            recorded = self.recorded.get(transaction_id)
+            if recorded is None:
+                return False
+
+            is_updated = False
+            for params, histories, entity in zip(
+                self.features_params, self.histories, recorded.entities
+            ):
+                if params.feature_name != self.label_col or entity is None:
+                    continue
+
+                history = histories.get(entity)
+                if history is not None:
+                    is_updated |= history.set_value(
+                        transaction_id=transaction_id, value=float(tx_fraud)
+                    )
+
+            return is_updated
+
+    def _get_features(
+        self,
+        transaction: Dict[str, Any],
+        timestamp: int,
+        transaction_id: Optional[Hashable],
+    ) -> Dict[str, float]:
+        """Get the aggregated features of a transaction.
+
+        Args:
+            transaction: Dict[str, Any]
+                Transaction record.
+            timestamp: int
+                Timestamp of the transaction, in nanoseconds.
+            transaction_id: Optional[Hashable]
+                Transaction id.
+
+        Returns:
+            Dict[str, float]:
+                Aggregated features of the transaction.
+        """
+        recorded = self.recorded.get(transaction_id)
+        if recorded is not None:
+            return dict(recorded.features)
+
+        features = {}
+        for params, histories, feature_windows in zip(
+            self.features_params, self.histories, self.features_windows
+        ):
+            features.update(
+                self._get_feature(
+                    histories=histories,
+                    feature_windows=feature_windows,
+                    entity=transaction.get(params.grouping_column),
+                    timestamp=timestamp,
+                    value=transaction.get(params.feature_name),
+                    is_label=params.feature_name == self.label_col,
+                )
+            )
+
+        return features
+
+    def _record(
+        self,
+        transaction: Dict[str, Any],
+        timestamp: int,
+        transaction_id: Hashable,
+    ) -> Dict[str, float]:
+        """Record a transaction and get its aggregated features.
+
+        Args:
+            transaction: Dict[str, Any]
+                Transaction record.
+            timestamp: int
+                Timestamp of the transaction, in nanoseconds.
+            transaction_id: Hashable
+                Transaction id.
+
+        Returns:
+            Dict[str, float]:
+                Aggregated features of the transaction.
+        """
+        features = self._get_features(
+            transaction=transaction,
+            timestamp=timestamp,
+            transaction_id=transaction_id,
+        )
+        if transaction_id in self.recorded:
+            return features
+
+        entities = []
+        for params, histories, feature_windows in zip(
+            self.features_params, self.histories, self.features_windows
+        ):
+            entity = transaction.get(params.grouping_column)
+            if entity is None or pd.isna(entity):
+                entities.append(None)
+                continue
+
+            value = transaction.get(params.feature_name)
+            self._get_history(
+                histories=histories,
+                feature_windows=feature_windows,
+                entity=entity,
+            ).update(
+                timestamp=timestamp,
+                value=math.nan if value is None else float(value),
+                transaction_id=transaction_id,
+            )
+            entities.append(entity)
+
+        self.recorded[transaction_id] = RecordedTransaction(
+            timestamp=timestamp, entities=entities, features=features
+        )
+        self._recorded_order.append((timestamp, transaction_id))
+
+        # Labels only matter while the transaction is within a window.
+        threshold = timestamp - self.retention
+        while self._recorded_order and self._recorded_order[0][0] < threshold:
+            _, expired_id = self._recorded_order.popleft()
+            self.recorded.pop(expired_id, None)
+
+        return features
+
+    def fill_record(
+        self,
+        transaction: Dict[str, Any],
+        transaction_id: Optional[Hashable] = None,
+        unit: str = "ms",
+    ) -> Dict[str, Any]:
+        """Fill the missing aggregated features of a transaction record.
+
+        Args:
+            transaction: Dict[str, Any]
+                Transaction record, its timestamp is a Unix timestamp.
+            transaction_id: Optional[Hashable]
+                Transaction id, if given the transaction is recorded.
+            unit: str
+                Unit of the Unix timestamp.
+
+        Returns:
+            Dict[str, Any]:
+                Copy of the record with the aggregated features, the values
+                already present in the record are kept.
+        """
+        timestamp = int(transaction[self.datetime_col]) * get_unit_nanoseconds(
+            unit=unit
+        )
+        with self._lock:
+            if transaction_id is None:
+                features = self._get_features(
+                    transaction=transaction,
+                    timestamp=timestamp,
+                    transaction_id=None,
+                )
+            else:
+                features = self._record(
+                    transaction=transaction,
+                    timestamp=timestamp,
+                    transaction_id=transaction_id,
+                )
+
+        record = dict(transaction)
+        for column, value in features.items():
+            current = record.get(column)
+            if current is None or current != current:
+                record[column] = value
+
+        return record
+
+    def fill_features(
+        self,
+        data: pd.DataFrame,
+        transaction_ids: Optional[Sequence[Hashable]] = None,
+    ) -> pd.DataFrame:
+        """Fill the missing aggregated features of the transactions.
+
+        Args:
+            data: pd.DataFrame
+                Transactions, in arrival order.
+            transaction_ids: Optional[Sequence[Hashable]]
+                Transaction id of every row, if given the transactions are
+                recorded one after the other. Otherwise they are only read,
+                so rows of the same entity do not see each other.
+
+        Returns:
+            pd.DataFrame:
+                Transactions with the aggregated features, the values already
+                present in data are kept.
+        """
+        data = data.copy()
+        records = data.to_dict(orient="records")
+
+        if transaction_ids is None:
+            features = [
+                self.get_features(transaction=transaction)
+                for transaction in records
+            ]
+        else:
+            features = [
+                self.record(
+                    transaction=transaction, transaction_id=transaction_id
+                )
+                for transaction, transaction_id in zip(
+                    records, transaction_ids
+                )
+            ]
+
+        features = pd.DataFrame(features, index=data.index)
+
+        for column in features.columns:
+            if column in data.columns:
+                data[column] = (
+                    data[column].astype(float).fillna(features[column])
+                )
+            else:
+                data[column] = features[column]
+
+        return data
+
+    def warm(self, transactions_df: pd.DataFrame) -> None:
+        """Replay historical transactions, e.g., the training data.
+
+        Every feature is replayed in the row order aggregate_feature would
+        see it when the features are computed one after the other, so rows
+        with the same entity and timestamp get the batch values too.
+
+        Args:
+            transactions_df: pd.DataFrame
+                Historical transactions.
+        """
+        data = transactions_df
+        for params, histories, feature_windows in zip(
+            self.features_params, self.histories, self.features_windows
+        ):
+            data = data[data[params.grouping_column].notna()]
+
+            timestamps = (
+                data[self.datetime_col]
+                .values.astype("datetime64[ns]")
+                .view(np.int64)
+            )
+            rows = np.argsort(timestamps, kind="stable")
+
+            for entity, timestamp, value in zip(
+                data[params.grouping_column].values[rows].tolist(),
+                timestamps[rows].tolist(),
+                data[params.feature_name].values[rows].tolist(),
+            ):
+                self._get_history(
+                    histories=histories,
+                    feature_windows=feature_windows,
+                    entity=entity,
+                ).update(timestamp=timestamp, value=float(value))
+
+            group_codes, _ = pd.factorize(
+                data[params.grouping_column], sort=True
+            )
+            data = data.iloc[np.lexsort((timestamps, group_codes))]
+
+    def snapshot(
+        self, file_path: pathlib.Path, file_name: str = "feature_store"
+    ) -> None:
+        """Save the feature store state.
+
+        Args:
+            file_path: pathlib.Path
+                Directory where the snapshot will be saved.
+            file_name: str
+                Name of the snapshot file, without extension.
+        """
+        utils.dump_artifacts(
+            obj=self, file_path=file_path, file_name=file_name
+        )
+
+    @classmethod
+    def restore(cls, file_path: pathlib.Path) -> OnlineFeatureStore:
+        """Load a feature store from a snapshot.
+
+        Args:
+            file_path: pathlib.Path
+                Snapshot file.
+
+        Returns:
+            OnlineFeatureStore:
+                Feature store with the saved state.
+        """
+        feature_store = utils.load_artifacts(file_path=file_path)
+
+        if not isinstance(feature_store, cls):
+            raise ValueError(f"{file_path} is not a feature store snapshot")
+
+        return feature_store
+
+    def _get_history(
+        self,
+        histories: Dict[Hashable, EntityHistory],
+        feature_windows: List[Tuple[str, AggFunc, int, Optional[int]]],
+        entity: Hashable,
+        is_created: bool = True,
+    ) -> Optional[EntityHistory]:
+        """Get the history of an entity, creating it if it is new."""
+        history = histories.get(entity)
+        if history is None:
+            windows = set()
+            for _, _, window, delay_window in feature_windows:
+                windows.add(window)
+                if delay_window is not None:
+                    windows.add(delay_window)
+
+            history = EntityHistory(
+                windows=windows,
+                retention=max(windows) + self.allowed_lateness,
+            )
+            if is_created:
+                histories[entity] = history
+
+        return history
+
+    def _get_feature(
+        self,
+        histories: Dict[Hashable, EntityHistory],
+        feature_windows: List[Tuple[str, AggFunc, int, Optional[int]]],
+        entity: Hashable,
+        timestamp: int,
+        value: Any,
+        is_label: bool,
+    ) -> Dict[str, float]:
+        """Aggregate an entity history as if a value were added to it.
+
+        Args:
+            histories: Dict[Hashable, EntityHistory]
+                Histories of the feature entities.
+            feature_windows: List[Tuple[str, AggFunc, int, Optional[int]]]
+                Windows of every feature column.
+            entity: Hashable
+                Entity of the transaction, e.g., its customer_id.
+            timestamp: int
+                Timestamp of the transaction, in nanoseconds.
+            value: Any
+                Value of the feature, None if it is not known.
+            is_label: bool
+                If True, a window without values aggregates to 0.
+
+        Returns:
+            Dict[str, float]:
+                Aggregated features, NaN if the transaction has no entity.
+        """
+        if entity is None or pd.isna(entity):
+            return {column: math.nan for column, _, _, _ in feature_windows}
+
+        states = self._get_history(
+            histories=histories,
+            feature_windows=feature_windows,
+            entity=entity,
+            is_created=False,
+        ).get_window_states(
+            timestamp=timestamp,
+            value=math.nan if value is None else float(value),
+        )
+
+        def aggregate(window: int, agg_func: AggFunc) -> float:
+            """Aggregate a window, unlabeled values are not counted."""
+            if is_label and states[window].nobs == 0:
+                return 0.0
+            return states[window].get_aggregation(agg_func=agg_func)
+
+        features = {}
+        for column, agg_func, window, delay_window in feature_windows:
+            features[column] = aggregate(window=window, agg_func=agg_func)
+            if delay_window is not None:
+                features[column] -= aggregate(
+                    window=delay_window, agg_func=agg_func
+                )
+
+        return features
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import enum
+import math
 
 import numpy as np
 import pandas as pd
@@ -32,6 +33,34 @@ def sin(x: ArrayLike) -> Series[float]:
     return np.sin(2 * np.pi * x)
 
 
+MS_IN_DAY = 24 * 60 * 60 * 1000
+
+# 1970-01-01, the origin of the epoch timestamps, was a Thursday.
+EPOCH_WEEKDAY = 3
+
+
+def scalar_cos(x: float) -> float:
+    """Cos function of a single value."""
+    return math.cos(2 * math.pi * x)
+
+
+def scalar_sin(x: float) -> float:
+    """Sin function of a single value."""
+    return math.sin(2 * math.pi * x)
+
+
+def scalar_identity(x: float) -> float:
+    """Identity function of a single value."""
+    return x
+
+
+_scalar_funcs = {
+    TimeEncoderFunc.SIN: scalar_sin,
+    TimeEncoderFunc.COS: scalar_cos,
+    TimeEncoderFunc.IDENTITY: scalar_identity,
+}
+
+
 def encode_day_of_week(
     tx_datetime: Series[pd.Timestamp], encoder_function: TimeEncoderFunc
 ) -> Series[float]:
@@ -105,3 +134,58 @@ def encode_day_time(
     )
 
     return func(seconds_passed / seconds_in_day)
+
+
+def encode_epoch_ms_day_of_week(
+    epoch_ms: int, encoder_function: TimeEncoderFunc
+) -> float:
+    """Encode the day of the week of a single epoch timestamp.
+
+    Same value as encode_day_of_week, computed with plain arithmetic instead
+    of the pandas datetime accessors.
+
+    Args:
+        epoch_ms: int
+            Unix timestamp in milliseconds.
+        encoder_function: TimeEncoderFunc
+            Function to encode time.
+
+    Returns:
+        float:
+            Transformed day of the week.
+    """
+    func = _scalar_funcs.get(encoder_function)
+    if func is None:
+        raise NotImplementedError(f"{encoder_function} not implemented.")
+
+    day_of_week = (epoch_ms // MS_IN_DAY + EPOCH_WEEKDAY) % 7
+
+    return func(day_of_week / 6)
+
+
+def encode_epoch_ms_day_time(
+    epoch_ms: int, encoder_function: TimeEncoderFunc
+) -> float:
+    """Encode the time of the day of a single epoch timestamp.
+
+    Same value as encode_day_time, computed with plain arithmetic instead of
+    the pandas datetime accessors.
+
+    Args:
+        epoch_ms: int
+            Unix timestamp in milliseconds.
+        encoder_function: TimeEncoderFunc
+            Function to encode time.
+
+    Returns:
+        float:
+            Transformed time of the day.
+    """
+    func = _scalar_funcs.get(encoder_function)
+    if func is None:
+        raise NotImplementedError(f"{encoder_function} not implemented.")
+
+    seconds_in_day = 24 * 60 * 60
+    seconds_passed = (epoch_ms // 1000) % seconds_in_day
+
+    return func(seconds_passed / seconds_in_day)
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 """KPIs."""
+from dataclasses import dataclass
 from typing import (
     Dict,
     List,
@@ -50,16 +51,159 @@ def card_precision_top_k_day(
     return results
 
 
-def card_precision_top_k(
-    test_data: pd.DataFrame,
+def _get_day_buckets(
+    tx_datetime: pd.Series, start_date: pd.Timestamp
+) -> np.ndarray:
+    """Get the day of every transaction since the start date.
+
+    Day i covers (start_date + i days, start_date + i + 1 days], the start
+    date itself and missing datetimes are assigned to no day, -1.
+
+    Args:
+        tx_datetime: pd.Series
+            Transaction datetimes.
+        start_date: pd.Timestamp
+            Start of the first day.
+
+    Returns:
+        np.ndarray:
+            Day of every transaction.
+    """
+    elapsed = (tx_datetime - start_date).to_numpy(dtype="timedelta64[ns]")
+    is_dated = ~np.isnat(elapsed)
+
+    days = np.full(len(elapsed), -1, dtype=np.int64)
+    days[is_dated] = (elapsed[is_dated] - np.timedelta64(1, "ns")) // (
+        np.timedelta64(1, "D")
+    )
+
+    return days
+
+
+def _sort_descending(scores: np.ndarray) -> np.ndarray:
+    """Sort scores the way DataFrame.sort_values(ascending=False) does.
+
+    The sort is not stable, so ties are broken as pandas breaks them.
+
+    Args:
+        scores: np.ndarray
+            Scores to sort.
+
+    Returns:
+        np.ndarray:
+            Positions of the scores, decreasing, missing scores last.
+    """
+    is_missing = np.isnan(scores)
+    positions = np.flatnonzero(~is_missing)[::-1]
+    order = positions[scores[positions].argsort(kind="quicksort")][::-1]
+
+    return np.concatenate([order, np.flatnonzero(is_missing)])
+
+
+def _get_top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Get the positions of the top-k scores, in no particular order.
+
+    Only the scores tied with the k-th one need sorting, which is rare,
+    otherwise the top-k is found with a partial sort.
+
+    Args:
+        scores: np.ndarray
+            Scores to select from.
+        top_k: int
+            Number of scores to select.
+
+    Returns:
+        np.ndarray:
+            Positions of the top-k scores.
+    """
+    if top_k >= len(scores):
+        return np.arange(len(scores))
+
+    keys = np.where(np.isnan(scores), -np.inf, scores)
+    kth_score = keys[np.argpartition(-keys, top_k - 1)[top_k - 1]]
+
+    is_top_k = keys >= kth_score
+    if np.count_nonzero(is_top_k) == top_k:
+        return np.flatnonzero(is_top_k)
+
+    return _sort_descending(scores=scores)[:top_k]
+
+
+@dataclass
+class DailyCustomerMaxima:
+    """Maximum score and label of every customer of every day.
+
+    Attributes:
+        day_starts: np.ndarray
+            Position of the first customer of every day, plus the number of
+            customers, so day i spans day_starts[i]:day_starts[i + 1].
+        customers: np.ndarray
+            Customer code, within every day in increasing customer_id order.
+        scores: np.ndarray
+            Maximum transaction score of every customer and day.
+        labels: np.ndarray
+            Maximum transaction label of every customer and day.
+    """
+
+    day_starts: np.ndarray
+    customers: np.ndarray
+    scores: np.ndarray
+    labels: np.ndarray
+
+
+def get_daily_customer_maxima(test_data: pd.DataFrame) -> DailyCustomerMaxima:
+    """Get the maximum score and label of every customer of every day.
+
+    Args:
+        test_data: pd.DataFrame
+            Testing data with tx_datetime, customer_id, tx_fraud and scores.
+
+    Returns:
+        DailyCustomerMaxima
+    """
+    start_date = test_data.tx_datetime.min().floor(freq="D")
+    end_date = test_data.tx_datetime.max().ceil(freq="D")
+    num_days = (end_date - start_date).days
+
+    days = _get_day_buckets(
+        tx_datetime=test_data.tx_datetime, start_date=start_date
+    )
+    customer_codes, _ = pd.factorize(test_data.customer_id, sort=True)
+    is_kept = (days >= 0) & (days < num_days) & (customer_codes >= 0)
+
+    # Maximum score and label per day and customer, grouped by sorting.
+    order = np.lexsort((customer_codes[is_kept], days[is_kept]))
+    days = days[is_kept][order]
+    customer_codes = customer_codes[is_kept][order]
+    scores = test_data.scores.to_numpy(dtype=np.float64)[is_kept][order]
+    labels = test_data.tx_fraud.to_numpy()[is_kept][order]
+
+    group_starts = np.flatnonzero(
+        np.r_[True, (np.diff(days) != 0) | (np.diff(customer_codes) != 0)]
+    )
+    if len(days) == 0:
+        group_starts = group_starts[:0]
+
+    return DailyCustomerMaxima(
+        day_starts=np.searchsorted(
+            days[group_starts], np.arange(num_days + 1)
+        ),
+        customers=customer_codes[group_starts],
+        scores=np.fmax.reduceat(scores, group_starts),
+        labels=np.maximum.reduceat(labels, group_starts),
+    )
+
+
+def card_precision_top_k_from_maxima(
+    maxima: DailyCustomerMaxima,
     top_k: int = 100,
     remove_detected_compromised_cards: bool = True,
 ) -> Tuple[float, float]:
-    """Calculate the average card precision top-k metric per day.
+    """Calculate the average card precision top-k from the daily maxima.
 
     Args:
-        test_data: pd.DataFrame
-            Testing data that will be used to calculate the metric.
+        maxima: DailyCustomerMaxima
+            Maximum score and label of every customer of every day.
         top_k: int
             Number of transactions that will be checked.
         remove_detected_compromised_cards: bool
@@ -70,43 +214,28 @@ def card_precision_top_k(
             average card precision top-k.
             perfect average card precision top-k.
     """
-    start_date = test_data.tx_datetime.min().floor(freq="D")
-    end_date = test_data.tx_datetime.max().ceil(freq="D")
-    num_days = (end_date - start_date).days
-
-    list_detected_compromised_cards = []
+    is_detected = np.zeros(maxima.customers.max(initial=-1) + 1, dtype=bool)
 
     precision_top_k_per_day_list = []
     perfect_precision_top_k_per_day_list = []
 
     # calculate the precision top-k metric per day.
-    for i in range(num_days):
-
-        df_day = test_data[
-            (
-                test_data.tx_datetime
-                <= start_date + pd.Timedelta(value=i + 1, unit="days")
-            )
-            & (
-                test_data.tx_datetime
-                > start_date + pd.Timedelta(value=i, unit="days")
-            )
-            & ~(test_data.customer_id.isin(list_detected_compromised_cards))
-        ]
-
-        results = card_precision_top_k_day(df_day=df_day, top_k=top_k)
+    for i in range(len(maxima.day_starts) - 1):
+        day = slice(maxima.day_starts[i], maxima.day_starts[i + 1])
+
+        is_candidate = ~is_detected[maxima.customers[day]]
+        day_customers = maxima.customers[day][is_candidate]
+        day_labels = maxima.labels[day][is_candidate]
+
+        top = _get_top_k(scores=maxima.scores[day][is_candidate], top_k=top_k)
 
         precision_top_k_per_day_list.append(
-            results.get("card_precision_top_k")
-        )
-        perfect_precision_top_k_per_day_list.append(
-            results.get("perfect_card_precision_top_k")
+            day_labels[top].mean() if len(top) else np.nan
         )
+        perfect_precision_top_k_per_day_list.append(day_labels.sum() / 100)
 
         if remove_detected_compromised_cards:
-            list_detected_compromised_cards.extend(
-                results.get("detected_compromised_cards_list")
-            )
+            is_detected[day_customers[top][day_labels[top] == 1]] = True
 
     # Compute the mean
     mean_precision_top_k = np.round(
@@ -118,3 +247,35 @@ def card_precision_top_k(
     )
 
     return mean_precision_top_k, perfect_precision_top_k
+
+
+def card_precision_top_k(
+    test_data: pd.DataFrame,
+    top_k: int = 100,
+    remove_detected_compromised_cards: bool = True,
+) -> Tuple[float, float]:
+    """Calculate the average card precision top-k metric per day.
+
+    The maximum score and label of every customer of every day are
+    computed at once, then every day only selects its top-k customers,
+    skipping the compromised cards already detected. It gives the same
+    results as applying card_precision_top_k_day to every day.
+
+    Args:
+        test_data: pd.DataFrame
+            Testing data that will be used to calculate the metric.
+        top_k: int
+            Number of transactions that will be checked.
+        remove_detected_compromised_cards: bool
+            If True, previously compromised cards will be removed.
+
+    Returns:
+        Tuple[float, float]:
+            average card precision top-k.
+            perfect average card precision top-k.
+    """
+    return card_precision_top_k_from_maxima(
+        maxima=get_daily_customer_maxima(test_data=test_data),
+        top_k=top_k,
+        remove_detected_compromised_cards=remove_detected_compromised_cards,
+    )
@@ -1,13 +1,11 @@
 """Business domain models."""
 from __future__ import annotations
 
-from dataclasses import (
-    dataclass,
-    field,
-)
-from typing import List
+from dataclasses import dataclass
 
+import numpy as np
 import pandas as pd
+from numpy.typing import NDArray
 
 
 @dataclass
@@ -23,7 +21,8 @@ class CustomerProfile:
             transaction amounts for the customer.
         -  mean_nb_tx_per_day: The average number of transactions per day for
             the customer.
-        - available_terminals: List of valid terminals for the customer.
+
+    The valid terminals for every customer are held in AvailableTerminals.
     """
 
     customer_id: int
@@ -32,7 +31,6 @@ class CustomerProfile:
     mean_amount: float
     std_amount: float
     mean_nb_tx_per_day: float
-    available_terminals: List[int] = field(default_factory=lambda: [])
 
 
 @dataclass
@@ -51,6 +49,61 @@ class TerminalProfiles:
     y_terminal_id: float
 
 
+@dataclass
+class AvailableTerminals:
+    """Represent the valid terminals of every customer.
+
+    The terminals are stored in a compressed sparse row structure:
+
+        - offsets: Array of size n_customers + 1.
+        - terminal_ids: Flat array of terminal ids, the valid terminals for
+            the i-th customer are terminal_ids[offsets[i]:offsets[i + 1]],
+            sorted by terminal id.
+    """
+
+    offsets: NDArray
+    terminal_ids: NDArray
+
+    @property
+    def counts(self) -> NDArray:
+        """Get the number of valid terminals per customer."""
+        return np.diff(self.offsets)
+
+    def get(self, position: int) -> NDArray:
+        """Get the valid terminals of the customer at the given position.
+
+        Args:
+            position: int
+                Position of the customer in the customer profiles table.
+
+        Returns:
+            NDArray:
+                Valid terminals for the customer.
+        """
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.terminal_ids[start:end]
+
+    def slice(self, start: int, end: int) -> AvailableTerminals:
+        """Get the valid terminals of the customers between two positions.
+
+        Args:
+            start: int
+                Position of the first customer.
+            end: int
+                Position after the last customer.
+
+        Returns:
+            AvailableTerminals:
+                Valid terminals of the customers in [start, end).
+        """
+        first, last = self.offsets[start], self.offsets[end]
+        offsets = self.offsets[start:end] - first
+        return AvailableTerminals(
+            offsets=np.append(offsets, last - first),
+            terminal_ids=self.terminal_ids[first:last],
+        )
+
+
 @dataclass
 class Transaction:
     """Represent terminal transactions.
@@ -0,0 +1,249 @@
+"""Spatial index over the terminal locations."""
+import math
+from typing import Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from fraud.domain import models
+
+
+class TerminalGridIndex:
+    """Uniform grid index over the terminal locations.
+
+    Terminals are bucketed in square cells of side `cell_size`, and the
+    bucketed terminal ids are stored sorted by cell, so every cell is a
+    contiguous slice. A radius query only has to compute distances to the
+    terminals of the cells around each point, instead of to all of them.
+
+    The cells are widened when the grid would have more than `max_cells`
+    cells, so a tiny cell size does not allocate a huge grid, the queries
+    stay exact.
+    """
+
+    def __init__(
+        self,
+        x_y_terminals: NDArray,
+        cell_size: float,
+        max_candidates: int = 2**24,
+        max_cells: int = 2**20,
+    ):
+        """Build the grid index.
+
+        Args:
+            x_y_terminals: NDArray
+                Array of shape (n_terminals, 2) containing the terminal
+                locations, the terminal id is its row number.
+            cell_size: float
+                Side of the grid cells, a good choice is the query radius.
+                It must be positive.
+            max_candidates: int
+                Maximum number of (point, terminal) pairs whose distance is
+                computed at once, it bounds the query memory footprint.
+            max_cells: int
+                Maximum number of grid cells, it bounds the index memory
+                footprint.
+
+        Raises:
+            ValueError:
+                If cell_size is not positive.
+        """
+        if not cell_size > 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+
+        self.x_y_terminals = np.asarray(x_y_terminals, dtype=float)
+        self.max_candidates = max_candidates
+
+        if len(self.x_y_terminals) > 0:
+            self.origin = self.x_y_terminals.min(axis=0)
+            extent = (self.x_y_terminals.max(axis=0) - self.origin).max()
+        else:
+            self.origin = np.zeros(2)
+            extent = 0.0
+
+        # With cells of at least extent / (max_side - 1), every axis has at
+        # most max_side cells.
+        max_side = max(math.isqrt(max_cells), 2)
+        self.cell_size = max(cell_size, extent / (max_side - 1))
+
+        cells = self._get_cells(x_y=self.x_y_terminals)
+        self.grid_shape = (
+            cells.max(axis=0) + 1 if len(cells) > 0 else np.ones(2, int)
+        )
+
+        cell_ids = cells[:, 0] * self.grid_shape[1] + cells[:, 1]
+
+        # Stable sort keeps the terminals sorted by id within every cell.
+        self.sorted_terminals = np.argsort(cell_ids, kind="stable")
+        self.cell_offsets = np.searchsorted(
+            cell_ids[self.sorted_terminals],
+            np.arange(np.prod(self.grid_shape) + 1),
+        )
+
+        # Coordinates in sorted_terminals order, so the terminals of a cell
+        # are contiguous in memory.
+        self.sorted_x = self.x_y_terminals[self.sorted_terminals, 0]
+        self.sorted_y = self.x_y_terminals[self.sorted_terminals, 1]
+
+    def _get_cells(self, x_y: NDArray) -> NDArray:
+        """Get the grid cell of every location.
+
+        Args:
+            x_y: NDArray
+                Array of shape (n, 2) containing the locations.
+
+        Returns:
+            NDArray:
+                Array of shape (n, 2) with the cell coordinates.
+        """
+        return np.floor((x_y - self.origin) / self.cell_size).astype(np.int64)
+
+    def _get_candidate_ranges(
+        self, x_y_points: NDArray, radius: float
+    ) -> Tuple[NDArray, NDArray]:
+        """Get the sorted terminals slices that may be within the radius.
+
+        Args:
+            x_y_points: NDArray
+                Array of shape (n_points, 2) containing the query locations.
+            radius: float
+                Query radius.
+
+        Returns:
+            Tuple[NDArray, NDArray]:
+                Arrays of shape (n_points, n_neighbour_cells) with the start
+                and end of every neighbour cell in sorted_terminals.
+        """
+        cells = self._get_cells(x_y=x_y_points)
+        reach = int(np.ceil(radius / self.cell_size))
+
+        # The neighbour cells are taken around the query cell clipped into
+        # the grid, so points outside of it still reach the grid cells, and
+        # at most a grid side away, further cells would be off the grid.
+        width = min(reach, int(max(self.grid_shape)))
+        shifts = np.arange(-width, width + 1)
+        anchors = np.clip(cells, 0, np.asarray(self.grid_shape) - 1)
+
+        cell_x = anchors[:, [0]] + np.repeat(shifts, len(shifts))
+        cell_y = anchors[:, [1]] + np.tile(shifts, len(shifts))
+
+        is_valid = (
+            (cell_x >= 0)
+            & (cell_x < self.grid_shape[0])
+            & (cell_y >= 0)
+            & (cell_y < self.grid_shape[1])
+            & (np.abs(cell_x - cells[:, [0]]) <= reach)
+            & (np.abs(cell_y - cells[:, [1]]) <= reach)
+        )
+        cell_ids = np.where(is_valid, cell_x * self.grid_shape[1] + cell_y, 0)
+
+        starts = np.where(is_valid, self.cell_offsets[cell_ids], 0)
+        ends = np.where(is_valid, self.cell_offsets[cell_ids + 1], 0)
+
+        return starts, ends
+
+    def query_radius(
+        self, x_y_points: NDArray, radius: float
+    ) -> models.AvailableTerminals:
+        """Get the terminals within the radius of every point.
+
+        Args:
+            x_y_points: NDArray
+                Array of shape (n_points, 2) containing the query locations.
+            radius: float
+                Only terminals at a distance strictly smaller than radius are
+                returned.
+
+        Returns:
+            models.AvailableTerminals:
+                Terminals within the radius of every point, sorted by id.
+        """
+        x_y_points = np.asarray(x_y_points, dtype=float)
+        starts, ends = self._get_candidate_ranges(
+            x_y_points=x_y_points, radius=radius
+        )
+
+        nb_candidates = (ends - starts).sum(axis=1)
+        chunk_bounds = np.searchsorted(
+            np.cumsum(nb_candidates),
+            np.arange(
+                self.max_candidates,
+                nb_candidates.sum(),
+                self.max_candidates,
+            ),
+        )
+
+        counts = []
+        terminal_ids = []
+        for points in np.split(np.arange(len(x_y_points)), chunk_bounds):
+            chunk_counts, chunk_terminal_ids = self._query_chunk(
+                x_y_points=x_y_points[points],
+                starts=starts[points],
+                ends=ends[points],
+                radius=radius,
+            )
+            counts.append(chunk_counts)
+            terminal_ids.append(chunk_terminal_ids)
+
+        return models.AvailableTerminals(
+            offsets=np.concatenate([[0], np.cumsum(np.concatenate(counts))]),
+            terminal_ids=np.concatenate(terminal_ids),
+        )
+
+    def _query_chunk(
+        self,
+        x_y_points: NDArray,
+        starts: NDArray,
+        ends: NDArray,
+        radius: float,
+    ) -> Tuple[NDArray, NDArray]:
+        """Filter the candidate terminals of a chunk of points.
+
+        Args:
+            x_y_points: NDArray
+                Array of shape (n_points, 2) containing the query locations.
+            starts: NDArray
+                Start of every neighbour cell in sorted_terminals.
+            ends: NDArray
+                End of every neighbour cell in sorted_terminals.
+            radius: float
+                Query radius.
+
+        Returns:
+            Tuple[NDArray, NDArray]:
+                Number of terminals within the radius of every point and the
+                flat array of those terminals.
+        """
+        lengths = (ends - starts).ravel()
+        pair_point = np.repeat(
+            np.repeat(np.arange(len(x_y_points)), starts.shape[1]), lengths
+        )
+
+        # Position of every candidate in sorted_terminals: start of its cell
+        # plus its rank within the cell.
+        first_pair = np.cumsum(lengths) - lengths
+        pair_position = np.arange(lengths.sum()) + np.repeat(
+            starts.ravel() - first_pair, lengths
+        )
+
+        squared_diff_x = np.square(
+            x_y_points[pair_point, 0] - self.sorted_x[pair_position]
+        )
+        squared_diff_y = np.square(
+            x_y_points[pair_point, 1] - self.sorted_y[pair_position]
+        )
+        dist_x_y = np.sqrt(squared_diff_x + squared_diff_y)
+
+        is_close = dist_x_y < radius
+        pair_point = pair_point[is_close]
+        pair_terminal = self.sorted_terminals[pair_position[is_close]]
+
+        # Candidates are grouped by point, sort them by terminal id within
+        # every point with a single key.
+        n_terminals = len(self.x_y_terminals)
+        pair_key = np.sort(pair_point * n_terminals + pair_terminal)
+
+        return (
+            np.bincount(pair_point, minlength=len(x_y_points)),
+            pair_key % max(n_terminals, 1),
+        )
@@ -0,0 +1,90 @@
+"""Index of the transactions by entity and day."""
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+
+def get_transaction_days(
+    tx_datetime: pd.Series, start_date: pd.Timestamp
+) -> NDArray:
+    """Get the number of whole days between the start date and every date.
+
+    Args:
+        tx_datetime: pd.Series
+            Transaction timestamps.
+        start_date: pd.Timestamp
+            Date from which the transactions were generated.
+
+    Returns:
+        NDArray:
+            Day number of every transaction, tx_datetime falls within
+            [start_date + day, start_date + day + 1).
+    """
+    tx_days = (tx_datetime - start_date) // pd.Timedelta(value=1, unit="days")
+
+    return tx_days.values
+
+
+class TransactionDayIndex:
+    """Index of the transaction rows by entity (customer, terminal) and day.
+
+    Rows are sorted once by (entity, day, row), so all the rows of an entity
+    within a window of days are a contiguous slice found by binary search.
+    """
+
+    def __init__(self, entity_ids: NDArray, tx_days: NDArray):
+        """Build the index.
+
+        Args:
+            entity_ids: NDArray
+                Entity of every transaction, e.g., its terminal_id.
+            tx_days: NDArray
+                Day number of every transaction.
+        """
+        entity_ids = np.asarray(entity_ids, dtype=np.int64)
+        tx_days = np.asarray(tx_days, dtype=np.int64)
+
+        self.first_day = 0
+        self.nb_days = 1
+        if len(tx_days) > 0:
+            self.first_day = tx_days.min()
+            self.nb_days = tx_days.max() - self.first_day + 1
+
+        keys = entity_ids * self.nb_days + (tx_days - self.first_day)
+
+        self.rows = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.rows]
+
+    def get_rows(
+        self, entity_ids: Iterable[int], first_day: int, end_day: int
+    ) -> NDArray:
+        """Get the rows of the given entities within a window of days.
+
+        Args:
+            entity_ids: Iterable[int]
+                Entities to look up.
+            first_day: int
+                First day of the window.
+            end_day: int
+                Day after the last day of the window.
+
+        Returns:
+            NDArray:
+                Row positions, in increasing order.
+        """
+        first_offset = np.clip(first_day - self.first_day, 0, self.nb_days)
+        end_offset = np.clip(end_day - self.first_day, 0, self.nb_days)
+
+        entity_ids = np.asarray(list(entity_ids), dtype=np.int64)
+        starts = np.searchsorted(
+            self.sorted_keys, entity_ids * self.nb_days + first_offset
+        )
+        ends = np.searchsorted(
+            self.sorted_keys, entity_ids * self.nb_days + end_offset
+        )
+
+        rows = [self.rows[start:end] for start, end in zip(starts, ends)]
+
+        return np.sort(np.concatenate(rows + [np.array([], dtype=np.int64)]))
@@ -1,11 +1,58 @@
 """API entrypoint."""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 
+from fraud.config import settings
+from fraud.entrypoints.assets import Assets
+from fraud.entrypoints.model_registry import (
+    ModelRegistry,
+    watch_artifacts,
+)
 from fraud.entrypoints.routes import get_router
+from fraud.services.micro_batcher import MicroBatcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Load the model at startup, keep it up to date and batch requests."""
+    registry: ModelRegistry = app.state.model_registry
+    await run_in_threadpool(registry.load)
+
+    micro_batcher: MicroBatcher = app.state.micro_batcher
+    micro_batcher.start()
+
+    watcher = None
+    if settings.MODEL_RELOAD_INTERVAL > 0:
+        watcher = asyncio.create_task(
+            watch_artifacts(
+                registry=registry, interval=settings.MODEL_RELOAD_INTERVAL
+            )
+        )
+
+    yield
+
+    if watcher is not None:
+        watcher.cancel()
+
+    await micro_batcher.stop()
 
 
 def get_app() -> FastAPI:
     """Get API."""
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
+    app.state.model_registry = ModelRegistry(
+        loader=Assets(settings.ENV),
+        artifacts_path=settings.ASSETS_PATH,
+    )
+    app.state.micro_batcher = MicroBatcher(
+        get_estimator=app.state.model_registry.get_estimator,
+        max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+        max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+        max_queue_size=settings.MICRO_BATCH_MAX_QUEUE_SIZE,
+    )
     app.include_router(get_router())
     return app
@@ -1,8 +1,12 @@
 """Local Estimator Module."""
 from __future__ import annotations
 
-from fraud.config import Environment
+from fraud.config import (
+    Environment,
+    settings,
+)
 from fraud.data.repositories.repository_factory import DataRepositoryType
+from fraud.ml.algorithms.algorithm import ScoringBackend
 from fraud.ml.algorithms.algorithm_factory import AlgorithmType
 from fraud.ml.artifact_repositories import ArtifactRepo
 from fraud.ml.estimators.estimator import Estimator
@@ -42,9 +46,14 @@ class Assets:
     @staticmethod
     def get_prod_assets() -> Estimator:
         """Get prod assets."""
-        return EstimatorFactory().create_from_artifact_repo(
+        estimator = EstimatorFactory().create_from_artifact_repo(
             estimator_type=EstimatorType.ML_ESTIMATOR,
             artifact_repo=ArtifactRepo.load_from_assets(
                 algorithm_type=AlgorithmType.LIGHT_GBM
             ),
         )
+        estimator.algorithm.set_scoring_backend(
+            scoring_backend=ScoringBackend(settings.SCORING_BACKEND)
+        )
+
+        return estimator
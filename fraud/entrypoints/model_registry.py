@@ -0,0 +1,190 @@
+"""Process level model registry."""
+import asyncio
+import datetime
+import pathlib
+import threading
+from typing import (
+    Callable,
+    Optional,
+    Tuple,
+)
+
+from starlette.concurrency import run_in_threadpool
+
+from fraud import utils
+from fraud.ml.estimators.estimator import Estimator
+
+logger = utils.get_logger()
+
+
+class ModelRegistry:
+    """Holds the serving estimator of the process.
+
+    Artifacts are loaded once and every request reuses the same estimator.
+    A new estimator is built aside when the artifacts change on disk and
+    swapped in a single reference assignment, so in-flight requests finish
+    with the estimator they started with.
+
+    The online feature store of the serving estimator holds every
+    transaction and label recorded since the process started, its snapshot
+    in the artifacts does not. The new estimator keeps the live store when
+    both compute the same features, it only starts from its snapshot when
+    the features changed.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Estimator],
+        artifacts_path: Optional[pathlib.Path] = None,
+    ):
+        """Instantiate an empty registry.
+
+        Args:
+            loader: Callable[[], Estimator]
+                Builds the estimator from the artifacts.
+            artifacts_path: Optional[pathlib.Path]
+                Directory of the artifacts, changes to its pickle files
+                trigger a reload. If None, the estimator is never reloaded.
+        """
+        self.loader = loader
+        self.artifacts_path = artifacts_path
+
+        self._estimator: Optional[Estimator] = None
+        self._artifacts_version: Optional[Tuple] = None
+        self._failed_version: Optional[Tuple] = None
+        self.loaded_at: Optional[str] = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether an estimator is loaded."""
+        return self._estimator is not None
+
+    def get_estimator(self) -> Estimator:
+        """Get the loaded estimator.
+
+        Returns:
+            Estimator:
+                Serving estimator.
+        """
+        estimator = self._estimator
+        if estimator is None:
+            raise RuntimeError("The model is not loaded yet")
+
+        return estimator
+
+    def get_artifacts_version(self) -> Tuple:
+        """Get a fingerprint of the artifact files.
+
+        Returns:
+            Tuple:
+                Name, modification time and size of every pickle file, the
+                files removed while they are listed are left out.
+        """
+        if self.artifacts_path is None or not self.artifacts_path.exists():
+            return ()
+
+        version = []
+        for path in self.artifacts_path.glob("*.pickle"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            version.append((path.name, stat.st_mtime_ns, stat.st_size))
+
+        return tuple(sorted(version))
+
+    def load(self) -> bool:
+        """Load the estimator, swapping the current one.
+
+        A failed load is logged and the current estimator, if any, keeps
+        serving.
+
+        Returns:
+            bool:
+                True if a new estimator was loaded.
+        """
+        with self._load_lock:
+            artifacts_version = self.get_artifacts_version()
+            try:
+                estimator = self.loader()
+            except Exception as e:
+                logger.error(f"Failed to load the model: {e}")
+                self._failed_version = artifacts_version
+                return False
+
+            self._carry_over_feature_store(estimator=estimator)
+            self._estimator = estimator
+            self._artifacts_version = artifacts_version
+            self.loaded_at = datetime.datetime.now().strftime(
+                "%Y-%m-%dT%H:%M:%S"
+            )
+
+        logger.info(f"Model loaded at {self.loaded_at}")
+        return True
+
+    def _carry_over_feature_store(self, estimator: Estimator) -> None:
+        """Give a new estimator the live feature store, if it fits.
+
+        Args:
+            estimator: Estimator
+                Estimator about to be swapped in.
+
+        Returns:
+            None
+        """
+        current = self._estimator
+        if current is None or current.feature_store is None:
+            return
+
+        if estimator.feature_store is None:
+            logger.info("The new model has no feature store")
+        elif estimator.feature_store.has_same_features(
+            other=current.feature_store
+        ):
+            estimator.feature_store = current.feature_store
+        else:
+            logger.warning(
+                "The new model computes other features, its feature store "
+                "starts from its snapshot"
+            )
+
+    def reload_if_changed(self) -> bool:
+        """Load the estimator if it is missing or its artifacts changed.
+
+        Artifacts that already failed to load are not retried while a model
+        is serving, until they change again.
+
+        Returns:
+            bool:
+                True if a new estimator was loaded.
+        """
+        artifacts_version = self.get_artifacts_version()
+        if self.is_ready and artifacts_version in (
+            self._artifacts_version,
+            self._failed_version,
+        ):
+            return False
+
+        logger.info("Model artifacts changed, reloading the model")
+        return self.load()
+
+
+async def watch_artifacts(registry: ModelRegistry, interval: float) -> None:
+    """Reload the model whenever its artifacts change.
+
+    A failed check is logged and retried at the next interval, so the
+    watcher lives as long as the process.
+
+    Args:
+        registry: ModelRegistry
+            Registry to keep up to date.
+        interval: float
+            Seconds between checks.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(registry.reload_if_changed)
+        except Exception as e:
+            logger.error(f"Failed to check the model artifacts: {e}")
@@ -1,22 +1,51 @@
 """API routes module."""
+import asyncio
+from typing import (
+    Any,
+    Dict,
+)
+
 from fastapi import (
     APIRouter,
     Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
 )
 
-from fraud.config import settings
-from fraud.entrypoints.assets import Assets
-from fraud.ml.estimators.estimator import Estimator
+from fraud.domain.feature_transformations import LateTransactionError
+from fraud.entrypoints.model_registry import ModelRegistry
 from fraud.services.contracts import (
+    LabelRequest,
+    LabelResponse,
     PredictionRequest,
     PredictionResponse,
 )
-from fraud.services.prediction_service import PredictionService
+from fraud.services.micro_batcher import MicroBatcher
+from fraud.services.prediction_service import (
+    PredictionService,
+    get_missing_fields,
+)
+
+
+def get_model_registry(request: Request) -> ModelRegistry:
+    """Get the process model registry."""
+    return request.app.state.model_registry
+
 
+def get_micro_batcher(
+    request: Request,
+    registry: ModelRegistry = Depends(get_model_registry),
+) -> MicroBatcher:
+    """Get the prediction micro-batcher, once the model is loaded."""
+    if not registry.is_ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model not loaded",
+        )
 
-def get_estimator() -> Estimator:
-    """Get Estimator."""
-    return Assets(settings.ENV)()
+    return request.app.state.micro_batcher
 
 
 def get_router() -> APIRouter:
@@ -28,33 +57,119 @@ def get_router() -> APIRouter:
         """Healthcheck function."""
         return "pong"
 
+    @router.get(path="/ready")
+    def ready(
+        response: Response,
+        registry: ModelRegistry = Depends(get_model_registry),
+    ) -> Dict[str, Any]:
+        """Readiness check, 503 until the model is loaded."""
+        if not registry.is_ready:
+            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+        return {"ready": registry.is_ready, "loaded_at": registry.loaded_at}
+
+    @router.get(path="/metrics")
+    def get_metrics(request: Request) -> Dict[str, Any]:
+        """Micro-batcher queue depth and batch size counters."""
+        return request.app.state.micro_batcher.metrics.to_dict()
+
     @router.post(
         path="/invocations",
         response_model=PredictionResponse,
     )
-    def predict(
+    async def predict(
         transaction_id: str,
         request: PredictionRequest,
-        estimator: Estimator = Depends(get_estimator),
+        micro_batcher: MicroBatcher = Depends(get_micro_batcher),
+        registry: ModelRegistry = Depends(get_model_registry),
     ) -> PredictionResponse:
         """Prediction endpoint.
 
+        Concurrent requests are predicted together by the micro-batcher.
+        The aggregated features are required unless the model has a feature
+        store, which then requires the customer and terminal ids.
+
         Args:
             transaction_id: str - Unique ID for the transaction.
             request: ModifiedPredictionRequest - Input features.
-            estimator: Estimator - Estimator class.
+            micro_batcher: MicroBatcher - Prediction micro-batcher.
+            registry: ModelRegistry - Process model registry.
 
         Returns:
             ModifiedPredictionResponse: Decision to block the transaction or
             not.
         """
-        service = PredictionService(estimator)
-        prediction = service.make_prediction(
-            prediction_request=request, transaction_id=int(transaction_id)
+        missing_fields = get_missing_fields(
+            record=request.model_dump(), estimator=registry.get_estimator()
         )
+        if missing_fields:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Missing fields {missing_fields}",
+            )
+
+        try:
+            prediction = await micro_batcher.predict(
+                prediction_request=request,
+                transaction_id=int(transaction_id),
+            )
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending predictions",
+            )
+        except LateTransactionError as error:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(error),
+            )
 
         return PredictionResponse(
             transaction_id=transaction_id, transaction_to_block=prediction
         )
 
+    @router.post(
+        path="/labels",
+        response_model=LabelResponse,
+    )
+    def update_label(
+        transaction_id: int,
+        request: LabelRequest,
+        registry: ModelRegistry = Depends(get_model_registry),
+    ) -> LabelResponse:
+        """Label feedback endpoint.
+
+        Feeds the reviewed label of a predicted transaction back into the
+        feature store, so the label features keep up with the traffic.
+
+        Args:
+            transaction_id: int - Unique ID of the predicted transaction.
+            request: LabelRequest - Reviewed label.
+            registry: ModelRegistry - Process model registry.
+
+        Returns:
+            LabelResponse: Whether the label changed the feature store.
+        """
+        if not registry.is_ready:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Model not loaded",
+            )
+
+        service = PredictionService(registry.get_estimator())
+        try:
+            (is_updated,) = service.update_labels(
+                transaction_ids=[transaction_id],
+                labels=[request.tx_fraud],
+            )
+        except ValueError as error:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(error),
+            )
+
+        return LabelResponse(
+            transaction_id=str(transaction_id), is_updated=is_updated
+        )
+
     return router
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 """ML algorithm interface."""
+from __future__ import annotations
+
+import enum
 from abc import (
     ABC,
     abstractmethod,
@@ -7,6 +10,8 @@ from abc import (
 from typing import (
     Any,
     Dict,
+    List,
+    Optional,
 )
 
 import pandas as pd
@@ -15,9 +20,19 @@ from numpy.typing import NDArray
 from fraud.ml.hyperparam_optim import search_dimension
 
 
+class ScoringBackend(str, enum.Enum):
+    """Available scoring backends."""
+
+    NATIVE: ScoringBackend = "NATIVE"
+    NUMPY: ScoringBackend = "NUMPY"
+
+
 class Algorithm(ABC):
     """Machine learning algorithm."""
 
+    # Hyperparameter setting how long the algorithm trains, if any.
+    budget_param: Optional[str] = None
+
     def __init__(
         self,
         default_params: Dict[str, Any],
@@ -37,33 +52,112 @@ class Algorithm(ABC):
     @abstractmethod
     def fit_algorithm(
         self,
-        features: pd.DataFrame,
-        target: pd.DataFrame,
+        features: Optional[pd.DataFrame],
+        target: Optional[pd.DataFrame],
         hyper_parameters: Dict[str, Any],
+        train_set: Optional[Any] = None,
+        validation_set: Optional[Any] = None,
+        early_stopping_rounds: int = 0,
     ) -> None:
         """Wraps the fit method.
 
         Args:
-            features: pd.DataFrame
-                Input features to fit the algorithm.
-            target: pd.DataFrame
-                Target Feature to fit the algorithm.
+            features: Optional[pd.DataFrame]
+                Input features to fit the algorithm, unused if train_set is
+                given.
+            target: Optional[pd.DataFrame]
+                Target Feature to fit the algorithm, unused if train_set is
+                given.
             hyper_parameters: Dict[str, Any]
                 hyper parameters.
+            train_set: Optional[Any]
+                Output of get_train_set, to fit from a prepared training set.
+            validation_set: Optional[Any]
+                Output of get_validation_set, monitored for early stopping.
+            early_stopping_rounds: int
+                Stop when the validation metric did not improve for this many
+                rounds, 0 disables early stopping.
 
         Returns:
             None
         """
         raise NotImplementedError
 
-    @abstractmethod
+    def get_train_set(
+        self, features: pd.DataFrame, target: pd.DataFrame
+    ) -> Optional[Any]:
+        """Prepare a training set reusable by fits of any hyper parameters.
+
+        Args:
+            features: pd.DataFrame
+                Input features to fit the algorithm.
+            target: pd.DataFrame
+                Target Feature to fit the algorithm.
+
+        Returns:
+            Optional[Any]:
+                Training set, None if the algorithm has no preparation
+                worth reusing.
+        """
+        return None
+
+    def get_validation_set(
+        self,
+        features: pd.DataFrame,
+        target: pd.DataFrame,
+        train_set: Optional[Any],
+    ) -> Optional[Any]:
+        """Prepare a validation set to early stop the fits.
+
+        Args:
+            features: pd.DataFrame
+                Validation features.
+            target: pd.DataFrame
+                Validation target.
+            train_set: Optional[Any]
+                Output of get_train_set.
+
+        Returns:
+            Optional[Any]:
+                Validation set, None if the algorithm can not early stop.
+        """
+        return None
+
+    def get_fitted_budget(self) -> Optional[int]:
+        """Get the budget_param value the fitted model uses.
+
+        Returns:
+            Optional[int]:
+                Budget, None if the algorithm has no budget_param.
+        """
+        return None
+
     def get_predictions(self, features: pd.DataFrame) -> NDArray:
         """Wraps the predict method.
 
+        Callers needing both the scores and the predictions should score
+        once and call get_predictions_from_scores.
+
         Args:
             features: pd.DataFrame
                 Data frame that will be used to generate predictions.
 
+        Returns:
+            NDArray:
+                model predictions
+        """
+        return self.get_predictions_from_scores(
+            scores=self.get_scores(features=features)
+        )
+
+    @abstractmethod
+    def get_predictions_from_scores(self, scores: NDArray) -> NDArray:
+        """Derive the predictions from already computed scores.
+
+        Args:
+            scores: NDArray
+                Output of get_scores.
+
         Returns:
             NDArray:
                 model predictions
@@ -93,3 +187,25 @@ class Algorithm(ABC):
                 algorithm params.
         """
         raise NotImplementedError
+
+    def get_feature_names(self) -> Optional[List[str]]:
+        """Get the feature columns, in the order the algorithm was fitted.
+
+        Returns:
+            Optional[List[str]]:
+                Feature names, None if unknown.
+        """
+        return None
+
+    def set_scoring_backend(self, scoring_backend: ScoringBackend) -> None:
+        """Select the implementation computing the scores.
+
+        Args:
+            scoring_backend: ScoringBackend
+                Scoring backend, only NATIVE is available by default.
+
+        Returns:
+            None
+        """
+        if scoring_backend != ScoringBackend.NATIVE:
+            raise NotImplementedError(f"{scoring_backend} not implemented")
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""Tree ensemble exported from a LightGBM booster."""
+from __future__ import annotations
+
+import enum
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+
+import lightgbm as lgb
+import numpy as np
+from numpy.typing import NDArray
+
+# LightGBM treats features with an absolute value below this as zero.
+ZERO_THRESHOLD = 1e-35
+
+
+class MissingType(enum.IntEnum):
+    """How a split handles missing values."""
+
+    NONE = 0
+    ZERO = 1
+    NAN = 2
+
+
+class OutputTransform(str, enum.Enum):
+    """Transformation from raw scores to predictions."""
+
+    IDENTITY = "IDENTITY"
+    SIGMOID = "SIGMOID"
+
+
+@dataclass
+class TreeEnsemble:
+    """Trees of a boosted ensemble flattened into contiguous arrays.
+
+    Every node of every tree is a position in the node arrays:
+
+        - split_feature, threshold: the node goes left if the feature value
+            is smaller than or equal to the threshold.
+        - missing_type, default_left: missing values, NaN or zero depending
+            on missing_type, go left if default_left.
+        - left_child, right_child: positions of the children, the right
+            child always follows the left one. Leaves point to themselves
+            with an infinite threshold, so a leaf reached before max_depth
+            steps stays.
+        - leaf_value: output of the node, 0 for split nodes.
+        - roots: position of the root of every tree.
+
+    Attributes:
+        sigmoid: float
+            Scale of the sigmoid output transform.
+    """
+
+    split_feature: NDArray
+    threshold: NDArray
+    missing_type: NDArray
+    default_left: NDArray
+    left_child: NDArray
+    right_child: NDArray
+    leaf_value: NDArray
+    roots: NDArray
+    max_depth: int
+    n_features: int
+    output_transform: OutputTransform = OutputTransform.IDENTITY
+    sigmoid: float = 1.0
+
+    def __post_init__(self):
+        """Precompute the value every missing value is compared as.
+
+        A value sent to the default side is replaced by -inf if it goes
+        left and +inf otherwise, so the traversal only compares values.
+        """
+        default_value = np.where(self.default_left, -np.inf, np.inf)
+
+        # NaNs are zeros for the splits without NaN handling.
+        self.nan_value = np.where(
+            self.missing_type == MissingType.NONE, 0.0, default_value
+        )
+        self.zero_value = np.where(
+            self.missing_type == MissingType.ZERO, default_value, np.nan
+        )
+        self.has_zero_missing = bool(
+            (self.missing_type == MissingType.ZERO).any()
+        )
+
+    @property
+    def n_trees(self) -> int:
+        """Number of trees."""
+        return len(self.roots)
+
+    def predict_raw(
+        self, features: NDArray, max_nodes: int = 2**20
+    ) -> NDArray:
+        """Get the raw scores, the sum of the leaf values of every tree.
+
+        All the (row, tree) pairs go down one level at a time, so a batch is
+        scored in max_depth vectorized steps.
+
+        Args:
+            features: NDArray
+                Array of shape (n_rows, n_features).
+            max_nodes: int
+                Maximum number of (row, tree) pairs traversed at once, it
+                bounds the memory footprint.
+
+        Returns:
+            NDArray:
+                Raw score of every row.
+        """
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        if features.shape[1] < self.n_features:
+            raise ValueError(
+                f"Expected {self.n_features} features, got "
+                f"{features.shape[1]}"
+            )
+
+        features = np.ascontiguousarray(features)
+        has_nan = bool(np.isnan(features).any())
+        chunk_size = max(max_nodes // max(self.n_trees, 1), 1)
+
+        if len(features) <= chunk_size:
+            return self._predict_raw_chunk(features=features, has_nan=has_nan)
+
+        return np.concatenate(
+            [
+                self._predict_raw_chunk(
+                    features=features[start:end], has_nan=has_nan
+                )
+                for start, end in zip(
+                    range(0, len(features), chunk_size),
+                    range(chunk_size, len(features) + chunk_size, chunk_size),
+                )
+            ]
+        )
+
+    def _predict_raw_chunk(self, features: NDArray, has_nan: bool) -> NDArray:
+        """Get the raw scores of a chunk of rows.
+
+        The (row, tree) pairs are flattened, row after row, so every level
+        is a handful of 1-D gathers.
+
+        Args:
+            features: NDArray
+                C-contiguous array of shape (n_rows, n_features).
+            has_nan: bool
+                Whether features may contain NaNs.
+
+        Returns:
+            NDArray:
+                Raw score of every row.
+        """
+        n_rows, n_features = features.shape
+        flat_features = features.ravel()
+        row_offsets = np.repeat(
+            np.arange(0, n_rows * n_features, n_features), self.n_trees
+        )
+        nodes = np.tile(self.roots, n_rows)
+
+        for _ in range(self.max_depth):
+            values = flat_features.take(
+                row_offsets + self.split_feature.take(nodes)
+            )
+            if has_nan:
+                values = np.where(
+                    np.isnan(values), self.nan_value.take(nodes), values
+                )
+            if self.has_zero_missing:
+                zero_values = self.zero_value.take(nodes)
+                values = np.where(
+                    (np.abs(values) <= ZERO_THRESHOLD)
+                    & ~np.isnan(zero_values),
+                    zero_values,
+                    values,
+                )
+
+            nodes = self.left_child.take(nodes) + (
+                values > self.threshold.take(nodes)
+            )
+
+        if n_rows == 0 or self.n_trees == 0:
+            return np.zeros(n_rows)
+
+        # Trees are added one after the other, as the booster does.
+        leaf_values = self.leaf_value.take(nodes).reshape(n_rows, -1)
+        return np.cumsum(leaf_values, axis=1)[:, -1]
+
+    def predict(self, features: NDArray) -> NDArray:
+        """Get the predictions, the transformed raw scores.
+
+        Args:
+            features: NDArray
+                Array of shape (n_rows, n_features).
+
+        Returns:
+            NDArray:
+                Prediction of every row.
+        """
+        raw_scores = self.predict_raw(features=features)
+
+        if self.output_transform == OutputTransform.SIGMOID:
+            return 1.0 / (1.0 + np.exp(-self.sigmoid * raw_scores))
+
+        return raw_scores
+
+
+def get_output_transform(objective: str) -> Dict[str, Any]:
+    """Get the output transform of a LightGBM objective.
+
+    Args:
+        objective: str
+            Objective of a dumped model, e.g., "binary sigmoid:1".
+
+    Returns:
+        Dict[str, Any]:
+            output_transform and sigmoid of the TreeEnsemble.
+    """
+    name, *params = objective.split()
+    params = dict(param.split(":", 1) for param in params)
+
+    if name == "binary":
+        return {
+            "output_transform": OutputTransform.SIGMOID,
+            "sigmoid": float(params.get("sigmoid", 1.0)),
+        }
+    if name in ("cross_entropy", "xentropy"):
+        return {"output_transform": OutputTransform.SIGMOID, "sigmoid": 1.0}
+    if name in ("regression", "regression_l1", "huber", "fair", "quantile"):
+        return {"output_transform": OutputTransform.IDENTITY}
+
+    raise NotImplementedError(f"{objective} objective not implemented")
+
+
+def export_booster(booster: lgb.Booster) -> TreeEnsemble:
+    """Flatten the trees of a trained booster into a TreeEnsemble.
+
+    The best iteration is exported if the booster has one, as
+    Booster.predict does.
+
+    Args:
+        booster: lgb.Booster
+            Trained booster with numerical splits, single output and a
+            binary, cross entropy or regression objective.
+
+    Returns:
+        TreeEnsemble:
+            Flattened ensemble.
+    """
+    model = booster.dump_model()
+
+    if model["num_tree_per_iteration"] != 1 or model["average_output"]:
+        raise NotImplementedError(
+            "Only single output boosted ensembles are implemented"
+        )
+
+    output_transform = get_output_transform(objective=model["objective"])
+
+    columns: Dict[str, List[Any]] = {
+        "split_feature": [],
+        "threshold": [],
+        "missing_type": [],
+        "default_left": [],
+        "left_child": [],
+        "right_child": [],
+        "leaf_value": [],
+    }
+    roots = []
+    max_depth = 0
+
+    def add_node(node: Dict[str, Any]) -> int:
+        """Add a node without children, get its position."""
+        position = len(columns["leaf_value"])
+        is_leaf = "split_feature" not in node
+
+        if not is_leaf and node["decision_type"] != "<=":
+            raise NotImplementedError(
+                f"{node['decision_type']} splits not implemented"
+            )
+
+        columns["split_feature"].append(
+            0 if is_leaf else node["split_feature"]
+        )
+        columns["threshold"].append(np.inf if is_leaf else node["threshold"])
+        columns["missing_type"].append(
+            MissingType.NONE
+            if is_leaf
+            else MissingType[node["missing_type"].upper()]
+        )
+        columns["default_left"].append(
+            True if is_leaf else node["default_left"]
+        )
+        columns["left_child"].append(position)
+        columns["right_child"].append(position)
+        columns["leaf_value"].append(node["leaf_value"] if is_leaf else 0.0)
+
+        return position
+
+    for tree in model["tree_info"]:
+        root = tree["tree_structure"]
+        roots.append(add_node(node=root))
+
+        stack = [(root, roots[-1], 0)]
+        while stack:
+            node, position, depth = stack.pop()
+            max_depth = max(max_depth, depth)
+            if "split_feature" not in node:
+                continue
+
+            for side in ("left_child", "right_child"):
+                child = node[side]
+                child_position = add_node(node=child)
+                columns[side][position] = child_position
+                stack.append((child, child_position, depth + 1))
+
+    return TreeEnsemble(
+        split_feature=np.array(columns["split_feature"], dtype=np.int64),
+        threshold=np.array(columns["threshold"], dtype=np.float64),
+        missing_type=np.array(columns["missing_type"], dtype=np.int8),
+        default_left=np.array(columns["default_left"], dtype=bool),
+        left_child=np.array(columns["left_child"], dtype=np.int64),
+        right_child=np.array(columns["right_child"], dtype=np.int64),
+        leaf_value=np.array(columns["leaf_value"], dtype=np.float64),
+        roots=np.array(roots, dtype=np.int64),
+        max_depth=max_depth,
+        n_features=model["max_feature_idx"] + 1,
+        **output_transform,
+    )
@@ -5,6 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import (
     Dict,
+    Optional,
     Union,
 )
 
@@ -15,6 +16,7 @@ from fraud import (
     data_schemas,
     utils,
 )
+from fraud.domain import feature_transformations
 from fraud.ml.algorithms.algorithm import Algorithm
 from fraud.ml.algorithms.algorithm_factory import AlgorithmType
 from fraud.ml.transformers.transformer_chain import TransformerChain
@@ -30,12 +32,20 @@ class ArtifactRepo:
         str, Union[data_schemas.BaseSchema, TransformerChain, Algorithm]
     ]
     integration_test_set: pd.DataFrame
+    feature_store: Optional[feature_transformations.OnlineFeatureStore] = None
 
     def dump_artifacts(self) -> None:
-        """Dump artifact repo items."""
+        """Dump artifact repo items.
+
+        The file of a missing optional item, e.g., the feature store of an
+        older model, is removed, so it is not loaded with this model.
+        """
         file_path = config.settings.DUMP_PATH
         logger.info(f"Saving artifacts at: {file_path}")
         for key, value in self.__dict__.items():
+            if value is None:
+                (file_path / f"{key}.pickle").unlink(missing_ok=True)
+                continue
             utils.dump_artifacts(obj=value, file_path=file_path, file_name=key)
 
     @classmethod
@@ -51,9 +61,17 @@ class ArtifactRepo:
                 Artifact repo.
         """
         files_path = config.settings.ASSETS_PATH
+
+        feature_store = None
+        if (files_path / "feature_store.pickle").exists():
+            feature_store = feature_transformations.OnlineFeatureStore.restore(
+                file_path=files_path / "feature_store.pickle"
+            )
+
         return cls(
             model=utils.load_artifacts(file_path=files_path / "model.pickle"),
             integration_test_set=utils.load_artifacts(
                 file_path=files_path / "integration_test_set.pickle"
             ),
+            feature_store=feature_store,
         )
@@ -11,6 +11,7 @@ from abc import (
 from typing import (
     Any,
     Dict,
+    List,
     Optional,
 )
 
@@ -18,6 +19,7 @@ import pandas as pd
 
 from fraud import data_schemas
 from fraud.data import repositories
+from fraud.domain import feature_transformations
 from fraud.ml import metrics
 from fraud.ml.algorithms.algorithm import Algorithm
 from fraud.ml.artifact_repositories import ArtifactRepo
@@ -42,6 +44,9 @@ class Estimator(ABC):
         algorithm: Algorithm,
         transformer_chain: TransformerChain,
         do_hpo: bool,
+        feature_store: Optional[
+            feature_transformations.OnlineFeatureStore
+        ] = None,
     ):
         """Instantiate a Base Algorithm.
 
@@ -64,6 +69,9 @@ class Estimator(ABC):
                 Feature transformer.
             do_hpo: bool
                 If True, the estimator will do hyperparameter search.
+            feature_store: Optional[feature_transformations.OnlineFeatureStore]
+                Online store of the aggregated features, it fills them at
+                inference when they are not in the request.
         """
         self.data_repository = data_repository
         self.evaluator = evaluator
@@ -80,6 +88,8 @@ class Estimator(ABC):
 
         self.do_hpo = do_hpo
 
+        self.feature_store = feature_store
+
         self.hpo_dimension: Optional[
             Dict[str, SKOptHyperparameterDimension]
         ] = None
@@ -124,6 +134,35 @@ class Estimator(ABC):
         """
         raise NotImplementedError
 
+    def predict_records(
+        self, records: List[Dict[str, Any]], transaction_ids: List[int]
+    ) -> metrics.Results:
+        """Generate the predictions of raw transaction records.
+
+        The aggregated features missing in the records are filled from the
+        feature store, if any, which records the transactions once.
+
+        Args:
+            records: List[Dict[str, Any]]
+                Transaction records, in arrival order, tx_datetime is a Unix
+                timestamp in milliseconds.
+            transaction_ids: List[int]
+                Transaction id of every record.
+
+        Returns:
+            metrics.Results
+        """
+        data = pd.DataFrame(records, index=transaction_ids)
+
+        data.tx_datetime = pd.to_datetime(data.tx_datetime, unit="ms")
+
+        if self.feature_store is not None:
+            data = self.feature_store.fill_features(
+                data=data, transaction_ids=transaction_ids
+            )
+
+        return self.predict(data=data)
+
     @abstractmethod
     def evaluate(
         self,
@@ -157,12 +196,9 @@ class Estimator(ABC):
         Returns:
             None
         """
-        integration_test_set["predicted"] = self.predict(
-            data=integration_test_set
-        ).predictions
-        integration_test_set["scores"] = self.predict(
-            data=integration_test_set
-        ).scores
+        results = self.predict(data=integration_test_set)
+        integration_test_set["predicted"] = results.predictions
+        integration_test_set["scores"] = results.scores
 
         artifact_repo = ArtifactRepo(
             model={
@@ -171,6 +207,7 @@ class Estimator(ABC):
                 "algorithm": self.algorithm,
             },
             integration_test_set=integration_test_set,
+            feature_store=self.feature_store,
         )
 
         artifact_repo.dump_artifacts()
@@ -123,4 +123,5 @@ class EstimatorFactory:
             algorithm=artifact_repo.model.get("algorithm"),
             transformer_chain=artifact_repo.model.get("transformer_chain"),
             do_hpo=False,
+            feature_store=artifact_repo.feature_store,
         )
@@ -1,30 +1,69 @@
 """Clasical ML Estimator."""
+import copy
+import dataclasses
+import functools
+import math
 from typing import (
     Any,
     Dict,
     List,
+    Optional,
 )
 
 import pandas as pd
-import skopt
 
 from fraud import (
+    config,
     data_schemas,
     utils,
 )
 from fraud.ml import metrics
 from fraud.ml.estimators.estimator import Estimator
+from fraud.ml.estimators.scoring_cache import ScoringCache
+from fraud.ml.evaluators.backtest import (
+    aggregate_folds,
+    run_folds,
+)
+from fraud.ml.hyperparam_optim.batch_search import (
+    TrialPool,
+    get_n_jobs,
+    minimize_in_batches,
+)
 from fraud.ml.hyperparam_optim.hpo_config import HPOConfig
 from fraud.ml.hyperparam_optim.search_dimension import (
     SKOptHyperparameterDimension,
     get_dimensions,
     get_hyperparamrs_dict,
 )
+from fraud.ml.hyperparam_optim.trial_data import (
+    TrialData,
+    TrialResult,
+)
+from fraud.ml.hyperparam_optim.trial_store import TrialStore
+from fraud.ml.transformers.feature_assembler import FeatureAssembler
+
+logger = utils.get_logger()
 
 
 class MLEstimator(Estimator):
     """ML Estimator."""
 
+    def __init__(self, *args, **kwargs):
+        """Instantiate an ML estimator, see Estimator."""
+        super().__init__(*args, **kwargs)
+
+        self._feature_assembler: Optional[FeatureAssembler] = None
+        self._is_feature_assembler_compiled = False
+
+        self.scoring_cache = ScoringCache()
+
+        self.hpo_config = HPOConfig()
+        self._trial_data: Optional[TrialData] = None
+
+        # If True, creat_model ships an online feature store with the model,
+        # it must then be served by a single worker, see serve.py.
+        self.build_feature_store = False
+
     def creat_model(self) -> Dict[str, Any]:
         """Create a model, ml pipeline logic.
 
@@ -39,6 +78,12 @@ class MLEstimator(Estimator):
 
         train_data, test_data = self.evaluator.split(data=processed_data)
 
+        if self.evaluator.n_folds > 1:
+            # Fail before the search and the fit, not after them.
+            self.evaluator.check_folds(
+                data=processed_data, nested_splits=int(self.do_hpo)
+            )
+
         self.optimize_and_fit(
             data=train_data, hpo_dimension=self.algorithm.hpo_params
         )
@@ -49,6 +94,14 @@ class MLEstimator(Estimator):
             plot_results=True,
         )
 
+        if self.evaluator.n_folds > 1:
+            test_results["backtest"] = self.backtest(data=processed_data)
+
+        if self.build_feature_store:
+            self.feature_store = self.data_repository.get_feature_store(
+                data=data
+            )
+
         self.set_model_artifacts(
             integration_test_set=test_data.sample(n=10, random_state=0)
         )
@@ -79,10 +132,92 @@ class MLEstimator(Estimator):
         self.algorithm.fit_algorithm(
             features=features, target=target, hyper_parameters=hyper_parameters
         )
+        self._reset_fitted_state()
+
+    def run_fold(self, data: pd.DataFrame, fold: int) -> Dict[str, float]:
+        """Train and evaluate a backtesting fold.
+
+        With do_hpo, the hyperparameters are searched again on the fold
+        training data, the ones found on the final training data were
+        validated on days the earlier folds test on.
+
+        Args:
+            data: pd.DataFrame
+                Preprocessed data.
+            fold: int
+                Fold number, see Evaluator.split_fold.
+
+        Returns:
+            Dict[str, float]:
+                Evaluation metrics of the fold.
+        """
+        train_data, test_data = self.evaluator.split_fold(data=data, fold=fold)
+
+        self.optimize_and_fit(
+            data=train_data, hpo_dimension=self.algorithm.hpo_params
+        )
+
+        scores = self.evaluator.evaluate(
+            results=self.predict(data=test_data),
+            true_values=self.get_true_values(data=test_data),
+        )
+        logger.info(f"Backtesting fold {fold}: {scores}")
+
+        return scores
+
+    @utils.timer
+    def backtest(self, data: pd.DataFrame) -> Dict[str, Any]:
+        """Train and evaluate every backtesting fold of the evaluator.
+
+        The folds are fitted on a copy of the estimator, or in worker
+        processes, so the fitted model is left untouched. Worker processes
+        search the hyperparameters of their fold one trial at a time.
+
+        Args:
+            data: pd.DataFrame
+                Preprocessed data.
+
+        Returns:
+            Dict[str, Any]:
+                Scores of every fold, oldest first, their aggregates and
+                how the fold hyperparameters were chosen, tuned_per_fold
+                or fixed.
+        """
+        n_jobs = get_n_jobs(n_jobs=self.evaluator.n_jobs)
+        if n_jobs > 1:
+            estimator = copy.copy(self)
+            estimator.hpo_config = dataclasses.replace(
+                self.hpo_config, n_jobs=1
+            )
+        else:
+            estimator = copy.deepcopy(self)
+
+        fold_scores = run_folds(
+            run_fold=estimator.run_fold,
+            data=data,
+            n_folds=self.evaluator.n_folds,
+            n_jobs=n_jobs,
+        )
+
+        return {
+            "folds": fold_scores,
+            "aggregate": aggregate_folds(fold_scores=fold_scores),
+            "hyperparameters": "tuned_per_fold" if self.do_hpo else "fixed",
+        }
+
+    def _reset_fitted_state(self) -> None:
+        """Drop what was derived from the previous fit."""
+        self._is_feature_assembler_compiled = False
+        self.scoring_cache.clear()
 
     def predict(self, data: pd.DataFrame) -> metrics.Results:
         """Generate model predictions.
 
+        The batch is scored once, the predictions are the thresholded
+        scores. Results are cached until the next fit, so predicting the
+        same frame again, e.g., for evaluation and then plotting, does not
+        score it twice. A frame edited in place is scored again.
+
         Args:
             data: pd.DataFrame
                 Data frame that will be used to generate predictions.
@@ -90,16 +225,110 @@ class MLEstimator(Estimator):
         Returns:
             metrics.Results
         """
+        results = self.scoring_cache.get(data=data)
+        if results is not None:
+            return results
+
         features = self.transformer_chain.transform(features=data)
         features = data_schemas.validate_and_coerce_schema(
             data=features, schema_class=self.feature_schemas
         )
 
+        results = self.get_results(features=features)
+        self.scoring_cache.set(data=data, results=results)
+
+        return results
+
+    def get_results(self, features: Any) -> metrics.Results:
+        """Score features once and threshold the scores.
+
+        Args:
+            features: Any
+                Features in the layout the algorithm was fitted with.
+
+        Returns:
+            metrics.Results
+        """
+        scores = self.algorithm.get_scores(features=features)
+
         return metrics.Results(
-            predictions=self.algorithm.get_predictions(features=features),
-            scores=self.algorithm.get_scores(features=features),
+            predictions=self.algorithm.get_predictions_from_scores(
+                scores=scores
+            ),
+            scores=scores,
+        )
+
+    def get_feature_assembler(self) -> Optional[FeatureAssembler]:
+        """Get the compiled feature layout of the fitted algorithm.
+
+        It is compiled on first use after every fit.
+
+        Returns:
+            Optional[FeatureAssembler]:
+                Feature assembler, None if the transformer chain has no
+                single value implementation.
+        """
+        if self._is_feature_assembler_compiled:
+            return self._feature_assembler
+
+        feature_names = self.algorithm.get_feature_names()
+        schema_columns = self.feature_schemas.get_schema_columns()
+        if feature_names is None or set(feature_names) != set(schema_columns):
+            feature_names = schema_columns
+
+        try:
+            self._feature_assembler = FeatureAssembler(
+                feature_schemas=self.feature_schemas,
+                transformer_chain=self.transformer_chain,
+                feature_names=feature_names,
+            )
+        except NotImplementedError as e:
+            logger.warning(f"Records are predicted through pandas: {e}")
+            self._feature_assembler = None
+
+        self._is_feature_assembler_compiled = True
+        return self._feature_assembler
+
+    def predict_records(
+        self, records: List[Dict[str, Any]], transaction_ids: List[int]
+    ) -> metrics.Results:
+        """Generate the predictions of raw transaction records.
+
+        The features are written straight into the array scored by the
+        algorithm, falling back to predict when the feature layout can not
+        be compiled.
+
+        Args:
+            records: List[Dict[str, Any]]
+                Transaction records, in arrival order, tx_datetime is a Unix
+                timestamp in milliseconds.
+            transaction_ids: List[int]
+                Transaction id of every record.
+
+        Returns:
+            metrics.Results
+        """
+        assembler = self.get_feature_assembler()
+        if assembler is None:
+            return super().predict_records(
+                records=records, transaction_ids=transaction_ids
+            )
+
+        if self.feature_store is not None:
+            records = [
+                self.feature_store.fill_record(
+                    transaction=record, transaction_id=transaction_id
+                )
+                for record, transaction_id in zip(records, transaction_ids)
+            ]
+
+        # The scores are computed before the thread reuses the buffer.
+        features = assembler.assemble(
+            records=records, out=assembler.get_buffer(n_rows=len(records))
         )
 
+        return self.get_results(features=features)
+
     def evaluate(
         self,
         data: pd.DataFrame,
@@ -121,26 +350,14 @@ class MLEstimator(Estimator):
             Dict[str, float]
         """
         results = self.predict(data=data)
-        true_values = data_schemas.validate_and_coerce_schema(
-            data=data, schema_class=self.target_schema
-        )
-        tx_datetime = data_schemas.validate_and_coerce_schema(
-            data=data, schema_class=self.timestamp_schema
-        )
-        customer_id = data_schemas.validate_and_coerce_schema(
-            data=data, schema_class=self.customer_id_schema
-        )
-        true_values = metrics.TrueValues(
-            tx_fraud=true_values,
-            tx_datetime=tx_datetime,
-            customer_id=customer_id,
-        )
+        true_values = self.get_true_values(data=data)
         test_results = self.evaluator.log_testing(
             estimator_params=self.algorithm.get_fit_param(),
             hashed_data=hashed_data,
             results=results,
             true_values=true_values,
             plot_results=plot_results,
+            confidence_intervals=True,
         )
 
         if plot_results:
@@ -158,6 +375,32 @@ class MLEstimator(Estimator):
 
         return test_results
 
+    def get_true_values(self, data: pd.DataFrame) -> metrics.TrueValues:
+        """Get the true values of labeled data.
+
+        Args:
+            data: pd.DataFrame
+                Labeled data.
+
+        Returns:
+            metrics.TrueValues
+        """
+        true_values = data_schemas.validate_and_coerce_schema(
+            data=data, schema_class=self.target_schema
+        )
+        tx_datetime = data_schemas.validate_and_coerce_schema(
+            data=data, schema_class=self.timestamp_schema
+        )
+        customer_id = data_schemas.validate_and_coerce_schema(
+            data=data, schema_class=self.customer_id_schema
+        )
+
+        return metrics.TrueValues(
+            tx_fraud=true_values,
+            tx_datetime=tx_datetime,
+            customer_id=customer_id,
+        )
+
     @utils.timer
     def optimize_and_fit(
         self,
@@ -202,53 +445,201 @@ class MLEstimator(Estimator):
 
         space = get_dimensions(search_dimensions=hpo_dimension)
 
-        def val(hyper_parameters_list: List[Any]) -> float:
-            """Wrapper function."""
-            return self.validation_pipeline(
-                data, hyper_parameters_list=hyper_parameters_list
+        # Hashed once, every trial checks its cached data against it.
+        data_hash = self.evaluator.hash_data(data=data)
+        objective = functools.partial(self.run_trial, data_hash=data_hash)
+
+        trial_store = None
+        if self.hpo_config.persist_trials:
+            # Anything changing the trial losses is part of the study key,
+            # otherwise a rerun would reuse stale losses.
+            fixed_params = {
+                name: value
+                for name, value in self.algorithm.params.items()
+                if name not in hpo_dimension
+            }
+            trial_store = TrialStore(
+                file_path=config.settings.CACH_PATH / "hpo_trials.sqlite",
+                study=TrialStore.get_study(
+                    data_hash=data_hash,
+                    dimensions=space,
+                    settings={
+                        "early_stopping_rounds": (
+                            self.hpo_config.early_stopping_rounds
+                        ),
+                        "evaluator": type(self.evaluator).__name__,
+                        "split_params": repr(
+                            sorted(self.evaluator.get_split_params().items())
+                        ),
+                        "algorithm": type(self.algorithm).__name__,
+                        "fixed_params": repr(sorted(fixed_params.items())),
+                    },
+                ),
             )
 
-        res_gp = skopt.gp_minimize(
-            func=val,
-            dimensions=space,
-            n_calls=HPOConfig.n_calls,
-            n_random_starts=HPOConfig.n_random_starts,
-            random_state=HPOConfig.random_state,
-        )
+        n_jobs = get_n_jobs(n_jobs=self.hpo_config.n_jobs)
+        try:
+            if n_jobs == 1:
+                best_candidate, best_trial = minimize_in_batches(
+                    evaluate=lambda candidates, budgets: [
+                        objective(data, candidate, budget)
+                        for candidate, budget in zip(candidates, budgets)
+                    ],
+                    dimensions=space,
+                    hpo_config=self.hpo_config,
+                    trial_store=trial_store,
+                )
+            else:
+                with TrialPool(
+                    objective=objective,
+                    data=data,
+                    n_jobs=n_jobs,
+                ) as trial_pool:
+                    best_candidate, best_trial = minimize_in_batches(
+                        evaluate=trial_pool.evaluate,
+                        dimensions=space,
+                        hpo_config=self.hpo_config,
+                        trial_store=trial_store,
+                    )
+        finally:
+            self._trial_data = None
 
         best_params = get_hyperparamrs_dict(
-            search_dimensions=hpo_dimension, hyper_params_list=res_gp.x
+            search_dimensions=hpo_dimension, hyper_params_list=best_candidate
         )
 
+        # The final model trains as long as the best trial model did.
+        budget_param = self.algorithm.budget_param
+        if best_trial.budget is not None and budget_param in best_params:
+            best_params[budget_param] = best_trial.budget
+
         return best_params
 
-    def validation_pipeline(
-        self, data: pd.DataFrame, hyper_parameters_list: List[Any]
-    ) -> float:
-        """Validate set of hyperparameters.
+    def run_trial(
+        self,
+        data: pd.DataFrame,
+        hyper_parameters_list: List[Any],
+        budget: float = 1.0,
+        data_hash: Optional[str] = None,
+    ) -> TrialResult:
+        """Fit and validate a set of hyperparameters.
 
         Args:
             data: pd.DataFrame
                 Training data.
             hyper_parameters_list: List[Any]
                 List of hyperparameters to validate.
+            budget: float
+                Fraction of the algorithm budget_param value to train with.
+            data_hash: Optional[str]
+                Hash of data, see get_trial_data.
 
         Returns:
-            float:
-                score value.
+            TrialResult:
+                Negative validation average precision and fitted budget.
         """
         hyper_parameters = get_hyperparamrs_dict(
             search_dimensions=self.hpo_dimension,
             hyper_params_list=hyper_parameters_list,
         )
-        train_data, validation_data = self.evaluator.split(data=data)
+        budget_param = self.algorithm.budget_param
+        if budget < 1 and budget_param in hyper_parameters:
+            hyper_parameters[budget_param] = max(
+                math.ceil(hyper_parameters[budget_param] * budget), 1
+            )
+
+        trial_data = self.get_trial_data(data=data, data_hash=data_hash)
 
-        self.fit(data=train_data, hyper_parameters=hyper_parameters)
+        self.algorithm.fit_algorithm(
+            features=trial_data.train_features,
+            target=trial_data.train_target,
+            hyper_parameters=hyper_parameters,
+            train_set=trial_data.train_set,
+            validation_set=trial_data.validation_set,
+            early_stopping_rounds=self.hpo_config.early_stopping_rounds,
+        )
+        self._reset_fitted_state()
 
-        validation_results = self.evaluate(
-            data=validation_data,
+        validation_results = self.evaluator.log_testing(
+            estimator_params=self.algorithm.get_fit_param(),
             hashed_data="HPO",
+            results=self.get_results(features=trial_data.validation_features),
+            true_values=trial_data.true_values,
             plot_results=False,
         )
+        score = validation_results.get("scores").get("average_precision_score")
+
+        # The optimizer minimizes, the higher the average precision the
+        # better.
+        return TrialResult(
+            loss=-score, budget=self.algorithm.get_fitted_budget()
+        )
+
+    def get_trial_data(
+        self, data: pd.DataFrame, data_hash: Optional[str] = None
+    ) -> TrialData:
+        """Get the data every hpo trial uses.
+
+        The split, the transformations, the schema validations and the
+        algorithm training set do not depend on the hyperparameters, so
+        they are prepared once and reused until the data hash changes. The
+        transformer chain is fitted on the training split, as fit does.
+
+        Args:
+            data: pd.DataFrame
+                Training data.
+            data_hash: Optional[str]
+                Hash of data, computed once per search by the caller so the
+                trials do not hash the whole data again. If None, data is
+                hashed.
+
+        Returns:
+            TrialData
+        """
+        if data_hash is None:
+            data_hash = self.evaluator.hash_data(data=data)
+        if (
+            self._trial_data is not None
+            and self._trial_data.data_hash == data_hash
+        ):
+            return self._trial_data
+
+        # Drop the previous training set before building the next one.
+        self._trial_data = None
+
+        train_data, validation_data = self.evaluator.split(data=data)
+
+        train_data = self.transformer_chain.fit_transform(features=train_data)
+        train_features = data_schemas.validate_and_coerce_schema(
+            data=train_data, schema_class=self.feature_schemas
+        )
+        train_target = data_schemas.validate_and_coerce_schema(
+            data=train_data, schema_class=self.target_schema
+        )
+        train_set = self.algorithm.get_train_set(
+            features=train_features, target=train_target
+        )
+
+        validation_data = self.transformer_chain.transform(
+            features=validation_data
+        )
+        validation_features = data_schemas.validate_and_coerce_schema(
+            data=validation_data, schema_class=self.feature_schemas
+        )
+        true_values = self.get_true_values(data=validation_data)
+
+        self._trial_data = TrialData(
+            data_hash=data_hash,
+            train_set=train_set,
+            train_features=train_features if train_set is None else None,
+            train_target=train_target if train_set is None else None,
+            validation_features=validation_features,
+            validation_set=self.algorithm.get_validation_set(
+                features=validation_features,
+                target=true_values.tx_fraud,
+                train_set=train_set,
+            ),
+            true_values=true_values,
+        )
 
-        return validation_results.get("scores").get("average_precision_score")
+        return self._trial_data
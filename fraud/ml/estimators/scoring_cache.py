@@ -0,0 +1,138 @@
+"""Cache of the scoring results of data frames."""
+import collections
+import hashlib
+import threading
+import weakref
+from typing import (
+    Any,
+    Dict,
+    Optional,
+    Tuple,
+)
+
+import pandas as pd
+
+from fraud.ml import metrics
+
+
+class ScoringCache:
+    """Results of the last scored batches, keyed by batch identity.
+
+    A batch is the data frame object itself: entries hold a weak reference
+    to it, so the cache never keeps a frame alive and a new frame reusing
+    the id of a collected one is a miss. A digest of the columns, index
+    and values guards against a frame edited in place between two calls,
+    e.g., data.loc[mask, "tx_amount"] = 0.0: the edited frame is a miss
+    and is scored again. Hashing a frame is much cheaper than
+    transforming and scoring it, frames that cannot be hashed are not
+    cached. The cache must be cleared whenever the scores may change,
+    e.g., after a fit.
+    """
+
+    def __init__(self, max_entries: int = 4):
+        """Instantiate an empty cache.
+
+        Args:
+            max_entries: int
+                Maximum number of batches kept, the least recently used
+                is evicted first.
+        """
+        self.max_entries = max_entries
+
+        self._entries: collections.OrderedDict[
+            int, Tuple[weakref.ref, Tuple[Any, ...], metrics.Results]
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_fingerprint(data: Any) -> Optional[Tuple[Any, ...]]:
+        """Get the shape, columns and a content digest of a frame.
+
+        Args:
+            data: Any
+                Scored data frame.
+
+        Returns:
+            Optional[Tuple[Any, ...]]:
+                Fingerprint of the frame, None if it cannot be hashed.
+        """
+        try:
+            row_hashes = pd.util.hash_pandas_object(obj=data, index=True)
+            columns = tuple(data.columns)
+        except (TypeError, AttributeError):
+            return None
+
+        digest = hashlib.blake2b(
+            row_hashes.to_numpy().tobytes(), digest_size=16
+        ).digest()
+        return data.shape, columns, digest
+
+    def get(self, data: Any) -> Optional[metrics.Results]:
+        """Get the results of a batch.
+
+        Args:
+            data: Any
+                Scored data frame.
+
+        Returns:
+            Optional[metrics.Results]:
+                Cached results, None if the batch was not scored.
+        """
+        key = id(data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            reference, fingerprint, results = entry
+            if reference() is not data or fingerprint != (
+                self._get_fingerprint(data=data)
+            ):
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return results
+
+    def set(self, data: Any, results: metrics.Results) -> None:
+        """Store the results of a batch.
+
+        Args:
+            data: Any
+                Scored data frame.
+            results: metrics.Results
+                Its results.
+
+        Returns:
+            None
+        """
+        if self.max_entries < 1:
+            return
+
+        fingerprint = self._get_fingerprint(data=data)
+        if fingerprint is None:
+            return
+
+        key = id(data)
+        with self._lock:
+            self._entries[key] = (weakref.ref(data), fingerprint, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the settings, not the entries nor the lock."""
+        return {"max_entries": self.max_entries}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Rebuild an empty cache."""
+        self.__init__(**state)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Number of cached batches."""
+        return len(self._entries)
@@ -0,0 +1,123 @@
+"""Walk-forward backtesting folds run in parallel."""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from fraud import utils
+
+# Trains and evaluates a fold of the data, giving its scores.
+FoldRunner = Callable[[pd.DataFrame, int], Dict[str, float]]
+
+# Fold runner and data of a backtesting worker process, set by _init_worker.
+_worker_run_fold: Optional[FoldRunner] = None
+_worker_data: Optional[pd.DataFrame] = None
+
+
+def _init_worker(
+    run_fold: FoldRunner,
+    shared_data: utils.SharedFrame,
+    n_threads: int,
+) -> None:
+    """Keep the fold runner and map the shared data in a worker process."""
+    global _worker_run_fold, _worker_data
+
+    # The workers share the cores, instead of each OpenMP runtime using all.
+    threadpool_limits(limits=n_threads, user_api="openmp")
+
+    _worker_run_fold = run_fold
+    _worker_data = shared_data.to_frame()
+
+
+def _run_fold(fold: int) -> Dict[str, float]:
+    """Train and evaluate a fold in a worker process."""
+    return _worker_run_fold(_worker_data, fold)
+
+
+def run_folds(
+    run_fold: FoldRunner,
+    data: pd.DataFrame,
+    n_folds: int,
+    n_jobs: int,
+) -> List[Dict[str, float]]:
+    """Train and evaluate every fold.
+
+    With several processes, the data is copied once into shared memory
+    and every worker maps it, so the folds reuse the preprocessed data
+    without pickling it. Workers are spawned, see TrialPool.
+
+    Args:
+        run_fold: FoldRunner
+            Picklable function training and evaluating a fold of the data.
+        data: pd.DataFrame
+            Preprocessed data, see utils.is_columnar_frame.
+        n_folds: int
+            Number of folds.
+        n_jobs: int
+            Number of worker processes, 1 runs the folds in the current
+            process.
+
+    Returns:
+        List[Dict[str, float]]:
+            Scores of every fold, oldest first.
+    """
+    if n_jobs == 1:
+        return [run_fold(data, fold) for fold in range(n_folds)]
+
+    n_jobs = min(n_jobs, n_folds)
+    with utils.SharedFrame(data=data) as shared_data, ProcessPoolExecutor(
+        max_workers=n_jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(
+            run_fold,
+            shared_data,
+            max(os.cpu_count() // n_jobs, 1),
+        ),
+    ) as executor:
+        return list(executor.map(_run_fold, range(n_folds)))
+
+
+def aggregate_folds(
+    fold_scores: List[Dict[str, float]]
+) -> Dict[str, Dict[str, float]]:
+    """Aggregate the scores of the folds.
+
+    Args:
+        fold_scores: List[Dict[str, float]]
+            Scores of every fold.
+
+    Returns:
+        Dict[str, Dict[str, float]]:
+            Mean, standard deviation, minimum and maximum of every metric
+            over the folds where it is defined.
+    """
+    aggregates = {}
+    for name in fold_scores[0]:
+        values = np.array(
+            [scores[name] for scores in fold_scores], dtype=np.float64
+        )
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            aggregates[name] = dict.fromkeys(
+                ["mean", "std", "min", "max"], np.nan
+            )
+            continue
+
+        aggregates[name] = {
+            "mean": values.mean(),
+            "std": values.std(ddof=1) if len(values) > 1 else 0.0,
+            "min": values.min(),
+            "max": values.max(),
+        }
+
+    return aggregates
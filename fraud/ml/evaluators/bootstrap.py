@@ -0,0 +1,387 @@
+"""Bootstrap confidence intervals of the evaluation metrics."""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from fraud import utils
+from fraud.ml import metrics
+from fraud.ml.evaluators.bootstrap_config import (
+    BootstrapConfig,
+    ResamplingStrategy,
+)
+from fraud.ml.metrics.metric import Metric
+
+logger = utils.get_logger()
+
+_DAY = np.timedelta64(1, "D").astype("timedelta64[ns]")
+
+
+class ScoredTestSet:
+    """Scored test set, resampled through index arrays.
+
+    The columns are only gathered with the indices of every resample, the
+    scored frame itself is never copied.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        """Index the transactions by day.
+
+        Args:
+            data: pd.DataFrame
+                Scores, tx_fraud, tx_datetime and customer_id of every
+                transaction.
+        """
+        self.scores = data.scores.to_numpy()
+        self.labels = data.tx_fraud.to_numpy() == 1
+        self.tx_datetime = data.tx_datetime.to_numpy(dtype="datetime64[ns]")
+        self.customer_id = data.customer_id.to_numpy()
+
+        self.positives = np.flatnonzero(self.labels)
+        self.negatives = np.flatnonzero(~self.labels)
+
+        # Days as in kpis.card_precision_top_k, a transaction at the start
+        # midnight goes with the first day.
+        start_date = self.tx_datetime.min().astype("datetime64[D]")
+        days = (self.tx_datetime - start_date - np.timedelta64(1, "ns")) // (
+            _DAY
+        )
+        days = np.clip(days, 0, None)
+
+        self.num_days = int(days.max()) + 1
+        self.day_order = np.argsort(days, kind="stable")
+        self.day_starts = np.searchsorted(
+            days[self.day_order], np.arange(self.num_days + 1)
+        )
+
+        customers, unique_customers = pd.factorize(self.customer_id)
+        self.num_customers = len(unique_customers)
+        self.customer_order = np.argsort(customers, kind="stable")
+        self.customer_starts = np.searchsorted(
+            customers[self.customer_order], np.arange(self.num_customers + 1)
+        )
+
+    def resample(
+        self,
+        bootstrap_config: BootstrapConfig,
+        random_state: np.random.Generator,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Draw the transactions of a resample.
+
+        Args:
+            bootstrap_config: BootstrapConfig
+                strategy and block_length_in_days are used.
+            random_state: np.random.Generator
+                Random generator of the resample.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]:
+                Index, datetime and customer_id of every drawn transaction.
+                Day blocks are shifted to the day they are laid out on, and
+                every copy of a drawn customer is a distinct customer.
+        """
+        if bootstrap_config.strategy == ResamplingStrategy.CUSTOMER:
+            customers = random_state.integers(
+                0, self.num_customers, self.num_customers
+            )
+            indices, lengths = self._gather(
+                order=self.customer_order,
+                starts=self.customer_starts,
+                groups=customers,
+            )
+
+            return (
+                indices,
+                self.tx_datetime[indices],
+                np.repeat(np.arange(self.num_customers), lengths),
+            )
+
+        if bootstrap_config.strategy == ResamplingStrategy.STRATIFIED:
+            indices = np.concatenate(
+                [
+                    group[random_state.integers(0, len(group), len(group))]
+                    for group in (self.positives, self.negatives)
+                ]
+            )
+
+            return (
+                indices,
+                self.tx_datetime[indices],
+                self.customer_id[indices],
+            )
+
+        if bootstrap_config.strategy == ResamplingStrategy.DAY_BLOCK:
+            block_length = min(
+                max(bootstrap_config.block_length_in_days, 1), self.num_days
+            )
+            n_blocks = -(-self.num_days // block_length)
+            block_starts = random_state.integers(
+                0, self.num_days - block_length + 1, n_blocks
+            )
+            source_days = (
+                block_starts[:, np.newaxis] + np.arange(block_length)
+            ).ravel()[: self.num_days]
+
+            indices, lengths = self._gather(
+                order=self.day_order,
+                starts=self.day_starts,
+                groups=source_days,
+            )
+            day_shifts = np.repeat(
+                np.arange(self.num_days) - source_days, lengths
+            )
+
+            return (
+                indices,
+                self.tx_datetime[indices] + day_shifts * _DAY,
+                self.customer_id[indices],
+            )
+
+        raise NotImplementedError(
+            f"{bootstrap_config.strategy} not implemented"
+        )
+
+    @staticmethod
+    def _gather(
+        order: np.ndarray, starts: np.ndarray, groups: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the transactions of the drawn groups, e.g., days.
+
+        Args:
+            order: np.ndarray
+                Transactions sorted by group.
+            starts: np.ndarray
+                Position in order of the first transaction of every group.
+            groups: np.ndarray
+                Drawn groups.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]:
+                Index of the transactions and number of transactions of
+                every drawn group.
+        """
+        lengths = np.diff(starts)[groups]
+        offsets = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+
+        return order[np.repeat(starts[groups], lengths) + offsets], lengths
+
+    def measure(
+        self,
+        metric_list: List[Metric],
+        bootstrap_config: BootstrapConfig,
+        seed: np.random.SeedSequence,
+    ) -> Dict[str, float]:
+        """Measure the metrics of a resample.
+
+        Args:
+            metric_list: List[Metric]
+                Metrics to measure.
+            bootstrap_config: BootstrapConfig
+                Resampling parameters.
+            seed: np.random.SeedSequence
+                Seed of the resample.
+
+        Returns:
+            Dict[str, float]:
+                Score of every metric, nan if it is not defined.
+        """
+        indices, tx_datetime, customer_id = self.resample(
+            bootstrap_config=bootstrap_config,
+            random_state=np.random.default_rng(seed),
+        )
+
+        context = metrics.MetricContext(
+            results=metrics.Results(
+                predictions=None, scores=self.scores[indices]
+            ),
+            true_values=metrics.TrueValues(
+                tx_fraud=self.labels[indices],
+                tx_datetime=tx_datetime,
+                customer_id=customer_id,
+            ),
+        )
+
+        scores = {}
+        for metric_instance in metric_list:
+            try:
+                scores[metric_instance.name] = metric_instance.measure_context(
+                    context=context
+                )
+            except ValueError:
+                # e.g., a resample with a single class.
+                scores[metric_instance.name] = np.nan
+
+        return scores
+
+
+# Test set and settings of a bootstrap worker process, set by _init_worker.
+_worker_state: Optional[
+    Tuple[utils.SharedFrame, ScoredTestSet, List[Metric], BootstrapConfig]
+] = None
+
+
+def _init_worker(
+    shared_data: utils.SharedFrame,
+    metric_list: List[Metric],
+    bootstrap_config: BootstrapConfig,
+) -> None:
+    """Map the shared test set in a worker process."""
+    global _worker_state
+
+    # The workers share the cores, instead of each BLAS runtime using all.
+    threadpool_limits(limits=1)
+
+    _worker_state = (
+        shared_data,
+        ScoredTestSet(data=shared_data.to_frame()),
+        metric_list,
+        bootstrap_config,
+    )
+
+
+def _measure_resamples(
+    seeds: List[np.random.SeedSequence],
+) -> List[Dict[str, float]]:
+    """Measure the metrics of resamples in a worker process."""
+    _, test_set, metric_list, bootstrap_config = _worker_state
+    return [
+        test_set.measure(
+            metric_list=metric_list,
+            bootstrap_config=bootstrap_config,
+            seed=seed,
+        )
+        for seed in seeds
+    ]
+
+
+def bootstrap_metrics(
+    metric_list: List[Metric],
+    results: metrics.Results,
+    true_values: metrics.TrueValues,
+    bootstrap_config: BootstrapConfig,
+) -> Dict[str, Dict[str, float]]:
+    """Percentile bootstrap confidence intervals of the metrics.
+
+    Every resample has its own seed, spawned from random_state, so the
+    intervals do not depend on the number of processes. Metrics that
+    follow customers only get an interval with customer resampling, they
+    are nan otherwise.
+
+    Args:
+        metric_list: List[Metric]
+            Metrics to measure.
+        results: metrics.Results
+            Estimator predictions on the test set.
+        true_values: metrics.TrueValues
+            True values of the test set.
+        bootstrap_config: BootstrapConfig
+            Bootstrap parameters.
+
+    Returns:
+        Dict[str, Dict[str, float]]:
+            Lower and upper bounds and standard error of every metric.
+    """
+    # Transactions or days drawn with replacement drop and repeat cards,
+    # which biases the metrics that follow them.
+    metric_names = [metric_instance.name for metric_instance in metric_list]
+    excluded_metrics = [
+        metric_instance.name
+        for metric_instance in metric_list
+        if metric_instance.is_by_customer
+        and bootstrap_config.strategy != ResamplingStrategy.CUSTOMER
+    ]
+    if excluded_metrics:
+        logger.warning(
+            f"No {bootstrap_config.strategy.value} resampling intervals for "
+            f"{', '.join(excluded_metrics)}, they need customer resampling"
+        )
+        metric_list = [
+            metric_instance
+            for metric_instance in metric_list
+            if metric_instance.name not in excluded_metrics
+        ]
+
+    data = pd.DataFrame(
+        {
+            "scores": np.ravel(np.asarray(results.scores)),
+            "tx_fraud": np.ravel(np.asarray(true_values.tx_fraud)) == 1,
+            "tx_datetime": np.ravel(np.asarray(true_values.tx_datetime)),
+            "customer_id": np.ravel(np.asarray(true_values.customer_id)),
+        }
+    )
+    seeds = np.random.SeedSequence(bootstrap_config.random_state).spawn(
+        bootstrap_config.n_resamples
+    )
+
+    n_jobs = bootstrap_config.n_jobs
+    if n_jobs < 1:
+        n_jobs = os.cpu_count()
+
+    if n_jobs == 1:
+        test_set = ScoredTestSet(data=data)
+        resample_scores = [
+            test_set.measure(
+                metric_list=metric_list,
+                bootstrap_config=bootstrap_config,
+                seed=seed,
+            )
+            for seed in seeds
+        ]
+    else:
+        # A few chunks per worker balance the load with little overhead.
+        chunks = [
+            [seeds[i] for i in chunk]
+            for chunk in np.array_split(np.arange(len(seeds)), n_jobs * 4)
+            if len(chunk)
+        ]
+        with utils.SharedFrame(data=data) as shared_data, ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(shared_data, metric_list, bootstrap_config),
+        ) as executor:
+            resample_scores = [
+                scores
+                for chunk_scores in executor.map(_measure_resamples, chunks)
+                for scores in chunk_scores
+            ]
+
+    alpha = (1 - bootstrap_config.confidence_level) / 2
+    confidence_intervals = {
+        name: dict.fromkeys(["lower", "upper", "std"], np.nan)
+        for name in metric_names
+    }
+    for metric_instance in metric_list:
+        values = np.array(
+            [scores[metric_instance.name] for scores in resample_scores],
+            dtype=np.float64,
+        )
+        if np.isnan(values).all():
+            lower = upper = std = np.nan
+        else:
+            lower, upper = np.nanquantile(values, [alpha, 1 - alpha])
+            std = np.nanstd(values, ddof=1)
+
+        confidence_intervals[metric_instance.name] = {
+            "lower": lower,
+            "upper": upper,
+            "std": std,
+        }
+
+    logger.info(
+        f"Bootstrapped {len(resample_scores)} resamples of "
+        f"{len(data)} transactions"
+    )
+
+    return confidence_intervals
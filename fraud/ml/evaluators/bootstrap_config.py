@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Bootstrap configuration."""
+from __future__ import annotations
+
+import enum
+from dataclasses import dataclass
+
+
+class ResamplingStrategy(str, enum.Enum):
+    """Test set resampling strategies."""
+
+    CUSTOMER: ResamplingStrategy = "CUSTOMER"
+    STRATIFIED: ResamplingStrategy = "STRATIFIED"
+    DAY_BLOCK: ResamplingStrategy = "DAY_BLOCK"
+
+
+@dataclass
+class BootstrapConfig:
+    """Bootstrap Configuration.
+
+    Attributes:
+        n_resamples: int
+            Number of resamples of the test set, 0 disables the confidence
+            intervals.
+        strategy: ResamplingStrategy
+            Customer resampling draws customers with all their
+            transactions, every copy of a drawn customer counting as a
+            distinct one, so the number of cards per day and their
+            histories are kept. Stratified resampling draws the fraudulent
+            and genuine transactions separately, keeping the fraud rate.
+            Day block resampling draws blocks of consecutive days and lays
+            them out one after the other over the test period. Only
+            customer resampling keeps the cards the card precision top-k
+            metrics follow, with the other strategies these metrics have no
+            interval.
+        block_length_in_days: int
+            Number of consecutive days of a block.
+        confidence_level: float
+            Probability mass between the interval bounds.
+        n_jobs: int
+            Worker processes computing the resamples, 1 computes them in the
+            current process and values below 1 use all the cores.
+        random_state: int
+            Seed of the resamples, the intervals are reproducible whatever
+            n_jobs is.
+    """
+
+    n_resamples: int = 0
+    strategy: ResamplingStrategy = ResamplingStrategy.CUSTOMER
+    block_length_in_days: int = 1
+    confidence_level: float = 0.95
+    n_jobs: int = 1
+    random_state: int = 19911127
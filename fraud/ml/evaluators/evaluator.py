@@ -14,6 +14,8 @@ import pandas as pd
 
 from fraud import utils
 from fraud.ml import metrics
+from fraud.ml.evaluators.bootstrap import bootstrap_metrics
+from fraud.ml.evaluators.bootstrap_config import BootstrapConfig
 
 logger = utils.get_logger()
 
@@ -35,6 +37,13 @@ class Evaluator(ABC):
             )
             self.metrics.append(metric_instance)
 
+        self.bootstrap_config = BootstrapConfig()
+
+        # Backtesting folds and the processes running them, a single fold
+        # is the split itself.
+        self.n_folds = 1
+        self.n_jobs = 1
+
     @abstractmethod
     def split(self, data: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Split the data for training and testig.
@@ -49,6 +58,47 @@ class Evaluator(ABC):
         """
         raise NotImplementedError
 
+    def split_fold(
+        self, data: pd.DataFrame, fold: int
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Split the data of a backtesting fold for training and testing.
+
+        Args:
+            data: pd.DataFrame
+                Data to split in training and testing.
+            fold: int
+                Fold number, below n_folds.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]:
+                Training and testing data.
+        """
+        return self.split(data=data)
+
+    def get_split_params(self) -> Dict[str, Any]:
+        """Get the settings the split depends on.
+
+        Returns:
+            Dict[str, Any]:
+                Split settings, e.g., to tell apart the hpo studies.
+        """
+        return {}
+
+    def check_folds(self, data: pd.DataFrame, nested_splits: int = 0) -> None:
+        """Check every backtesting fold has training data.
+
+        Args:
+            data: pd.DataFrame
+                Data to split in folds.
+            nested_splits: int
+                Times the training data of a fold is split again, e.g., 1
+                when the hyperparameters are searched within every fold.
+
+        Raises:
+            ValueError:
+                If the data is too short for the folds.
+        """
+
     @staticmethod
     def hash_data(data: pd.DataFrame) -> str:
         """Hash data for tracking purposes.
@@ -79,21 +129,70 @@ class Evaluator(ABC):
             plot_results: bool
                 If True, model results will be plotted.
 
+        Returns:
+            Dict[str, float]:
+                Evaluation metrics.
+        """
+        # The metrics share the sorted scores and the daily aggregations.
+        return self.evaluate_context(
+            context=metrics.MetricContext(
+                results=results, true_values=true_values
+            ),
+            plot_results=plot_results,
+        )
+
+    def evaluate_context(
+        self,
+        context: metrics.MetricContext,
+        plot_results: bool = False,
+    ) -> Dict[str, float]:
+        """Evaluate model predictions from a shared metric context.
+
+        Args:
+            context: metrics.MetricContext
+                Predictions, true values and their shared intermediate
+                results, e.g., finalized from a metrics.MetricAccumulator.
+            plot_results: bool
+                If True, model results will be plotted.
+
         Returns:
             Dict[str, float]:
                 Evaluation metrics.
         """
         scores = {}
         for metric_instance in self.metrics:
-            score = metric_instance.measure(
-                results=results,
-                true_values=true_values,
-                plot_results=plot_results,
+            score = metric_instance.measure_context(
+                context=context, plot_results=plot_results
             )
             scores[metric_instance.name] = score
 
         return scores
 
+    def evaluate_bootstrap(
+        self,
+        results: metrics.Results,
+        true_values: metrics.TrueValues,
+    ) -> Dict[str, Dict[str, float]]:
+        """Get the bootstrap confidence intervals of the metrics.
+
+        Args:
+            results: metrics.Results
+                Estimator results.
+            true_values: metrics.TrueValues
+                True values that we want to predict.
+
+        Returns:
+            Dict[str, Dict[str, float]]:
+                Lower and upper bounds and standard error of every metric,
+                see bootstrap_config.
+        """
+        return bootstrap_metrics(
+            metric_list=self.metrics,
+            results=results,
+            true_values=true_values,
+            bootstrap_config=self.bootstrap_config,
+        )
+
     def log_testing(
         self,
         estimator_params: Dict[str, Any],
@@ -101,6 +200,7 @@ class Evaluator(ABC):
         results: metrics.Results,
         true_values: metrics.TrueValues,
         plot_results: bool = False,
+        confidence_intervals: bool = False,
     ) -> Dict[str, Any]:
         """Log model evaluation.
 
@@ -115,6 +215,9 @@ class Evaluator(ABC):
                 True values that we want to predict.
             plot_results: bool
                 If True, model results will be plotted.
+            confidence_intervals: bool
+                If True and bootstrap_config has resamples, the confidence
+                intervals of the scores are added to the results.
 
         Returns:
             Dict[str, Any]:
@@ -124,11 +227,18 @@ class Evaluator(ABC):
         scores = self.evaluate(
             results=results, true_values=true_values, plot_results=plot_results
         )
+        intervals = None
+        if confidence_intervals and self.bootstrap_config.n_resamples > 0:
+            intervals = self.evaluate_bootstrap(
+                results=results, true_values=true_values
+            )
         results = {
             "scores": scores,
             "estimator_params": estimator_params,
             "hashed_data": hashed_data,
         }
+        if intervals is not None:
+            results["confidence_intervals"] = intervals
         if plot_results:
             utils.log_model_results(logger=logger, results=results)
         return results
@@ -5,14 +5,19 @@ import enum
 
 from fraud.ml import metrics
 from fraud.ml.evaluators.evaluator import Evaluator
-from fraud.ml.evaluators.evaluator_params import TimeEvaluatorParams
+from fraud.ml.evaluators.evaluator_params import (
+    TimeEvaluatorParams,
+    WalkForwardEvaluatorParams,
+)
 from fraud.ml.evaluators.time_evaluator import TimeEvaluator
+from fraud.ml.evaluators.walk_forward_evaluator import WalkForwardEvaluator
 
 
 class EvaluatorType(str, enum.Enum):
     """Available evaluators."""
 
     TIME_EVALUATOR: EvaluatorType = "TIME_EVALUATOR"
+    WALK_FORWARD_EVALUATOR: EvaluatorType = "WALK_FORWARD_EVALUATOR"
 
 
 class EvaluatorFactory:
@@ -20,8 +25,14 @@ class EvaluatorFactory:
 
     def __init__(self):
         """Initialize evaluator factory."""
-        self._params = {EvaluatorType.TIME_EVALUATOR: TimeEvaluatorParams}
-        self._catalogue = {EvaluatorType.TIME_EVALUATOR: TimeEvaluator}
+        self._params = {
+            EvaluatorType.TIME_EVALUATOR: TimeEvaluatorParams,
+            EvaluatorType.WALK_FORWARD_EVALUATOR: WalkForwardEvaluatorParams,
+        }
+        self._catalogue = {
+            EvaluatorType.TIME_EVALUATOR: TimeEvaluator,
+            EvaluatorType.WALK_FORWARD_EVALUATOR: WalkForwardEvaluator,
+        }
         self.metric_type_list = [
             metrics.MetricType.AVERAGE_PRECISION,
             metrics.MetricType.PR_AUC,
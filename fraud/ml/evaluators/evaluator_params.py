@@ -9,3 +9,11 @@ class TimeEvaluatorParams:
     date_colum_name: str = "tx_datetime"
     delta_test_in_days: int = 7
     delta_delay_in_days: int = 7
+
+
+@dataclass
+class WalkForwardEvaluatorParams(TimeEvaluatorParams):
+    """Walk-forward evaluator parameters."""
+
+    n_folds: int = 4
+    n_jobs: int = 1
@@ -1,5 +1,7 @@
 """Time evaluator implementation."""
 from typing import (
+    Any,
+    Dict,
     List,
     Tuple,
 )
@@ -40,6 +42,19 @@ class TimeEvaluator(Evaluator):
         self.delta_test_in_days = delta_test_in_days
         self.delta_delay_in_days = delta_delay_in_days
 
+    def get_split_params(self) -> Dict[str, Any]:
+        """Get the settings the split depends on.
+
+        Returns:
+            Dict[str, Any]:
+                Datetime column, test and delay days.
+        """
+        return {
+            "date_colum_name": self.date_colum_name,
+            "delta_test_in_days": self.delta_test_in_days,
+            "delta_delay_in_days": self.delta_delay_in_days,
+        }
+
     def split(self, data: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Split the data for training and testig.
 
@@ -0,0 +1,161 @@
+"""Walk-forward evaluator implementation."""
+from typing import (
+    List,
+    Tuple,
+)
+
+import pandas as pd
+
+from fraud.ml import metrics
+from fraud.ml.evaluators.time_evaluator import TimeEvaluator
+
+
+class WalkForwardEvaluator(TimeEvaluator):
+    """Machine learning model walk-forward evaluator.
+
+    The data is split into n_folds consecutive test periods ending at the
+    last day. Every fold trains on all the data up to its test period,
+    minus the feedback delay, so the training window expands from one fold
+    to the next. The last fold is the time evaluator split.
+    """
+
+    def __init__(
+        self,
+        metric_type_list: List[metrics.MetricType],
+        date_colum_name: str,
+        delta_test_in_days: int,
+        delta_delay_in_days: int,
+        n_folds: int,
+        n_jobs: int,
+    ):
+        """Instantiate a walk-forward evaluator class.
+
+        Args:
+            metric_type_list: List[metrics.MetricType]
+                list of model metrics.
+            date_colum_name: str
+                Column name that contains the datetime index.
+            delta_test_in_days: int
+                Number of days of the test set of every fold.
+            delta_delay_in_days: int
+                Feedback delay between the training and test sets of every
+                fold, see TimeEvaluator.
+            n_folds: int
+                Number of folds.
+            n_jobs: int
+                Worker processes training and evaluating the folds, 1 runs
+                them in the current process and values below 1 use all the
+                cores.
+        """
+        super().__init__(
+            metric_type_list=metric_type_list,
+            date_colum_name=date_colum_name,
+            delta_test_in_days=delta_test_in_days,
+            delta_delay_in_days=delta_delay_in_days,
+        )
+        self.n_folds = n_folds
+        self.n_jobs = n_jobs
+
+    def get_fold_dates(
+        self, data: pd.DataFrame, fold: int
+    ) -> Tuple[pd.Timestamp, pd.Timestamp, pd.Timestamp]:
+        """Get the boundaries of a fold.
+
+        Args:
+            data: pd.DataFrame
+                Data to split.
+            fold: int
+                Fold number, 0 is the oldest test period.
+
+        Returns:
+            Tuple[pd.Timestamp, pd.Timestamp, pd.Timestamp]:
+                End of the training set, start and end of the test set.
+        """
+        end_date = data[self.date_colum_name].max().ceil(freq="D")
+
+        test_end_date = end_date - pd.Timedelta(
+            value=self.delta_test_in_days * (self.n_folds - 1 - fold),
+            unit="D",
+        )
+
+        test_start_date = test_end_date - pd.Timedelta(
+            value=self.delta_test_in_days, unit="D"
+        )
+
+        train_end_date = test_start_date - pd.Timedelta(
+            value=self.delta_delay_in_days, unit="D"
+        )
+
+        return train_end_date, test_start_date, test_end_date
+
+    def check_folds(self, data: pd.DataFrame, nested_splits: int = 0) -> None:
+        """Check every backtesting fold has training data.
+
+        The oldest fold has the shortest training set, it needs more than
+        n_folds * delta_test_in_days + delta_delay_in_days days of data,
+        plus delta_test_in_days + delta_delay_in_days for every nested
+        split.
+
+        Args:
+            data: pd.DataFrame
+                Data to split in folds.
+            nested_splits: int
+                Times the training data of a fold is split again, e.g., 1
+                when the hyperparameters are searched within every fold.
+
+        Raises:
+            ValueError:
+                If the data is too short for the folds.
+        """
+        train_end_date, _, _ = self.get_fold_dates(data=data, fold=0)
+        train_end_date -= pd.Timedelta(
+            value=nested_splits
+            * (self.delta_test_in_days + self.delta_delay_in_days),
+            unit="D",
+        )
+
+        start_date = data[self.date_colum_name].min()
+        if start_date <= train_end_date:
+            return
+
+        end_date = data[self.date_colum_name].max().ceil(freq="D")
+        required_days = (
+            self.n_folds + nested_splits
+        ) * self.delta_test_in_days + (
+            1 + nested_splits
+        ) * self.delta_delay_in_days
+        nested = f" and {nested_splits} nested splits" if nested_splits else ""
+        raise ValueError(
+            f"{self.n_folds} backtesting folds of {self.delta_test_in_days} "
+            f"test days, with a {self.delta_delay_in_days} days delay{nested}"
+            f", need more than {required_days} days of data, got "
+            f"{(end_date - start_date).days}"
+        )
+
+    def split_fold(
+        self, data: pd.DataFrame, fold: int
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Split the data of a fold for training and testing.
+
+        Args:
+            data: pd.DataFrame
+                Data to split in training and testing.
+            fold: int
+                Fold number, 0 is the oldest test period.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]:
+                Training and testing data.
+        """
+        train_end_date, test_start_date, test_end_date = self.get_fold_dates(
+            data=data, fold=fold
+        )
+        dates = data[self.date_colum_name]
+
+        test_data = data[
+            (dates > test_start_date) & (dates <= test_end_date)
+        ].copy()
+
+        train_data = data[dates <= train_end_date]
+
+        return train_data, test_data
@@ -0,0 +1,375 @@
+"""Batched ask/tell hyperparameter search."""
+import functools
+import itertools
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    List,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+import skopt
+from skopt.utils import (
+    cook_estimator,
+    normalize_dimensions,
+)
+from threadpoolctl import threadpool_limits
+
+from fraud import utils
+from fraud.ml.hyperparam_optim.hpo_config import (
+    HPOConfig,
+    PruningStrategy,
+)
+from fraud.ml.hyperparam_optim.trial_data import TrialResult
+from fraud.ml.hyperparam_optim.trial_store import TrialStore
+
+logger = utils.get_logger()
+
+# Scores a candidate, with a budget fraction, on the data.
+Objective = Callable[[pd.DataFrame, List[Any], float], TrialResult]
+
+# Objective and data of a trial worker process, set by _init_worker.
+_worker_objective: Optional[Objective] = None
+_worker_data: Optional[pd.DataFrame] = None
+
+
+def _init_worker(
+    objective: Objective,
+    shared_data: utils.SharedFrame,
+    n_threads: int,
+) -> None:
+    """Keep the objective and map the shared data in a worker process."""
+    global _worker_objective, _worker_data
+
+    # The workers share the cores, instead of each OpenMP runtime using all.
+    threadpool_limits(limits=n_threads, user_api="openmp")
+
+    _worker_objective = objective
+    _worker_data = shared_data.to_frame()
+
+
+def _run_trial(candidate: List[Any], budget: float) -> TrialResult:
+    """Evaluate a candidate in a worker process."""
+    return _worker_objective(_worker_data, candidate, budget)
+
+
+class TrialPool:
+    """Process pool evaluating hyperparameter candidates.
+
+    The data is copied once into shared memory and every worker maps it, so
+    a trial only sends its candidate and gets back its score. Workers are
+    spawned rather than forked because LightGBM's OpenMP runtime can
+    deadlock in a process forked after it trained.
+    """
+
+    def __init__(
+        self,
+        objective: Objective,
+        data: pd.DataFrame,
+        n_jobs: int,
+    ):
+        """Start the workers.
+
+        Args:
+            objective: Objective
+                Picklable function scoring a candidate, with a budget
+                fraction, on the data.
+            data: pd.DataFrame
+                Data passed to the objective, see utils.is_columnar_frame.
+            n_jobs: int
+                Number of worker processes.
+        """
+        self.n_jobs = n_jobs
+        self._shared_data = utils.SharedFrame(data=data)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                objective,
+                self._shared_data,
+                max(os.cpu_count() // n_jobs, 1),
+            ),
+        )
+
+    def evaluate(
+        self, candidates: List[List[Any]], budgets: List[float]
+    ) -> List[TrialResult]:
+        """Evaluate candidates concurrently.
+
+        Args:
+            candidates: List[List[Any]]
+                Points of the search space.
+            budgets: List[float]
+                Budget fraction of every candidate.
+
+        Returns:
+            List[TrialResult]:
+                Result of every candidate.
+        """
+        return list(self._executor.map(_run_trial, candidates, budgets))
+
+    def shutdown(self) -> None:
+        """Stop the workers and free the shared data."""
+        self._executor.shutdown()
+        self._shared_data.unlink()
+
+    def __enter__(self) -> "TrialPool":
+        """Use the pool within a context."""
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Stop the pool."""
+        self.shutdown()
+
+
+def get_brackets(hpo_config: HPOConfig) -> List[Tuple[int, List[float]]]:
+    """Get the brackets the candidates are proposed in, cycled over.
+
+    Args:
+        hpo_config: HPOConfig
+            batch_size, pruning, reduction_factor and n_rungs are used.
+
+    Returns:
+        List[Tuple[int, List[float]]]:
+            Number of candidates of every bracket and the budget of each of
+            its rungs, as a fraction of the full budget.
+    """
+    eta = hpo_config.reduction_factor
+    max_rung = max(hpo_config.n_rungs, 1) - 1
+    batch_size = max(hpo_config.batch_size, 1)
+
+    if hpo_config.pruning == PruningStrategy.NONE or max_rung == 0:
+        return [(batch_size, [1.0])]
+
+    if hpo_config.pruning == PruningStrategy.SUCCESSIVE_HALVING:
+        return [
+            (
+                max(batch_size, eta**max_rung),
+                [eta ** (rung - max_rung) for rung in range(max_rung + 1)],
+            )
+        ]
+
+    if hpo_config.pruning == PruningStrategy.HYPERBAND:
+        return [
+            (
+                math.ceil((max_rung + 1) / (first + 1) * eta**first),
+                [eta ** (rung - first) for rung in range(first + 1)],
+            )
+            for first in range(max_rung, -1, -1)
+        ]
+
+    raise NotImplementedError(f"{hpo_config.pruning} not implemented")
+
+
+def run_bracket(
+    evaluate: Callable[[List[List[Any]], List[float]], List[TrialResult]],
+    candidates: List[List[Any]],
+    budgets: List[float],
+    reduction_factor: int,
+) -> List[TrialResult]:
+    """Successive halving of a bracket of candidates.
+
+    Every rung evaluates the remaining candidates with its budget, then only
+    the best 1 / reduction_factor of them, at least one, are promoted to the
+    next rung.
+
+    Args:
+        evaluate: Callable[[List[List[Any]], List[float]], List[TrialResult]]
+            Evaluates candidates, each with its budget fraction.
+        candidates: List[List[Any]]
+            Points of the search space.
+        budgets: List[float]
+            Budget fraction of every rung, increasing.
+        reduction_factor: int
+            Candidate reduction between two rungs.
+
+    Returns:
+        List[TrialResult]:
+            Result of every candidate at the last rung it reached.
+    """
+    trial_results: List[Optional[TrialResult]] = [None] * len(candidates)
+    promoted = list(range(len(candidates)))
+
+    for rung, budget in enumerate(budgets):
+        rung_results = evaluate(
+            [candidates[i] for i in promoted], [budget] * len(promoted)
+        )
+        for i, trial_result in zip(promoted, rung_results):
+            trial_results[i] = trial_result
+
+        if rung < len(budgets) - 1:
+            n_promoted = max(len(promoted) // reduction_factor, 1)
+            promoted = sorted(promoted, key=lambda i: trial_results[i].loss)
+            promoted = promoted[:n_promoted]
+
+    return trial_results
+
+
+def evaluate_with_store(
+    evaluate: Callable[[List[List[Any]], List[float]], List[TrialResult]],
+    candidates: List[List[Any]],
+    budgets: List[float],
+    trial_store: TrialStore,
+) -> List[TrialResult]:
+    """Evaluate the candidates missing in the store, then store them.
+
+    Args:
+        evaluate: Callable[[List[List[Any]], List[float]], List[TrialResult]]
+            Evaluates candidates, each with its budget fraction.
+        candidates: List[List[Any]]
+            Points of the search space.
+        budgets: List[float]
+            Budget fraction of every candidate.
+        trial_store: TrialStore
+            Store of the study.
+
+    Returns:
+        List[TrialResult]:
+            Result of every candidate.
+    """
+    trial_results = [
+        trial_store.get(candidate=candidate, budget=budget)
+        for candidate, budget in zip(candidates, budgets)
+    ]
+    missing = [i for i, result in enumerate(trial_results) if result is None]
+    if not missing:
+        return trial_results
+
+    new_results = evaluate(
+        [candidates[i] for i in missing], [budgets[i] for i in missing]
+    )
+    trial_store.add(
+        candidates=[candidates[i] for i in missing],
+        budgets=[budgets[i] for i in missing],
+        trial_results=new_results,
+    )
+    for i, trial_result in zip(missing, new_results):
+        trial_results[i] = trial_result
+
+    return trial_results
+
+
+def minimize_in_batches(
+    evaluate: Callable[[List[List[Any]], List[float]], List[TrialResult]],
+    dimensions: List[skopt.space.Dimension],
+    hpo_config: HPOConfig,
+    trial_store: Optional[TrialStore] = None,
+) -> Tuple[List[Any], TrialResult]:
+    """Bayesian optimization proposing batches of candidates.
+
+    The optimizer is the one gp_minimize builds, driven with ask/tell. Every
+    batch is proposed with a constant liar strategy: each candidate is
+    told a fake objective value before asking for the next one, so the
+    batch is spread over the search space. With a batch size of 1 and no
+    pruning the candidates are the ones gp_minimize proposes.
+
+    A batch is a bracket of the pruning strategy, the optimizer is told the
+    loss of every candidate at the last rung it reached.
+
+    With a trial store, the optimizer is warm started with the candidates
+    of the study, which count towards n_calls, and stored trials are not
+    evaluated again.
+
+    Args:
+        evaluate: Callable[[List[List[Any]], List[float]], List[TrialResult]]
+            Evaluates a batch of candidates, each with its budget fraction.
+        dimensions: List[skopt.space.Dimension]
+            Search space.
+        hpo_config: HPOConfig
+            n_calls, n_random_starts, random_state, batch_size,
+            liar_strategy and the pruning parameters are used.
+        trial_store: Optional[TrialStore]
+            Store of the study to resume and record.
+
+    Returns:
+        Tuple[List[Any], TrialResult]:
+            Best candidate and its trial result.
+    """
+    random_state = np.random.RandomState(hpo_config.random_state)
+    space = normalize_dimensions(dimensions)
+    base_estimator = cook_estimator(
+        "GP",
+        space=space,
+        random_state=random_state.randint(0, np.iinfo(np.int32).max),
+        noise="gaussian",
+    )
+    optimizer = skopt.Optimizer(
+        dimensions=space,
+        base_estimator=base_estimator,
+        n_initial_points=hpo_config.n_random_starts,
+        acq_func="gp_hedge",
+        acq_optimizer="lbfgs",
+        random_state=random_state,
+        acq_optimizer_kwargs={
+            "n_points": 10000,
+            "n_restarts_optimizer": 5,
+            "n_jobs": 1,
+        },
+        acq_func_kwargs={"xi": 0.01, "kappa": 1.96},
+    )
+
+    brackets = itertools.cycle(get_brackets(hpo_config=hpo_config))
+    best: Optional[Tuple[List[Any], TrialResult]] = None
+
+    history = []
+    if trial_store is not None:
+        evaluate = functools.partial(
+            evaluate_with_store, evaluate, trial_store=trial_store
+        )
+        history = trial_store.get_history()
+
+    if history:
+        optimizer.tell(
+            [candidate for candidate, _ in history],
+            [float(trial_result.loss) for _, trial_result in history],
+        )
+        best = min(history, key=lambda trial: trial[1].loss)
+        logger.info(f"HPO resumed from {len(history)} stored trials")
+
+    n_evaluated = len(history)
+    while n_evaluated < hpo_config.n_calls:
+        n_points, budgets = next(brackets)
+        n_points = min(n_points, hpo_config.n_calls - n_evaluated)
+        if n_points == 1:
+            candidates = [optimizer.ask()]
+        else:
+            candidates = optimizer.ask(
+                n_points=n_points, strategy=hpo_config.liar_strategy.value
+            )
+
+        trial_results = run_bracket(
+            evaluate=evaluate,
+            candidates=candidates,
+            budgets=budgets,
+            reduction_factor=hpo_config.reduction_factor,
+        )
+        optimizer.tell(
+            candidates,
+            [float(trial_result.loss) for trial_result in trial_results],
+        )
+
+        for candidate, trial_result in zip(candidates, trial_results):
+            if best is None or trial_result.loss < best[1].loss:
+                best = (candidate, trial_result)
+
+        n_evaluated += len(candidates)
+        logger.info(
+            f"HPO {n_evaluated}/{hpo_config.n_calls} trials, best objective "
+            f"{best[1].loss:.5f}"
+        )
+
+    return best
+
+
+def get_n_jobs(n_jobs: int) -> int:
+    """Resolve a number of processes, all the cores if below 1."""
+    return n_jobs if n_jobs >= 1 else os.cpu_count()
@@ -1,12 +1,66 @@
 # -*- coding: utf-8 -*-
 """Hyperparameter configuration."""
+from __future__ import annotations
+
+import enum
 from dataclasses import dataclass
 
 
+class LiarStrategy(str, enum.Enum):
+    """Fake objective values of the pending candidates of a batch."""
+
+    CL_MIN: LiarStrategy = "cl_min"
+    CL_MEAN: LiarStrategy = "cl_mean"
+    CL_MAX: LiarStrategy = "cl_max"
+
+
+class PruningStrategy(str, enum.Enum):
+    """Trial pruning strategies."""
+
+    NONE: PruningStrategy = "NONE"
+    SUCCESSIVE_HALVING: PruningStrategy = "SUCCESSIVE_HALVING"
+    HYPERBAND: PruningStrategy = "HYPERBAND"
+
+
 @dataclass
 class HPOConfig:
-    """HPO Configuration."""
+    """HPO Configuration.
+
+    Attributes:
+        batch_size: int
+            Candidates proposed at once and evaluated concurrently.
+        n_jobs: int
+            Worker processes evaluating the candidates, 1 evaluates them in
+            the current process and values below 1 use all the cores.
+        liar_strategy: LiarStrategy
+            Constant liar strategy proposing the batches.
+        early_stopping_rounds: int
+            Stop a trial when its validation average precision did not
+            improve for this many iterations, 0 disables early stopping.
+        pruning: PruningStrategy
+            Successive halving trains a bracket of candidates with a small
+            budget and only promotes the best 1 / reduction_factor of them
+            to the next budget, up to the full one. Hyperband cycles
+            through brackets starting at different budgets.
+        reduction_factor: int
+            Budget growth and candidate reduction between two rungs.
+        n_rungs: int
+            Number of budgets, the smallest is 1 / reduction_factor **
+            (n_rungs - 1) of the full one.
+        persist_trials: bool
+            Record the trials in a store under the cache directory, to
+            resume a search on the same data and search space and never
+            evaluate a trial twice.
+    """
 
     n_calls: int = 30
     n_random_starts: int = 5
     random_state: int = 19911127
+    batch_size: int = 1
+    n_jobs: int = 1
+    liar_strategy: LiarStrategy = LiarStrategy.CL_MIN
+    early_stopping_rounds: int = 0
+    pruning: PruningStrategy = PruningStrategy.NONE
+    reduction_factor: int = 3
+    n_rungs: int = 3
+    persist_trials: bool = True
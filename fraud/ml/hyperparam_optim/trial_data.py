@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Data and results of the hyperparameter search trials."""
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Optional,
+)
+
+import pandas as pd
+
+from fraud.ml import metrics
+
+
+@dataclass
+class TrialData:
+    """Data every hpo trial uses, prepared once per training data.
+
+    Attributes:
+        data_hash: str
+            Hash of the training data it was prepared from.
+        train_set: Optional[Any]
+            Training set prepared by the algorithm, see
+            Algorithm.get_train_set.
+        train_features: Optional[pd.DataFrame]
+            Training features, only kept when the algorithm has no train_set.
+        train_target: Optional[pd.DataFrame]
+            Training target, only kept when the algorithm has no train_set.
+        validation_features: pd.DataFrame
+            Transformed and validated validation features.
+        validation_set: Optional[Any]
+            Validation set prepared by the algorithm for early stopping, see
+            Algorithm.get_validation_set.
+        true_values: metrics.TrueValues
+            True values of the validation data.
+    """
+
+    data_hash: str
+    train_set: Optional[Any]
+    train_features: Optional[pd.DataFrame]
+    train_target: Optional[pd.DataFrame]
+    validation_features: pd.DataFrame
+    validation_set: Optional[Any]
+    true_values: metrics.TrueValues
+
+
+@dataclass
+class TrialResult:
+    """Outcome of an hpo trial.
+
+    Attributes:
+        loss: float
+            Objective value, lower is better.
+        budget: Optional[int]
+            Value of the algorithm budget hyperparameter the fitted model
+            actually used, e.g., the best iteration when early stopping.
+            None if the algorithm has no budget hyperparameter.
+    """
+
+    loss: float
+    budget: Optional[int] = None
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""Persistent store of the hpo trials."""
+import contextlib
+import json
+import pathlib
+import sqlite3
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import skopt
+
+from fraud.ml.hyperparam_optim.trial_data import TrialResult
+from fraud.utils.cache import hash_function
+
+
+class TrialStore:
+    """SQLite table of the trials of every study.
+
+    A study is a search over some data and search space, trials are keyed
+    by study, candidate and budget fraction. Every trial is committed as
+    soon as it is evaluated, so a search that died can be resumed from the
+    trials of its study and a candidate already evaluated is never trained
+    again.
+    """
+
+    def __init__(self, file_path: pathlib.Path, study: str):
+        """Open the store, creating its table if needed.
+
+        Args:
+            file_path: pathlib.Path
+                SQLite database file.
+            study: str
+                Study key, see get_study.
+        """
+        self.file_path = file_path
+        self.study = study
+
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS trials ("
+                "study TEXT NOT NULL, "
+                "candidate TEXT NOT NULL, "
+                "budget REAL NOT NULL, "
+                "loss REAL NOT NULL, "
+                "fitted_budget INTEGER, "
+                "PRIMARY KEY (study, candidate, budget))"
+            )
+
+    @staticmethod
+    def get_study(
+        data_hash: str,
+        dimensions: List[skopt.space.Dimension],
+        settings: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Get the key of a study.
+
+        Args:
+            data_hash: str
+                Hash of the training data, see Evaluator.hash_data.
+            dimensions: List[skopt.space.Dimension]
+                Search space.
+            settings: Optional[Dict[str, Any]]
+                Other settings changing the trial results.
+
+        Returns:
+            str:
+                Study key.
+        """
+        return hash_function(
+            (
+                data_hash,
+                tuple(repr(dimension) for dimension in dimensions),
+                tuple(sorted((settings or {}).items())),
+            )
+        )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection committing on success."""
+        connection = sqlite3.connect(self.file_path)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _dump_candidate(candidate: List[Any]) -> str:
+        """Serialize a candidate, numpy scalars as Python ones."""
+        return json.dumps(
+            [
+                value.item() if hasattr(value, "item") else value
+                for value in candidate
+            ]
+        )
+
+    def get(
+        self, candidate: List[Any], budget: float
+    ) -> Optional[TrialResult]:
+        """Get the result of a trial.
+
+        Args:
+            candidate: List[Any]
+                Point of the search space.
+            budget: float
+                Budget fraction.
+
+        Returns:
+            Optional[TrialResult]:
+                Stored result, None if the trial was not evaluated.
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT loss, fitted_budget FROM trials "
+                "WHERE study = ? AND candidate = ? AND budget = ?",
+                (self.study, self._dump_candidate(candidate), budget),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return TrialResult(loss=row[0], budget=row[1])
+
+    def add(
+        self,
+        candidates: List[List[Any]],
+        budgets: List[float],
+        trial_results: List[TrialResult],
+    ) -> None:
+        """Store trial results.
+
+        Args:
+            candidates: List[List[Any]]
+                Points of the search space.
+            budgets: List[float]
+                Budget fraction of every candidate.
+            trial_results: List[TrialResult]
+                Result of every candidate.
+
+        Returns:
+            None
+        """
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO trials "
+                "(study, candidate, budget, loss, fitted_budget) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        self.study,
+                        self._dump_candidate(candidate),
+                        budget,
+                        float(trial_result.loss),
+                        trial_result.budget,
+                    )
+                    for candidate, budget, trial_result in zip(
+                        candidates, budgets, trial_results
+                    )
+                ],
+            )
+
+    def get_history(self) -> List[Tuple[List[Any], TrialResult]]:
+        """Get every candidate of the study with its largest budget result.
+
+        Returns:
+            List[Tuple[List[Any], TrialResult]]:
+                Candidates and results, in evaluation order.
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT candidate, loss, fitted_budget FROM trials "
+                "WHERE study = ? AND budget = ("
+                "SELECT MAX(budget) FROM trials AS other "
+                "WHERE other.study = trials.study "
+                "AND other.candidate = trials.candidate) "
+                "ORDER BY rowid",
+                (self.study,),
+            ).fetchall()
+
+        return [
+            (json.loads(candidate), TrialResult(loss=loss, budget=budget))
+            for candidate, loss, budget in rows
+        ]
+
+    def __len__(self) -> int:
+        """Number of candidates of the study."""
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT COUNT(DISTINCT candidate) FROM trials WHERE study = ?",
+                (self.study,),
+            ).fetchone()[0]
@@ -1,11 +1,20 @@
 """Metrics modules."""
 from fraud.ml.metrics.metric import (
+    MetricContext,
     Results,
     TrueValues,
 )
+from fraud.ml.metrics.metric_accumulator import MetricAccumulator
 from fraud.ml.metrics.metric_factory import (
     MetricFactory,
     MetricType,
 )
 
-__all__ = ["MetricType", "MetricFactory", "Results", "TrueValues"]
+__all__ = [
+    "MetricType",
+    "MetricFactory",
+    "MetricContext",
+    "MetricAccumulator",
+    "Results",
+    "TrueValues",
+]
@@ -10,12 +10,12 @@ from typing import (
     Optional,
 )
 
+import numpy as np
 from sklearn.metrics import average_precision_score
 
 from fraud.ml.metrics.metric import (
     Metric,
-    Results,
-    TrueValues,
+    MetricContext,
 )
 
 
@@ -46,19 +46,17 @@ class AveragePrecisionScore(Metric):
     name: str = "average_precision_score"
     params: Optional[Dict[str, Any]] = None
 
-    def measure(
+    def measure_context(
         self,
-        results: Results,
-        true_values: TrueValues,
+        context: MetricContext,
         plot_results: bool = False,
     ) -> float:
         """Compute Area Under the Receiver Operating Characteristic Curve.
 
         Args:
-            results: Results
-                Estimator predictions.
-            true_values: NDArray
-                True values that we want to predict.
+            context: MetricContext
+                Predictions, true values and their shared intermediate
+                results.
             plot_results: bool
                 If True, model results will be plotted.
 
@@ -66,13 +64,14 @@ class AveragePrecisionScore(Metric):
             float:
                 model performance score.
         """
-        if not self.params:
-            self.params = {}
-
-        score = average_precision_score(
-            y_true=true_values.tx_fraud,
-            y_score=results.scores,
-            **self.params,
-        )
+        if self.params:
+            return average_precision_score(
+                y_true=context.true_values.tx_fraud,
+                y_score=context.results.scores,
+                **self.params,
+            )
+
+        precision, recall, _ = context.precision_recall_curve
+        score = -np.sum(np.diff(recall) * precision[:-1])
 
         return score
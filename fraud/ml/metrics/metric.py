@@ -1,4 +1,5 @@
 """Metric Abstraction."""
+import functools
 from abc import (
     ABC,
     abstractmethod,
@@ -6,12 +7,18 @@ from abc import (
 from dataclasses import dataclass
 from typing import (
     Any,
+    ClassVar,
     Dict,
     Optional,
+    Tuple,
 )
 
+import numpy as np
+import pandas as pd
 from numpy.typing import NDArray
 
+from fraud.domain import kpis
+
 
 @dataclass
 class Results:
@@ -48,14 +55,193 @@ class TrueValues:
     customer_id: NDArray
 
 
+@dataclass
+class BinaryCurve:
+    """True and false positives at every distinct score threshold.
+
+    Parameters
+    ----------
+    tps: NDArray
+        Number of positives scored at or above every threshold.
+    fps: NDArray
+        Number of negatives scored at or above every threshold.
+    thresholds: NDArray
+        Distinct scores, decreasing.
+    """
+
+    tps: NDArray
+    fps: NDArray
+    thresholds: NDArray
+
+
+class MetricContext:
+    """Intermediate results shared by the metrics of one evaluation.
+
+    Everything is computed lazily, on first use, then reused: the scores
+    are sorted once for every threshold based metric, and the daily
+    maxima of the customers are aggregated once for every top-k metric.
+    """
+
+    def __init__(self, results: Results, true_values: TrueValues):
+        """Instantiate the context of an evaluation.
+
+        Args:
+            results: Results
+                Estimator predictions.
+            true_values: TrueValues
+                True values that we want to predict.
+        """
+        self.results = results
+        self.true_values = true_values
+        self._card_precision_top_k: Dict[int, Tuple[float, float]] = {}
+
+    @classmethod
+    def from_aggregates(
+        cls,
+        curve: BinaryCurve,
+        daily_customer_maxima: kpis.DailyCustomerMaxima,
+    ) -> "MetricContext":
+        """Build a context from already aggregated data, with no scores.
+
+        Metrics with custom params need the scores, so they cannot measure
+        such a context.
+
+        Args:
+            curve: BinaryCurve
+                Binary classification curve.
+            daily_customer_maxima: kpis.DailyCustomerMaxima
+                Maximum score and label of every customer of every day.
+
+        Returns:
+            MetricContext
+        """
+        context = cls(results=None, true_values=None)
+        context.curve = curve
+        context.daily_customer_maxima = daily_customer_maxima
+        return context
+
+    @functools.cached_property
+    def labels(self) -> NDArray:
+        """Whether every transaction was fraudulent."""
+        return np.ravel(np.asarray(self.true_values.tx_fraud)) == 1
+
+    @functools.cached_property
+    def curve(self) -> BinaryCurve:
+        """Binary classification curve of the scores.
+
+        It is the curve sklearn computes for its ranking metrics.
+        """
+        scores = np.ravel(np.asarray(self.results.scores))
+        order = np.argsort(scores, kind="mergesort")[::-1]
+        scores = scores[order]
+
+        threshold_positions = np.r_[
+            np.flatnonzero(np.diff(scores)), scores.size - 1
+        ]
+        tps = np.cumsum(self.labels[order], dtype=np.float64)
+        tps = tps[threshold_positions]
+
+        return BinaryCurve(
+            tps=tps,
+            fps=1 + threshold_positions - tps,
+            thresholds=scores[threshold_positions],
+        )
+
+    @property
+    def positive_rate(self) -> float:
+        """Fraction of fraudulent transactions."""
+        tps, fps = self.curve.tps[-1], self.curve.fps[-1]
+        return tps / (tps + fps)
+
+    @functools.cached_property
+    def precision_recall_curve(self) -> Tuple[NDArray, NDArray, NDArray]:
+        """Precision, recall and thresholds, as precision_recall_curve."""
+        tps, fps = self.curve.tps, self.curve.fps
+
+        precision = np.zeros_like(tps)
+        np.divide(tps, tps + fps, out=precision, where=(tps + fps != 0))
+
+        # Without positives, the recall is 1 at every threshold.
+        if tps[-1] == 0:
+            recall = np.ones_like(tps)
+        else:
+            recall = tps / tps[-1]
+
+        return (
+            np.hstack((precision[::-1], 1)),
+            np.hstack((recall[::-1], 0)),
+            self.curve.thresholds[::-1],
+        )
+
+    @functools.cached_property
+    def roc_curve(self) -> Tuple[NDArray, NDArray]:
+        """False and true positive rates, as roc_curve."""
+        tps, fps = self.curve.tps, self.curve.fps
+
+        # Drop the thresholds on a straight line between their neighbours.
+        if len(fps) > 2:
+            is_kept = np.r_[
+                True,
+                np.logical_or(np.diff(fps, 2), np.diff(tps, 2)),
+                True,
+            ]
+            tps, fps = tps[is_kept], fps[is_kept]
+
+        tps = np.r_[0, tps]
+        fps = np.r_[0, fps]
+
+        return fps / fps[-1], tps / tps[-1]
+
+    @functools.cached_property
+    def daily_customer_maxima(self) -> kpis.DailyCustomerMaxima:
+        """Maximum score and label of every customer of every day."""
+        test_data = pd.DataFrame(
+            {
+                "tx_datetime": np.ravel(
+                    np.asarray(self.true_values.tx_datetime)
+                ),
+                "customer_id": np.ravel(
+                    np.asarray(self.true_values.customer_id)
+                ),
+                "tx_fraud": np.ravel(np.asarray(self.true_values.tx_fraud)),
+                "scores": np.ravel(np.asarray(self.results.scores)),
+            }
+        )
+
+        return kpis.get_daily_customer_maxima(test_data=test_data)
+
+    def get_card_precision_top_k(self, top_k: int) -> Tuple[float, float]:
+        """Get the card precision top-k and its perfect value.
+
+        Args:
+            top_k: int
+                Number of transactions that will be checked.
+
+        Returns:
+            Tuple[float, float]:
+                average card precision top-k.
+                perfect average card precision top-k.
+        """
+        if top_k not in self._card_precision_top_k:
+            self._card_precision_top_k[
+                top_k
+            ] = kpis.card_precision_top_k_from_maxima(
+                maxima=self.daily_customer_maxima, top_k=top_k
+            )
+
+        return self._card_precision_top_k[top_k]
+
+
 @dataclass
 class Metric(ABC):
     """ML model mMetric abstraction."""
 
     name: str = ""
     params: Optional[Dict[str, Any]] = None
+    # If True, the metric follows customers over the days, e.g., the cards
+    # already detected, so it needs whole customers histories.
+    is_by_customer: ClassVar[bool] = False
 
-    @abstractmethod
     def measure(
         self,
         results: Results,
@@ -72,6 +258,30 @@ class Metric(ABC):
             plot_results: bool
                 If True, model results will be plotted.
 
+        Returns:
+            float:
+                model performance score.
+        """
+        return self.measure_context(
+            context=MetricContext(results=results, true_values=true_values),
+            plot_results=plot_results,
+        )
+
+    @abstractmethod
+    def measure_context(
+        self,
+        context: MetricContext,
+        plot_results: bool = False,
+    ) -> float:
+        """Measure the model performance from a shared context.
+
+        Args:
+            context: MetricContext
+                Predictions, true values and their shared intermediate
+                results.
+            plot_results: bool
+                If True, model results will be plotted.
+
         Returns:
             float:
                 model performance score.
@@ -0,0 +1,248 @@
+"""Streaming accumulation of the metrics inputs."""
+from typing import (
+    List,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+
+from fraud.domain import kpis
+from fraud.ml.metrics.metric import (
+    BinaryCurve,
+    MetricContext,
+    Results,
+    TrueValues,
+)
+
+_DAY = np.timedelta64(1, "D").astype("timedelta64[ns]").astype(np.int64)
+
+
+class MetricAccumulator:
+    """Metrics inputs accumulated from scored batches.
+
+    Batches are consumed one at a time, so the transactions never need to
+    be in memory all at once, and accumulators updated in different
+    processes can be merged. Only two aggregates are kept:
+
+    - the number of positives and negatives of every score bin, from which
+      a binned binary classification curve is built. Scores within a bin
+      are considered tied, so the threshold metrics are approximations,
+      exact for scores with at most one value per bin. With the default
+      10k bins the average precision error is up to a few 1e-4, 2.5e-4
+      was measured. It grows as more scores share a bin, more bins
+      reduce it.
+    - the maximum score and label of every customer of every day, so the
+      card precision top-k metrics are exact. Its size grows with the
+      number of days and active customers, not with the transactions.
+
+    finalize gives a MetricContext every metric without custom params can
+    measure. Like the sklearn metrics, NaN scores and finalizing without
+    transactions raise a ValueError.
+    """
+
+    def __init__(
+        self,
+        n_bins: int = 10_000,
+        score_range: Tuple[float, float] = (0.0, 1.0),
+        max_pending: int = 16,
+    ):
+        """Instantiate an empty accumulator.
+
+        Args:
+            n_bins: int
+                Number of score bins.
+            score_range: Tuple[float, float]
+                Range the bins cover, scores outside are clipped to it.
+            max_pending: int
+                Number of reduced batches kept before merging them into the
+                daily maxima.
+        """
+        self.n_bins = n_bins
+        self.score_range = score_range
+        self.max_pending = max_pending
+
+        self.positives = np.zeros(n_bins, dtype=np.int64)
+        self.negatives = np.zeros(n_bins, dtype=np.int64)
+        self.min_datetime = np.iinfo(np.int64).max
+        self.max_datetime = np.iinfo(np.int64).min
+
+        # Maximum score and label by day and customer, one frame per
+        # reduced batch.
+        self._daily_maxima: List[pd.DataFrame] = []
+
+    def update(self, results: Results, true_values: TrueValues) -> None:
+        """Accumulate a scored batch.
+
+        Args:
+            results: Results
+                Estimator predictions of the batch.
+            true_values: TrueValues
+                True values of the batch.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError:
+                If a score is NaN, it has no bin. Nothing is accumulated.
+        """
+        scores = np.ravel(np.asarray(results.scores)).astype(np.float64)
+        labels = np.ravel(np.asarray(true_values.tx_fraud)) == 1
+
+        n_nan = np.count_nonzero(np.isnan(scores))
+        if n_nan:
+            raise ValueError(f"The batch has {n_nan} NaN scores")
+
+        bins = self._get_bins(scores=scores)
+        self.positives += np.bincount(bins[labels], minlength=self.n_bins)
+        self.negatives += np.bincount(bins[~labels], minlength=self.n_bins)
+
+        tx_datetime = np.ravel(np.asarray(true_values.tx_datetime))
+        tx_datetime = tx_datetime.astype("datetime64[ns]")
+        is_dated = ~np.isnat(tx_datetime)
+        timestamps = tx_datetime[is_dated].astype(np.int64)
+        if len(timestamps) == 0:
+            return
+
+        self.min_datetime = min(self.min_datetime, timestamps.min())
+        self.max_datetime = max(self.max_datetime, timestamps.max())
+
+        # Day i covers (i days, i + 1 days] since the epoch, as
+        # kpis.card_precision_top_k days start at midnight.
+        batch = pd.DataFrame(
+            {
+                "day": (timestamps - 1) // _DAY,
+                "customer_id": np.ravel(np.asarray(true_values.customer_id))[
+                    is_dated
+                ],
+                "scores": scores[is_dated],
+                "tx_fraud": labels[is_dated],
+            }
+        )
+        self._daily_maxima.append(self._reduce(daily_maxima=[batch]))
+
+        if len(self._daily_maxima) > self.max_pending:
+            self._daily_maxima = [self._reduce(self._daily_maxima)]
+
+    def merge(self, other: "MetricAccumulator") -> "MetricAccumulator":
+        """Add the batches of another accumulator to this one.
+
+        Args:
+            other: MetricAccumulator
+                Accumulator with the same bins.
+
+        Returns:
+            MetricAccumulator:
+                This accumulator.
+        """
+        if (other.n_bins, other.score_range) != (
+            self.n_bins,
+            self.score_range,
+        ):
+            raise ValueError("Only accumulators with the same bins merge")
+
+        self.positives += other.positives
+        self.negatives += other.negatives
+        self.min_datetime = min(self.min_datetime, other.min_datetime)
+        self.max_datetime = max(self.max_datetime, other.max_datetime)
+        self._daily_maxima = [
+            self._reduce(self._daily_maxima + other._daily_maxima)
+        ]
+
+        return self
+
+    def finalize(self) -> MetricContext:
+        """Get the context the metrics measure.
+
+        Returns:
+            MetricContext
+
+        Raises:
+            ValueError:
+                If no transaction was accumulated, the metrics are
+                undefined.
+        """
+        if self.positives.sum() + self.negatives.sum() == 0:
+            raise ValueError("No transaction was accumulated")
+
+        return MetricContext.from_aggregates(
+            curve=self.get_curve(),
+            daily_customer_maxima=self.get_daily_customer_maxima(),
+        )
+
+    def _get_bins(self, scores: np.ndarray) -> np.ndarray:
+        """Get the bin of every score."""
+        lower, upper = self.score_range
+        bins = np.floor((scores - lower) / (upper - lower) * self.n_bins)
+        return np.clip(bins, 0, self.n_bins - 1).astype(np.int64)
+
+    @staticmethod
+    def _reduce(daily_maxima: List[pd.DataFrame]) -> pd.DataFrame:
+        """Reduce frames to one row per day and customer."""
+        return (
+            pd.concat(daily_maxima, ignore_index=True)
+            .groupby(by=["day", "customer_id"], sort=False, as_index=False)
+            .agg(scores=("scores", "max"), tx_fraud=("tx_fraud", "max"))
+        )
+
+    def get_curve(self) -> BinaryCurve:
+        """Get the binned binary classification curve.
+
+        Every non empty bin is a threshold, its lower edge.
+
+        Returns:
+            BinaryCurve
+        """
+        positives = self.positives[::-1]
+        negatives = self.negatives[::-1]
+        is_threshold = (positives + negatives) > 0
+
+        lower, upper = self.score_range
+        edges = lower + np.arange(self.n_bins) * (upper - lower) / self.n_bins
+
+        return BinaryCurve(
+            tps=np.cumsum(positives, dtype=np.float64)[is_threshold],
+            fps=np.cumsum(negatives, dtype=np.float64)[is_threshold],
+            thresholds=edges[::-1][is_threshold],
+        )
+
+    def get_daily_customer_maxima(self) -> kpis.DailyCustomerMaxima:
+        """Get the maximum score and label of every customer of every day.
+
+        Days span from the day of the first transaction to the day of the
+        last one, as in kpis.get_daily_customer_maxima.
+
+        Returns:
+            kpis.DailyCustomerMaxima
+        """
+        if not self._daily_maxima:
+            empty = np.zeros(0, dtype=np.int64)
+            return kpis.DailyCustomerMaxima(
+                day_starts=np.zeros(1, dtype=np.int64),
+                customers=empty,
+                scores=empty.astype(np.float64),
+                labels=empty.astype(bool),
+            )
+
+        daily_maxima = self._reduce(self._daily_maxima)
+
+        start_day = self.min_datetime // _DAY
+        num_days = -(-self.max_datetime // _DAY) - start_day
+
+        days = daily_maxima.day.to_numpy(dtype=np.int64) - start_day
+        customers, _ = pd.factorize(daily_maxima.customer_id, sort=True)
+        is_kept = (days >= 0) & (days < num_days)
+
+        order = np.lexsort((customers[is_kept], days[is_kept]))
+
+        return kpis.DailyCustomerMaxima(
+            day_starts=np.searchsorted(
+                days[is_kept][order], np.arange(num_days + 1)
+            ),
+            customers=customers[is_kept][order],
+            scores=daily_maxima.scores.to_numpy(dtype=np.float64)[is_kept][
+                order
+            ],
+            labels=daily_maxima.tx_fraud.to_numpy()[is_kept][order],
+        )
@@ -1,17 +1,14 @@
 """Perfect cards precision top-k."""
 from typing import (
     Any,
+    ClassVar,
     Dict,
     Optional,
 )
 
-import pandas as pd
-
-from fraud.domain import kpis
 from fraud.ml.metrics.metric import (
     Metric,
-    Results,
-    TrueValues,
+    MetricContext,
 )
 
 
@@ -20,20 +17,19 @@ class PerfCardPrecisionTopK(Metric):
 
     name: str = "Perfect_card_precision_top_k"
     params: Optional[Dict[str, Any]] = {"top_k": 100}
+    is_by_customer: ClassVar[bool] = True
 
-    def measure(
+    def measure_context(
         self,
-        results: Results,
-        true_values: TrueValues,
+        context: MetricContext,
         plot_results: bool = False,
     ) -> float:
         """Compute the perfect card precision top-k.
 
         Args:
-            results: Results
-                Estimator predictions.
-            true_values: NDArray
-                True values that we want to predict.
+            context: MetricContext
+                Predictions, true values and their shared intermediate
+                results.
             plot_results: bool
                 If True, model results will be plotted.
 
@@ -41,19 +37,8 @@ class PerfCardPrecisionTopK(Metric):
             float:
                 model performance score.
         """
-        data = pd.concat(
-            objs=[
-                true_values.tx_datetime,
-                true_values.customer_id,
-                true_values.tx_fraud,
-            ],
-            axis=1,
-        )
-
-        data["scores"] = results.scores
-
-        _, perfect_card_precision_top_k = kpis.card_precision_top_k(
-            test_data=data, top_k=self.params.get("top_k")
+        _, perfect_card_precision_top_k = context.get_card_precision_top_k(
+            top_k=self.params.get("top_k")
         )
 
         return perfect_card_precision_top_k
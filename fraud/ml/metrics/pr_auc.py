@@ -12,8 +12,7 @@ from sklearn.metrics import (
 
 from fraud.ml.metrics.metric import (
     Metric,
-    Results,
-    TrueValues,
+    MetricContext,
 )
 from fraud.utils.plot import plot_combined_precision_recall
 
@@ -24,19 +23,17 @@ class PRAUCScore(Metric):
     name: str = "pr_auc_score"
     params: Optional[Dict[str, Any]] = None
 
-    def measure(
+    def measure_context(
         self,
-        results: Results,
-        true_values: TrueValues,
+        context: MetricContext,
         plot_results: bool = False,
     ) -> float:
         """Compute Area Under the Precision-Recall Curve.
 
         Args:
-            results: Results
-                Estimator predictions.
-            true_values: NDArray
-                True values that we want to predict.
+            context: MetricContext
+                Predictions, true values and their shared intermediate
+                results.
             plot_results: bool
                 If True, model results will be plotted.
 
@@ -44,14 +41,14 @@ class PRAUCScore(Metric):
             float:
                 model performance score.
         """
-        if not self.params:
-            self.params = {}
-
-        precision, recall, thresholds = precision_recall_curve(
-            y_true=true_values.tx_fraud,
-            probas_pred=results.scores,
-            **self.params,
-        )
+        if self.params:
+            precision, recall, thresholds = precision_recall_curve(
+                y_true=context.true_values.tx_fraud,
+                probas_pred=context.results.scores,
+                **self.params,
+            )
+        else:
+            precision, recall, thresholds = context.precision_recall_curve
 
         score = auc(x=recall, y=precision)
 
@@ -62,7 +59,7 @@ class PRAUCScore(Metric):
                     recall=recall,
                     thresholds=thresholds,
                     pr_auc=score,
-                    pr_auc_random=true_values.tx_fraud.mean().values[0],
+                    pr_auc_random=context.positive_rate,
                 )
             except IndexError:
                 pass
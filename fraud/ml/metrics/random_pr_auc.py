@@ -7,8 +7,7 @@ from typing import (
 
 from fraud.ml.metrics.metric import (
     Metric,
-    Results,
-    TrueValues,
+    MetricContext,
 )
 
 
@@ -18,19 +17,17 @@ class RandomPRAUCScore(Metric):
     name: str = "random_pr_auc_score"
     params: Optional[Dict[str, Any]] = None
 
-    def measure(
+    def measure_context(
         self,
-        results: Results,
-        true_values: TrueValues,
+        context: MetricContext,
         plot_results: bool = False,
     ) -> float:
         """Compute PR-AUC for a random classifier.
 
         Args:
-            results: Results
-                Estimator predictions.
-            true_values: NDArray
-                True values that we want to predict.
+            context: MetricContext
+                Predictions, true values and their shared intermediate
+                results.
             plot_results: bool
                 If True, model results will be plotted.
 
@@ -38,7 +35,4 @@ class RandomPRAUCScore(Metric):
             float:
                 model performance score.
         """
-        if not self.params:
-            self.params = {}
-
-        return true_values.tx_fraud.mean().values[0]
+        return context.positive_rate
@@ -5,12 +5,14 @@ from typing import (
     Optional,
 )
 
-from sklearn.metrics import roc_auc_score
+from sklearn.metrics import (
+    auc,
+    roc_auc_score,
+)
 
 from fraud.ml.metrics.metric import (
     Metric,
-    Results,
-    TrueValues,
+    MetricContext,
 )
 
 
@@ -41,19 +43,17 @@ class ROCAUCScore(Metric):
     name: str = "roc_auc_score"
     params: Optional[Dict[str, Any]] = None
 
-    def measure(
+    def measure_context(
         self,
-        results: Results,
-        true_values: TrueValues,
+        context: MetricContext,
         plot_results: bool = False,
     ) -> float:
         """Compute Area Under the Receiver Operating Characteristic Curve.
 
         Args:
-            results: Results
-                Estimator predictions.
-            true_values: NDArray
-                True values that we want to predict.
+            context: MetricContext
+                Predictions, true values and their shared intermediate
+                results.
             plot_results: bool
                 If True, model results will be plotted.
 
@@ -61,13 +61,20 @@ class ROCAUCScore(Metric):
             float:
                 model performance score.
         """
-        if not self.params:
-            self.params = {}
-
-        score = roc_auc_score(
-            y_true=true_values.tx_fraud,
-            y_score=results.scores,
-            **self.params,
-        )
+        if self.params:
+            return roc_auc_score(
+                y_true=context.true_values.tx_fraud,
+                y_score=context.results.scores,
+                **self.params,
+            )
+
+        if context.curve.tps[-1] == 0 or context.curve.fps[-1] == 0:
+            raise ValueError(
+                "Only one class present in y_true. ROC AUC score is not "
+                "defined in that case."
+            )
+
+        false_positive_rate, true_positive_rate = context.roc_curve
+        score = auc(x=false_positive_rate, y=true_positive_rate)
 
         return score
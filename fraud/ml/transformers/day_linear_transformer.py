@@ -1,11 +1,15 @@
 """DayLinearTransformer."""
-from typing import Union
+from typing import (
+    Any,
+    Union,
+)
 
 import pandas as pd
 
 from fraud.domain.feature_transformations.time_enconding import (
     TimeEncoderFunc,
     encode_day_of_week,
+    encode_epoch_ms_day_of_week,
 )
 from fraud.ml.transformers.transformer import FeatureTransformer
 
@@ -13,6 +17,8 @@ from fraud.ml.transformers.transformer import FeatureTransformer
 class DayLinearTransformer(FeatureTransformer):
     """Machine learning algorithm."""
 
+    has_scalar_transformation = True
+
     def fit_transformation(
         self, features: Union[pd.DataFrame, pd.Series]
     ) -> None:
@@ -60,3 +66,18 @@ class DayLinearTransformer(FeatureTransformer):
         return encode_day_of_week(
             tx_datetime=features, encoder_function=TimeEncoderFunc.IDENTITY
         )
+
+    def apply_scalar_transformation(self, value: Any) -> float:
+        """Apply the transformation to a single timestamp.
+
+        Args:
+            value: Any
+                Unix timestamp in milliseconds.
+
+        Returns:
+            float:
+                Transformed value.
+        """
+        return encode_epoch_ms_day_of_week(
+            epoch_ms=value, encoder_function=TimeEncoderFunc.IDENTITY
+        )
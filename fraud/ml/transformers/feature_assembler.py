@@ -0,0 +1,180 @@
+"""Feature assembly of single transactions."""
+import math
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import pandera.dtypes as pa_dtypes
+from numpy.typing import NDArray
+
+from fraud.data_schemas.data_schema import BaseSchema
+from fraud.ml.transformers.transformer_chain import TransformerChain
+
+
+class FeatureAssembler:
+    """Compiled feature layout of the inference path.
+
+    The ordered feature columns, the transformation computing every derived
+    column and the schema dtype casts are resolved once, then every record
+    is written straight into a float64 array the algorithm can score, with
+    no DataFrame, pandas accessor or schema validation in between. The
+    values are the same transformer_chain.transform and
+    validate_and_coerce_schema produce.
+
+    Every thread reuses its own array, grown to the largest batch it
+    assembled, so scoring a batch allocates nothing.
+    """
+
+    def __init__(
+        self,
+        feature_schemas: BaseSchema,
+        transformer_chain: TransformerChain,
+        feature_names: Optional[List[str]] = None,
+    ):
+        """Compile the feature layout.
+
+        Args:
+            feature_schemas: BaseSchema
+                Data schemas that defines feature space.
+            transformer_chain: TransformerChain
+                Feature transformer.
+            feature_names: Optional[List[str]]
+                Column order the algorithm was fitted with, if None the
+                schema order is used.
+
+        Raises:
+            NotImplementedError:
+                If a transformation has no single value implementation.
+        """
+        schema_columns = feature_schemas.to_schema().columns
+        if feature_names is None:
+            feature_names = list(schema_columns.keys())
+        self.feature_names = list(feature_names)
+
+        transformers = {
+            transformed.out_feature_name: transformed
+            for transformed in transformer_chain.transformed_feature_list
+        }
+
+        self._steps: List[
+            Tuple[int, str, Optional[Callable[[Any], float]], bool, bool]
+        ] = []
+        for position, feature_name in enumerate(self.feature_names):
+            column = schema_columns[feature_name]
+
+            in_feature_name, transform = feature_name, None
+            transformed_feature = transformers.get(feature_name)
+            if transformed_feature is not None:
+                transformer = transformed_feature.transformer
+                if not transformer.has_scalar_transformation:
+                    raise NotImplementedError(
+                        f"{type(transformer).__name__} has no single value "
+                        "transformation"
+                    )
+                in_feature_name = transformed_feature.in_feature_name
+                transform = transformer.apply_scalar_transformation
+
+            self._steps.append(
+                (
+                    position,
+                    in_feature_name,
+                    transform,
+                    pa_dtypes.is_int(column.dtype),
+                    column.nullable,
+                )
+            )
+
+        self._buffers = threading.local()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the layout, not the buffers."""
+        state = self.__dict__.copy()
+        del state["_buffers"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the layout with empty buffers."""
+        self.__dict__.update(state)
+        self._buffers = threading.local()
+
+    def get_buffer(self, n_rows: int) -> NDArray:
+        """Get the array of the current thread for a batch.
+
+        The array is only valid until the thread assembles the next batch.
+
+        Args:
+            n_rows: int
+                Number of records of the batch.
+
+        Returns:
+            NDArray:
+                C-contiguous float64 array of shape (n_rows, n_features).
+        """
+        buffer = getattr(self._buffers, "array", None)
+        if buffer is None or len(buffer) < n_rows:
+            buffer = np.empty((n_rows, self.n_features), dtype=np.float64)
+            self._buffers.array = buffer
+
+        return buffer[:n_rows]
+
+    @property
+    def n_features(self) -> int:
+        """Number of feature columns."""
+        return len(self.feature_names)
+
+    def assemble(
+        self,
+        records: Sequence[Mapping[str, Any]],
+        out: Optional[NDArray] = None,
+    ) -> NDArray:
+        """Write the features of the records into a float64 array.
+
+        Args:
+            records: Sequence[Mapping[str, Any]]
+                Raw records, with timestamps as Unix timestamps in
+                milliseconds.
+            out: Optional[NDArray]
+                Preallocated array of shape (len(records), n_features), a new
+                one is allocated if None.
+
+        Returns:
+            NDArray:
+                Array of shape (len(records), n_features), columns in
+                feature_names order.
+
+        Raises:
+            ValueError:
+                If a non nullable feature is missing.
+        """
+        if out is None:
+            out = np.empty((len(records), self.n_features), dtype=np.float64)
+
+        for row, record in enumerate(records):
+            for (
+                position,
+                in_feature_name,
+                transform,
+                is_int,
+                nullable,
+            ) in self._steps:
+                value = record.get(in_feature_name)
+                if value is None or value != value:
+                    if not nullable:
+                        raise ValueError(f"{in_feature_name} is missing")
+                    out[row, position] = math.nan
+                    continue
+
+                if transform is not None:
+                    value = transform(value)
+                out[row, position] = int(value) if is_int else value
+
+        return out
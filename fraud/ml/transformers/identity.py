@@ -1,5 +1,8 @@
 """Identity transformer."""
-from typing import Union
+from typing import (
+    Any,
+    Union,
+)
 
 import pandas as pd
 
@@ -9,6 +12,8 @@ from fraud.ml.transformers.transformer import FeatureTransformer
 class IdentityTransformer(FeatureTransformer):
     """Identity transformer."""
 
+    has_scalar_transformation = True
+
     def fit_transformation(
         self, features: Union[pd.DataFrame, pd.Series]
     ) -> None:
@@ -52,3 +57,16 @@ class IdentityTransformer(FeatureTransformer):
                 Transformed features.
         """
         return features
+
+    def apply_scalar_transformation(self, value: Any) -> float:
+        """Perform identity transformation of a single value.
+
+        Args:
+            value: Any
+                Raw value.
+
+        Returns:
+            float:
+                The same value.
+        """
+        return value
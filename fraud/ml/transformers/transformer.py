@@ -3,7 +3,10 @@ from abc import (
     ABC,
     abstractmethod,
 )
-from typing import Union
+from typing import (
+    Any,
+    Union,
+)
 
 import pandas as pd
 
@@ -11,6 +14,9 @@ import pandas as pd
 class FeatureTransformer(ABC):
     """Machine learning algorithm."""
 
+    # Whether apply_scalar_transformation is implemented.
+    has_scalar_transformation: bool = False
+
     @abstractmethod
     def fit_transformation(
         self, features: Union[pd.DataFrame, pd.Series]
@@ -56,3 +62,19 @@ class FeatureTransformer(ABC):
                 Transformed features.
         """
         raise NotImplementedError
+
+    def apply_scalar_transformation(self, value: Any) -> float:
+        """Apply the transformation to a single raw value.
+
+        Used by the single transaction inference path, it must return the
+        same value apply_transformation would.
+
+        Args:
+            value: Any
+                Raw value, timestamps are Unix timestamps in milliseconds.
+
+        Returns:
+            float:
+                Transformed value.
+        """
+        raise NotImplementedError
@@ -1,4 +1,5 @@
 """Service Contracts."""
+from typing import Optional
 
 from pydantic import (
     BaseModel,
@@ -11,13 +12,27 @@ class PredictionRequest(BaseModel):
 
     tx_datetime: int = Field(..., description="Unix timestamp in milliseconds")
     tx_amount: float = Field(..., description="Transaction amount")
-    customer_id_mean_tx_amount_5_days: float = Field(
-        ...,
-        description="Mean transaction amount for customer in the last 1 day",
+    customer_id: Optional[int] = Field(
+        None,
+        description="Customer id, used to get the customer aggregated "
+        "features from the online feature store",
     )
-    terminal_id_mean_tx_fraud_5_days: float = Field(
-        ...,
-        description="Mean transaction amount for customer in the last 1 day",
+    terminal_id: Optional[int] = Field(
+        None,
+        description="Terminal id, used to get the terminal aggregated "
+        "features from the online feature store",
+    )
+    customer_id_mean_tx_amount_5_days: Optional[float] = Field(
+        None,
+        description="Mean transaction amount for customer in the last 5 "
+        "days. Required, unless the model has a feature store, which "
+        "computes it from customer_id",
+    )
+    terminal_id_mean_tx_fraud_5_days: Optional[float] = Field(
+        None,
+        description="Fraud rate of the terminal in the last 5 days, with a "
+        "7 days delay. Required, unless the model has a feature store, "
+        "which computes it from terminal_id",
     )
 
     class Config:
@@ -42,3 +57,28 @@ class PredictionResponse(BaseModel):
     transaction_to_block: int = Field(
         ..., description="(1 = we block the transaction, 0 = we don't)"
     )
+
+
+class LabelRequest(BaseModel):
+    """Label feedback contract."""
+
+    tx_fraud: int = Field(
+        ...,
+        ge=0,
+        le=1,
+        description="Reviewed label of the transaction (1 = fraud, 0 = "
+        "legitimate)",
+    )
+
+
+class LabelResponse(BaseModel):
+    """Label feedback outcome contract."""
+
+    transaction_id: str = Field(
+        ..., description="Unique Identifier transaction."
+    )
+    is_updated: bool = Field(
+        ...,
+        description="False if the transaction is not recorded in the "
+        "feature store, or no longer within any window",
+    )
@@ -0,0 +1,314 @@
+"""Micro-batching of the real-time prediction requests."""
+import asyncio
+from dataclasses import (
+    asdict,
+    dataclass,
+    field,
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from fraud import utils
+from fraud.ml.estimators.estimator import Estimator
+from fraud.services.contracts import PredictionRequest
+from fraud.services.prediction_service import PredictionService
+
+logger = utils.get_logger()
+
+
+@dataclass
+class PendingPrediction:
+    """Prediction request waiting in the batcher queue."""
+
+    prediction_request: PredictionRequest
+    transaction_id: int
+    future: asyncio.Future
+
+
+@dataclass
+class MicroBatcherMetrics:
+    """Micro-batcher counters.
+
+    Attributes:
+        queue_depth: int
+            Requests waiting to be batched.
+        max_queue_depth: int
+            Largest queue depth observed.
+        n_requests: int
+            Requests predicted.
+        n_batches: int
+            Batches predicted.
+        n_rejected: int
+            Requests rejected because the queue was full.
+        n_failed_batches: int
+            Batches whose prediction raised, their requests are then
+            predicted one by one.
+        n_failed_requests: int
+            Requests whose prediction raised on its own.
+        max_batch_size: int
+            Largest batch predicted.
+        batch_size_counts: Dict[int, int]
+            Number of batches of every size.
+    """
+
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    n_requests: int = 0
+    n_batches: int = 0
+    n_rejected: int = 0
+    n_failed_batches: int = 0
+    n_failed_requests: int = 0
+    max_batch_size: int = 0
+    batch_size_counts: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Mean number of requests per batch."""
+        return self.n_requests / self.n_batches if self.n_batches else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the counters as a dictionary."""
+        return {**asdict(self), "mean_batch_size": self.mean_batch_size}
+
+
+class MicroBatcher:
+    """Coalesce concurrent prediction requests into vectorized predictions.
+
+    Requests are queued and a single worker task takes the first waiting
+    request, then keeps collecting until the batch has max_batch_size
+    requests or max_wait_ms went by. The batch is predicted with one
+    estimator call in the thread pool, so the event loop keeps accepting
+    requests, and every prediction is sent back to its caller. If the
+    batch fails, its requests are predicted one by one, so a malformed or
+    late request only fails its own caller.
+    """
+
+    def __init__(
+        self,
+        get_estimator: Callable[[], Estimator],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2,
+        max_queue_size: int = 0,
+    ):
+        """Instantiate the batcher.
+
+        Args:
+            get_estimator: Callable[[], Estimator]
+                Returns the estimator of every batch, so a reloaded model
+                is picked up by the next batch.
+            max_batch_size: int
+                Maximum number of requests per batch.
+            max_wait_ms: float
+                Maximum time the first request of a batch waits for others,
+                in milliseconds.
+            max_queue_size: int
+                Maximum number of waiting requests, 0 means unbounded.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.get_estimator = get_estimator
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+
+        self.metrics = MicroBatcherMetrics()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the worker task, must be called within the event loop."""
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker task and fail the requests still waiting."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        while self._queue is not None and not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.set_exception(
+                    RuntimeError("The micro-batcher was stopped")
+                )
+        self.metrics.queue_depth = 0
+
+    async def predict(
+        self, prediction_request: PredictionRequest, transaction_id: int
+    ) -> Any:
+        """Queue a request and wait for its prediction.
+
+        Args:
+            prediction_request: PredictionRequest
+                Input contract.
+            transaction_id: int
+                Transaction id.
+
+        Returns:
+            Any:
+                prediction.
+
+        Raises:
+            asyncio.QueueFull:
+                If max_queue_size requests are already waiting.
+        """
+        if self._queue is None:
+            raise RuntimeError("The micro-batcher is not started")
+
+        pending = PendingPrediction(
+            prediction_request=prediction_request,
+            transaction_id=transaction_id,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        try:
+            self._queue.put_nowait(pending)
+        except asyncio.QueueFull:
+            self.metrics.n_rejected += 1
+            raise
+
+        self.metrics.queue_depth = self._queue.qsize()
+        self.metrics.max_queue_depth = max(
+            self.metrics.max_queue_depth, self.metrics.queue_depth
+        )
+
+        return await pending.future
+
+    async def _collect_batch(self) -> List[PendingPrediction]:
+        """Wait for a request and collect the requests that follow it.
+
+        Returns:
+            List[PendingPrediction]:
+                Between 1 and max_batch_size requests, in arrival order.
+        """
+        batch = [await self._queue.get()]
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                )
+            except asyncio.TimeoutError:
+                break
+
+        self.metrics.queue_depth = self._queue.qsize()
+
+        return batch
+
+    def _predict_batch(self, batch: List[PendingPrediction]) -> List[Any]:
+        """Predict a batch with a single estimator call.
+
+        Args:
+            batch: List[PendingPrediction]
+                Requests to predict.
+
+        Returns:
+            List[Any]:
+                prediction of every request.
+        """
+        service = PredictionService(self.get_estimator())
+        predictions = service.make_batch_predictions(
+            prediction_requests=[
+                pending.prediction_request for pending in batch
+            ],
+            transaction_ids=[pending.transaction_id for pending in batch],
+        )
+
+        predictions = np.asarray(predictions).tolist()
+        if len(predictions) != len(batch):
+            raise ValueError(
+                f"Got {len(predictions)} predictions for {len(batch)} "
+                "requests"
+            )
+
+        return predictions
+
+    def _predict_each(
+        self, batch: List[PendingPrediction]
+    ) -> List[Tuple[Any, Optional[Exception]]]:
+        """Predict the requests of a batch one by one.
+
+        Args:
+            batch: List[PendingPrediction]
+                Requests to predict.
+
+        Returns:
+            List[Tuple[Any, Optional[Exception]]]:
+                prediction of every request, or the error it raised.
+        """
+        outcomes = []
+        for pending in batch:
+            try:
+                outcomes.append((self._predict_batch([pending])[0], None))
+            except Exception as e:
+                outcomes.append((None, e))
+
+        return outcomes
+
+    async def _run(self) -> None:
+        """Predict the queued requests batch after batch."""
+        while True:
+            batch = await self._collect_batch()
+            # Requests whose caller went away are not predicted.
+            batch = [pending for pending in batch if not pending.future.done()]
+            if not batch:
+                continue
+
+            try:
+                predictions = await run_in_threadpool(
+                    self._predict_batch, batch
+                )
+                outcomes = [(prediction, None) for prediction in predictions]
+            except Exception as e:
+                logger.error(f"Failed to predict a batch: {e}")
+                self.metrics.n_failed_batches += 1
+                if len(batch) == 1:
+                    outcomes = [(None, e)]
+                else:
+                    outcomes = await run_in_threadpool(
+                        self._predict_each, batch
+                    )
+
+            for pending, (prediction, error) in zip(batch, outcomes):
+                if error is not None:
+                    self.metrics.n_failed_requests += 1
+                if pending.future.done():
+                    continue
+                if error is None:
+                    pending.future.set_result(prediction)
+                else:
+                    pending.future.set_exception(error)
+
+            batch_size = len(batch)
+            self.metrics.n_requests += batch_size
+            self.metrics.n_batches += 1
+            self.metrics.max_batch_size = max(
+                self.metrics.max_batch_size, batch_size
+            )
+            self.metrics.batch_size_counts[batch_size] = (
+                self.metrics.batch_size_counts.get(batch_size, 0) + 1
+            )
@@ -5,8 +5,14 @@ Created on: 4/10/23
 @author: Heber Trujillo <heber.trj.urt@gmail.com>
 Licence,
 """
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+
 import pandas as pd
-from fastapi.encoders import jsonable_encoder
+from numpy.typing import NDArray
 
 from fraud import utils
 from fraud.ml.estimators.estimator import Estimator
@@ -14,6 +20,63 @@ from fraud.services.contracts import PredictionRequest
 
 logger = utils.get_logger()
 
+# Request fields that are aggregated features, the feature store, if any,
+# computes the missing ones.
+AGGREGATED_FEATURE_FIELDS = [
+    "customer_id_mean_tx_amount_5_days",
+    "terminal_id_mean_tx_fraud_5_days",
+]
+
+
+class MissingFieldsError(ValueError):
+    """A request misses fields the served model needs."""
+
+
+def get_missing_fields(
+    record: Dict[str, Any], estimator: Estimator
+) -> List[str]:
+    """Get the fields a transaction record misses to be predicted.
+
+    The aggregated features are required unless the estimator has a
+    feature store, which then requires the grouping column, e.g.,
+    customer_id, of every aggregated feature the record does not have.
+
+    Args:
+        record: Dict[str, Any]
+            Transaction record.
+        estimator: Estimator
+            Serving estimator.
+
+    Returns:
+        List[str]:
+            Names of the missing fields, empty if the record is complete.
+    """
+
+    def is_missing(field: str) -> bool:
+        """Whether the record has no value for a field."""
+        value = record.get(field)
+        return value is None or bool(pd.isna(value))
+
+    missing_fields = [
+        name
+        for name, field in PredictionRequest.model_fields.items()
+        if field.is_required() and is_missing(name)
+    ]
+
+    feature_store = estimator.feature_store
+    grouping_columns = (
+        {} if feature_store is None else feature_store.get_grouping_columns()
+    )
+    for field in AGGREGATED_FEATURE_FIELDS:
+        if not is_missing(field):
+            continue
+
+        required_field = grouping_columns.get(field, field)
+        if is_missing(required_field) and required_field not in missing_fields:
+            missing_fields.append(required_field)
+
+    return missing_fields
+
 
 class PredictionService:
     """Prediction Service Class."""
@@ -36,10 +99,64 @@ class PredictionService:
                 prediction.
         """
         logger.info(f"features: {prediction_request}")
-        data = pd.DataFrame(
-            jsonable_encoder(prediction_request), index=[transaction_id]
+        results = self.estimator.predict_records(
+            records=[prediction_request.model_dump()],
+            transaction_ids=[transaction_id],
         )
+        return results.predictions
 
-        data.tx_datetime = pd.to_datetime(data.tx_datetime, unit="ms")
-        results = self.estimator.predict(data=data)
+    def make_batch_predictions(
+        self,
+        prediction_requests: List[PredictionRequest],
+        transaction_ids: List[int],
+    ) -> NDArray:
+        """Generate the predictions of several requests in a single call.
+
+        Args:
+            prediction_requests: List[PredictionRequest]
+                Input contracts, in arrival order.
+            transaction_ids: List[int]
+                Transaction id of every request.
+
+        Returns:
+            NDArray
+                prediction of every request.
+        """
+        results = self.estimator.predict_records(
+            records=[
+                prediction_request.model_dump()
+                for prediction_request in prediction_requests
+            ],
+            transaction_ids=transaction_ids,
+        )
         return results.predictions
+
+    def update_labels(
+        self, transaction_ids: List[int], labels: List[float]
+    ) -> List[bool]:
+        """Feed reviewed labels back into the feature store.
+
+        Args:
+            transaction_ids: List[int]
+                Transaction ids, as they were predicted.
+            labels: List[float]
+                Label of every transaction.
+
+        Returns:
+            List[bool]
+                Whether the label of every transaction changed a window.
+
+        Raises:
+            ValueError:
+                If the estimator has no feature store.
+        """
+        feature_store = self.estimator.feature_store
+        if feature_store is None:
+            raise ValueError("The model has no feature store to label")
+
+        return [
+            feature_store.update_label(
+                transaction_id=transaction_id, tx_fraud=label
+            )
+            for transaction_id, label in zip(transaction_ids, labels)
+        ]
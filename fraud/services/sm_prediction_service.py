@@ -1,16 +1,77 @@
 """This is the file that implements a flask server to do inferences."""
 from __future__ import print_function
 
+import csv
+import io
+import json
+from typing import (
+    Any,
+    Iterator,
+    List,
+)
+
 import flask
 import pandas as pd
 from numpy.typing import NDArray
 
 from fraud import utils
 from fraud.config import settings
+from fraud.domain.feature_transformations import LateTransactionError
 from fraud.entrypoints.assets import Assets
+from fraud.services.contracts import PredictionRequest
+from fraud.services.prediction_service import (
+    MissingFieldsError,
+    PredictionService,
+    get_missing_fields,
+)
 
 logger = utils.get_logger()
 
+JSON_CONTENT_TYPE = "application/json"
+JSON_LINES_CONTENT_TYPES = [
+    "application/jsonlines",
+    "application/x-jsonlines",
+    "application/jsonl",
+]
+CSV_CONTENT_TYPE = "text/csv"
+SUPPORTED_CONTENT_TYPES = (
+    [JSON_CONTENT_TYPE] + JSON_LINES_CONTENT_TYPES + [CSV_CONTENT_TYPE]
+)
+
+# Number of predictions per chunk of the streamed responses.
+RESPONSE_CHUNK_SIZE = 1024
+
+# Columns of the CSV bodies without header, in order, as batch transform
+# splits them. They are the original request fields, the customer and
+# terminal ids and the transaction id can only be sent with a header.
+HEADERLESS_CSV_COLUMNS = [
+    "tx_datetime",
+    "tx_amount",
+    "customer_id_mean_tx_amount_5_days",
+    "terminal_id_mean_tx_fraud_5_days",
+]
+CSV_COLUMNS = list(PredictionRequest.model_fields) + ["transaction_id"]
+REQUIRED_COLUMNS = [
+    name
+    for name, field in PredictionRequest.model_fields.items()
+    if field.is_required()
+]
+
+# SageMaker only forwards /invocations, a request whose custom attributes
+# include LABELS_ATTRIBUTE feeds reviewed labels back instead of predicting.
+CUSTOM_ATTRIBUTES_HEADER = "X-Amzn-SageMaker-Custom-Attributes"
+LABELS_ATTRIBUTE = "labels"
+LABEL_COLUMNS = ["transaction_id", "tx_fraud"]
+
+
+class MissingTransactionIdError(ValueError):
+    """A request without transaction ids reached a model with a store.
+
+    The feature store only records the transactions with an id, the others
+    would be scored with the features of the recorded ones only, which go
+    stale.
+    """
+
 
 class ScoringService(object):
     """This class implements a flask server to do inferences."""
@@ -29,15 +90,60 @@ class ScoringService(object):
         """For the input, do the predictions and return them.
 
         Args:
-            input: The data on which to do the predictions.
+            input: The data on which to do the predictions. Rows with a
+                transaction_id column are recorded in the feature store,
+                once per transaction id.
 
         Returns:
             NDArray: predictions.
+
+        Raises:
+            MissingFieldsError: If a row misses a field the model needs,
+                see get_missing_fields.
+            MissingTransactionIdError: If the model has a feature store and
+                a row has no transaction_id.
         """
         clf = cls.get_model()
+
+        for record in input.to_dict(orient="records"):
+            missing_fields = get_missing_fields(record=record, estimator=clf)
+            if missing_fields:
+                raise MissingFieldsError(f"Missing fields {missing_fields}")
+
+        transaction_ids = None
+        if "transaction_id" in input.columns:
+            transaction_ids = input.pop("transaction_id")
+
+        if clf.feature_store is not None:
+            if transaction_ids is None or transaction_ids.isna().any():
+                raise MissingTransactionIdError(
+                    "The model computes the aggregated features online, "
+                    "every transaction needs a transaction_id to record it"
+                )
+            transaction_ids = transaction_ids.tolist()
+            input = clf.feature_store.fill_features(
+                data=input, transaction_ids=transaction_ids
+            )
         results = clf.predict(data=input)
         return results.predictions
 
+    @classmethod
+    def update_labels(cls, labels: pd.DataFrame) -> List[bool]:
+        """Feed reviewed labels back into the feature store.
+
+        Args:
+            labels: The transaction_id and tx_fraud of every reviewed
+                transaction.
+
+        Returns:
+            List[bool]: Whether every label changed the feature store.
+        """
+        service = PredictionService(cls.get_model())
+        return service.update_labels(
+            transaction_ids=labels.transaction_id.tolist(),
+            labels=labels.tx_fraud.tolist(),
+        )
+
 
 # The flask app for serving predictions
 app = flask.Flask(__name__)
@@ -57,17 +163,366 @@ def ping():
     )
 
 
+def parse_request(body: str, content_type: str) -> pd.DataFrame:
+    """Parse a request body into a data frame of transactions.
+
+    Args:
+        body: str
+            Request body, a JSON object or array, JSON Lines, or CSV. CSV
+            bodies may come without header, as batch transform splits them,
+            then they have the HEADERLESS_CSV_COLUMNS, in order. A first
+            line with a non numeric field is a header, of CSV_COLUMNS.
+        content_type: str
+            Request MIME type, one of SUPPORTED_CONTENT_TYPES.
+
+    Returns:
+        pd.DataFrame:
+            One row per transaction, in the request order.
+
+    Raises:
+        ValueError:
+            If the body can not be parsed, a JSON transaction is not an
+            object, a REQUIRED_COLUMNS column is missing or null, a field is
+            not a number, or a CSV body has unknown columns or a wrong
+            number of columns.
+    """
+    if content_type == JSON_CONTENT_TYPE:
+        records = json.loads(body)
+        if isinstance(records, dict):
+            records = [records]
+        data = parse_records(records=records)
+    elif content_type in JSON_LINES_CONTENT_TYPES:
+        records = [json.loads(line) for line in body.splitlines() if line]
+        data = parse_records(records=records)
+    else:
+        data = parse_csv(body=body)
+
+    if data.empty:
+        return data
+
+    missing_columns = [
+        column for column in REQUIRED_COLUMNS if column not in data.columns
+    ]
+    if missing_columns:
+        raise ValueError(f"Missing required columns {missing_columns}")
+
+    # Every request field is a number, tx_datetime a Unix timestamp.
+    for column in data.columns.intersection(CSV_COLUMNS):
+        try:
+            data[column] = pd.to_numeric(data[column], errors="raise")
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"{column} must be a number: {error}")
+
+    null_columns = [
+        column for column in REQUIRED_COLUMNS if data[column].isna().any()
+    ]
+    if null_columns:
+        raise ValueError(f"Null values in required columns {null_columns}")
+
+    return data
+
+
+def parse_records(records: Any) -> pd.DataFrame:
+    """Parse the decoded JSON transactions.
+
+    Args:
+        records: Any
+            Decoded JSON, a list of objects.
+
+    Returns:
+        pd.DataFrame:
+            One row per transaction, in the request order.
+
+    Raises:
+        ValueError:
+            If records is not a list of objects.
+    """
+    if not isinstance(records, list) or not all(
+        isinstance(record, dict) for record in records
+    ):
+        raise ValueError("Every transaction must be a JSON object")
+
+    return pd.DataFrame(data=records)
+
+
+def parse_labels(body: str, content_type: str) -> pd.DataFrame:
+    """Parse a label feedback body into a data frame of labels.
+
+    Args:
+        body: str
+            Request body, a JSON object or array, JSON Lines, or CSV with a
+            header, of LABEL_COLUMNS.
+        content_type: str
+            Request MIME type, one of SUPPORTED_CONTENT_TYPES.
+
+    Returns:
+        pd.DataFrame:
+            One row per reviewed transaction, with integer ids and labels.
+
+    Raises:
+        ValueError:
+            If the body can not be parsed, a column of LABEL_COLUMNS is
+            missing, or a value is not an integer or a label not 0 or 1.
+    """
+    if content_type == JSON_CONTENT_TYPE:
+        records = json.loads(body)
+        if isinstance(records, dict):
+            records = [records]
+        data = parse_records(records=records)
+    elif content_type in JSON_LINES_CONTENT_TYPES:
+        records = [json.loads(line) for line in body.splitlines() if line]
+        data = parse_records(records=records)
+    else:
+        data = pd.read_csv(
+            io.StringIO(body),
+            header=0,
+            index_col=False,
+            skipinitialspace=True,
+        )
+
+    missing_columns = [
+        column for column in LABEL_COLUMNS if column not in data.columns
+    ]
+    if data.empty:
+        return data
+    if missing_columns:
+        raise ValueError(f"Missing required columns {missing_columns}")
+
+    data = data[LABEL_COLUMNS].copy()
+    for column in LABEL_COLUMNS:
+        values = pd.to_numeric(data[column], errors="raise")
+        if values.isna().any() or (values % 1 != 0).any():
+            raise ValueError(f"{column} must be an integer")
+        data[column] = values.astype("int64")
+
+    if not data.tx_fraud.isin([0, 1]).all():
+        raise ValueError("tx_fraud must be 0 or 1")
+
+    return data
+
+
+def parse_csv(body: str) -> pd.DataFrame:
+    """Parse a CSV request body, with or without header.
+
+    Args:
+        body: str
+            CSV body, see parse_request.
+
+    Returns:
+        pd.DataFrame:
+            One row per transaction, in the request order.
+
+    Raises:
+        ValueError:
+            If the header has unknown columns, or a line has a different
+            number of columns than the header or HEADERLESS_CSV_COLUMNS.
+    """
+    rows = [row for row in csv.reader(io.StringIO(body.lstrip())) if row]
+    first_line = rows[0] if rows else []
+    has_header = not all(is_number(value=field) for field in first_line)
+
+    n_columns = len(first_line) if has_header else len(HEADERLESS_CSV_COLUMNS)
+    for line, row in enumerate(rows, start=1):
+        if len(row) != n_columns:
+            raise ValueError(
+                f"CSV line {line} has {len(row)} columns, expected "
+                f"{n_columns}"
+                + ("" if has_header else f", {HEADERLESS_CSV_COLUMNS}")
+            )
+
+    if has_header:
+        unknown_columns = [
+            column
+            for column in first_line
+            if column.strip() not in CSV_COLUMNS
+        ]
+        if unknown_columns:
+            raise ValueError(
+                f"Unknown CSV columns {unknown_columns}, expected some of "
+                f"{CSV_COLUMNS}"
+            )
+        return pd.read_csv(
+            io.StringIO(body),
+            header=0,
+            index_col=False,
+            skipinitialspace=True,
+        )
+
+    return pd.read_csv(
+        io.StringIO(body),
+        header=None,
+        names=HEADERLESS_CSV_COLUMNS,
+        index_col=False,
+        skipinitialspace=True,
+    )
+
+
+def is_number(value: str) -> bool:
+    """Whether a CSV field is a number, empty fields count as missing ones.
+
+    Args:
+        value: str
+            CSV field.
+
+    Returns:
+        bool
+    """
+    if not value.strip():
+        return True
+
+    try:
+        float(value)
+    except ValueError:
+        return False
+
+    return True
+
+
+def format_predictions(predictions: List, content_type: str) -> Iterator[str]:
+    """Serialize the predictions in chunks, in the request order.
+
+    Args:
+        predictions: List
+            Predictions, one per transaction.
+        content_type: str
+            Request MIME type, the response uses the same format.
+
+    Returns:
+        Iterator[str]:
+            Response body chunks.
+    """
+    if content_type == JSON_CONTENT_TYPE:
+        yield json.dumps(predictions)
+        return
+
+    if content_type in JSON_LINES_CONTENT_TYPES:
+        lines = [json.dumps(prediction) for prediction in predictions]
+    else:
+        lines = [str(prediction) for prediction in predictions]
+
+    for start in range(0, len(lines), RESPONSE_CHUNK_SIZE):
+        end = start + RESPONSE_CHUNK_SIZE
+        yield "".join(line + "\n" for line in lines[start:end])
+
+
 @app.route("/invocations", methods=["POST"])
 def transformation():
-    """Do an inference on a single batch of data."""
+    """Do an inference on a batch of data.
+
+    Accepts a JSON object or array, JSON Lines or CSV, every transaction is
+    scored in a single call and the predictions are returned in the same
+    format and order. With the LABELS_ATTRIBUTE custom attribute, the body
+    holds reviewed labels instead, which are fed back into the feature
+    store.
+    """
+    content_type = flask.request.mimetype
     logger.info(f"Request content type {flask.request.content_type}")
-    prediction_request = flask.request.get_json()
-    data = pd.DataFrame(data=[prediction_request], index=[0])
-    data.tx_datetime = pd.to_datetime(data.tx_datetime, unit="ms")
+
+    if content_type not in SUPPORTED_CONTENT_TYPES:
+        return flask.Response(
+            response=f"Unsupported content type {content_type}",
+            status=415,
+            mimetype="text/plain",
+        )
+
+    custom_attributes = flask.request.headers.get(CUSTOM_ATTRIBUTES_HEADER, "")
+    if LABELS_ATTRIBUTE in [
+        attribute.strip() for attribute in custom_attributes.split(",")
+    ]:
+        return feed_back_labels(content_type=content_type)
+
+    try:
+        data = parse_request(
+            body=flask.request.get_data(as_text=True),
+            content_type=content_type,
+        )
+        if not data.empty:
+            data.tx_datetime = pd.to_datetime(data.tx_datetime, unit="ms")
+    except (TypeError, ValueError) as error:
+        return flask.Response(
+            response=f"Malformed request: {error}",
+            status=400,
+            mimetype="text/plain",
+        )
+
+    if data.empty:
+        return flask.Response(
+            response="Empty request", status=400, mimetype="text/plain"
+        )
+
     # Do the prediction
-    predictions = ScoringService.predict(data)
+    try:
+        predictions = ScoringService.predict(data)
+    except LateTransactionError as error:
+        return flask.Response(
+            response=f"Late transaction: {error}",
+            status=422,
+            mimetype="text/plain",
+        )
+    except (MissingFieldsError, MissingTransactionIdError) as error:
+        logger.error(f"Incomplete request: {error}")
+        return flask.Response(
+            response=f"Malformed request: {error}",
+            status=400,
+            mimetype="text/plain",
+        )
     predictions_list = predictions.tolist()
-    # Create a JSON response and set the status code
-    response = flask.jsonify(predictions_list)
-    response.status_code = 200
-    return response
+
+    return flask.Response(
+        response=flask.stream_with_context(
+            format_predictions(
+                predictions=predictions_list, content_type=content_type
+            )
+        ),
+        status=200,
+        mimetype=content_type,
+    )
+
+
+def feed_back_labels(content_type: str) -> flask.Response:
+    """Feed the reviewed labels of the request back into the feature store.
+
+    Args:
+        content_type: str
+            Request MIME type, the response uses the same format.
+
+    Returns:
+        flask.Response:
+            Whether every label changed the feature store, in the request
+            order.
+    """
+    try:
+        labels = parse_labels(
+            body=flask.request.get_data(as_text=True),
+            content_type=content_type,
+        )
+    except (TypeError, ValueError) as error:
+        return flask.Response(
+            response=f"Malformed request: {error}",
+            status=400,
+            mimetype="text/plain",
+        )
+
+    if labels.empty:
+        return flask.Response(
+            response="Empty request", status=400, mimetype="text/plain"
+        )
+
+    try:
+        is_updated = ScoringService.update_labels(labels=labels)
+    except ValueError as error:
+        return flask.Response(
+            response=f"Labels not accepted: {error}",
+            status=404,
+            mimetype="text/plain",
+        )
+
+    return flask.Response(
+        response=flask.stream_with_context(
+            format_predictions(
+                predictions=is_updated, content_type=content_type
+            )
+        ),
+        status=200,
+        mimetype=content_type,
+    )
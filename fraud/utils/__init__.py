@@ -7,25 +7,35 @@ from fraud.utils.aws import (
 )
 from fraud.utils.cache import (
     cacher,
+    get_cache_stats,
     make_obj_hash,
 )
 from fraud.utils.io import (
     dump_artifacts,
+    dump_frame_columns,
+    is_columnar_frame,
     load_artifacts,
+    load_frame_columns,
 )
 from fraud.utils.logging import (
     get_logger,
     log_model_results,
 )
+from fraud.utils.shared_frame import SharedFrame
 from fraud.utils.time import timer
 
 __all__ = [
     "cacher",
+    "get_cache_stats",
     "timer",
     "get_logger",
     "make_obj_hash",
     "dump_artifacts",
     "load_artifacts",
+    "dump_frame_columns",
+    "load_frame_columns",
+    "is_columnar_frame",
+    "SharedFrame",
     "log_model_results",
     "create_model_group",
     "create_sagemaker_model",
@@ -1,82 +1,219 @@
 """Caching module."""
+import enum
 import functools
 import hashlib
 import inspect
+import time
 import types
-from inspect import getsource
-from typing import Callable
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import joblib
 import numpy as np
 import pandas as pd
 
 from fraud import config
-from fraud.utils.io import (
-    dump_artifacts,
-    load_artifacts,
+from fraud.utils.cache_store import CacheStore
+from fraud.utils.memory_cache import (
+    MISSING,
+    MemoryCache,
 )
 
 
-def cacher(func: Callable) -> Callable:
+@functools.lru_cache(maxsize=None)
+def get_cache_store() -> CacheStore:
+    """Get the store of the cacher results, under the cache directory."""
+    return CacheStore(
+        path=config.settings.CACH_PATH / "cacher",
+        max_bytes=config.settings.CACHE_MAX_BYTES,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_memory_cache() -> MemoryCache:
+    """Get the in-process tier of the cacher results."""
+    return MemoryCache(max_bytes=config.settings.MEMORY_CACHE_MAX_BYTES)
+
+
+@dataclass
+class CacheStats:
+    """Counters of a cached function.
+
+    Attributes:
+        memory_hits: int
+            Calls served by the in-process tier.
+        disk_hits: int
+            Calls served by the disk store.
+        misses: int
+            Calls computing the result.
+        load_seconds: float
+            Time spent serving the hits.
+        compute_seconds: float
+            Time spent computing and storing the results of the misses.
+    """
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    load_seconds: float = 0.0
+    compute_seconds: float = 0.0
+
+
+# Counters of every cached function, by function name.
+_cache_stats: Dict[str, CacheStats] = {}
+
+
+def get_cache_stats() -> Dict[str, CacheStats]:
+    """Get the counters of the cached functions of this process.
+
+    Returns:
+        Dict[str, CacheStats]:
+            Counters by function name.
+    """
+    return dict(_cache_stats)
+
+
+def cacher(
+    func: Optional[Callable] = None, *, ignore: Sequence[str] = ()
+) -> Callable:
     """Cache function / method result.
 
+    Results are keyed by the function code and the exact hash of its
+    arguments, defaults included. They are looked up in the in-process tier
+    first, then in the disk store, and any result, None or empty ones
+    included, is cached. Concurrent misses on the same result, across
+    processes, compute it once. The decorated function also gets a
+    load_columns(columns, *args, **kwargs) attribute, loading only some
+    columns of a data frame result.
+
+    Used as @cacher, or as @cacher(ignore=[...]) to leave out of the key
+    the arguments the result does not depend on, e.g., n_jobs.
+
     Args:
-        func: Callable
+        func: Optional[Callable]
             Function that we want to cache
+        ignore: Sequence[str]
+            Names of the arguments left out of the key, positional or not.
 
     Returns:
         Callable:
-            Decorated function.
+            Decorated function, or the decorator if func is None.
     """
+    if func is None:
+        return functools.partial(cacher, ignore=ignore)
 
-    @functools.wraps(func)
-    def cacher_wrapper(*args, **kwargs) -> object:
-        """Cache strategy.
+    func_hash = make_obj_hash(func)
+    stats = _cache_stats.setdefault(func.__name__, CacheStats())
+    signature = inspect.signature(func)
 
-        Args:
-            *args: func args
-            **kwargs: func kwargs
+    def get_key_arguments(
+        args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> Tuple[Tuple[Any, ...], Dict[str, Any]]:
+        """Get the arguments the key depends on.
 
-        Returns:
-            object:
-                Function result.
+        Arguments are bound by name, with their defaults, so the same call
+        gets the same key whether an argument is passed positionally, by
+        keyword or left to its default.
         """
-        args_hash = make_obj_hash(args)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return (), {
+            name: value
+            for name, value in bound.arguments.items()
+            if name not in ignore
+        }
+
+    def load(columns: Optional[List[str]], *args, **kwargs) -> object:
+        """Load the result from the cache, computing it on a miss."""
+        start = time.perf_counter()
 
-        kwargs_hash = make_obj_hash(kwargs)
+        key_args, key_kwargs = get_key_arguments(args=args, kwargs=kwargs)
 
-        func_hash = make_obj_hash(func.__name__)
+        args_hash = make_obj_hash(key_args)
+
+        kwargs_hash = make_obj_hash(key_kwargs)
 
         hash_rep = hash_function(args_hash + kwargs_hash + func_hash)
 
-        file_path = config.settings.CACH_PATH
-        file_name = func.__name__ + "_" + hash_rep + ".pickle"
+        memory_cache = get_memory_cache()
+        cache_store = get_cache_store()
+        key = func.__name__ + "_" + hash_rep
+
+        result = memory_cache.get(key=key)
+        if result is not MISSING:
+            stats.memory_hits += 1
+            stats.load_seconds += time.perf_counter() - start
+            return _project(obj=result, columns=columns)
 
         try:
 
-            result = load_artifacts(file_path=file_path / file_name)
+            result = cache_store.load(key=key, columns=columns)
+
+        except KeyError:
 
-        except FileNotFoundError:
+            # Single flight: the first process, or thread, missing the key
+            # computes it while the others wait, then load its result.
+            with cache_store.lock(key=key):
+                try:
 
-            result = func(*args, **kwargs)
+                    result = cache_store.load(key=key, columns=columns)
 
-            dump_artifacts(
-                obj=result, file_path=file_path, file_name=file_name
-            )
+                except KeyError:
 
-        if not result:
+                    result = func(*args, **kwargs)
 
-            result = func(*args, **kwargs)
+                    cache_store.dump(key=key, obj=result)
+                    memory_cache.set(key=key, obj=result)
 
-            dump_artifacts(
-                obj=result, file_path=file_path, file_name=file_name
-            )
+                    stats.misses += 1
+                    stats.compute_seconds += time.perf_counter() - start
+                    return _project(obj=result, columns=columns)
+
+        # A projected result is not the whole result.
+        if columns is None:
+            memory_cache.set(key=key, obj=result)
 
+        stats.disk_hits += 1
+        stats.load_seconds += time.perf_counter() - start
         return result
 
+    @functools.wraps(func)
+    def cacher_wrapper(*args, **kwargs) -> object:
+        """Cache strategy.
+
+        Args:
+            *args: func args
+            **kwargs: func kwargs
+
+        Returns:
+            object:
+                Function result.
+        """
+        return load(None, *args, **kwargs)
+
+    cacher_wrapper.load_columns = load
+    cacher_wrapper.cache_stats = stats
+
     return cacher_wrapper
 
 
+def _project(obj: object, columns: Optional[List[str]]) -> object:
+    """Select columns of a data frame, other objects as they are."""
+    if columns is not None and isinstance(obj, pd.DataFrame):
+        return obj[columns]
+
+    return obj
+
+
 def hash_function(obj: object) -> str:
     """Get the hash representation of a python object.
 
@@ -95,31 +232,137 @@ def hash_function(obj: object) -> str:
     return hash_value
 
 
-def make_obj_hash(
-    obj: object, mode: str = "fast", is_training: bool = False
-) -> str:
+def _update_with_array(hasher: "hashlib._Hash", array: np.ndarray) -> None:
+    """Feed the dtype, shape and values of an array to a hasher.
+
+    Arrays of numbers, booleans and datetimes are hashed through their
+    memory, object arrays through the pandas hash of every value.
+    """
+    hasher.update(f"{array.dtype.str}{array.shape}".encode())
+    if array.dtype.hasobject:
+        array = pd.util.hash_array(np.asarray(array).ravel())
+
+    hasher.update(np.ascontiguousarray(array).reshape(-1).view(np.uint8))
+
+
+def _update_with_pandas_values(
+    hasher: "hashlib._Hash", values: Union[pd.Index, pd.Series]
+) -> None:
+    """Feed the values of an index or a series to a hasher."""
+    if isinstance(values.dtype, np.dtype) and not values.dtype.hasobject:
+        _update_with_array(hasher=hasher, array=values.to_numpy())
+    else:
+        # Extension and object dtypes.
+        hasher.update(str(values.dtype).encode())
+        _update_with_array(
+            hasher=hasher,
+            array=pd.util.hash_pandas_object(values, index=False).to_numpy(),
+        )
+
+
+def hash_pandas(data: Union[pd.DataFrame, pd.Series]) -> str:
+    """Get the exact hash of a data frame or a series.
+
+    Column names, dtypes, index and every value are hashed, with blake2b
+    over the column buffers, so equal data always gets the same hash and
+    any difference changes it.
+
+    Args:
+        data: Union[pd.DataFrame, pd.Series]
+            Data to hash.
+
+    Returns:
+        str:
+            Hexadecimal hash.
+    """
+    hasher = hashlib.blake2b(digest_size=32)
+    hasher.update(type(data).__name__.encode())
+
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+
+    hasher.update(repr((list(data.columns), data.index.names)).encode())
+
+    if isinstance(data.index, pd.RangeIndex):
+        index = data.index
+        hasher.update(repr((index.start, index.stop, index.step)).encode())
+    else:
+        _update_with_pandas_values(hasher=hasher, values=data.index)
+
+    for _, column in data.items():
+        _update_with_pandas_values(hasher=hasher, values=column)
+
+    return hasher.hexdigest()
+
+
+def hash_array(array: np.ndarray) -> str:
+    """Get the exact hash of an array.
+
+    Args:
+        array: np.ndarray
+            Array to hash.
+
+    Returns:
+        str:
+            Hexadecimal hash.
+    """
+    hasher = hashlib.blake2b(digest_size=32)
+    _update_with_array(hasher=hasher, array=array)
+    return hasher.hexdigest()
+
+
+def hash_code(code: types.CodeType) -> str:
+    """Get the hash of compiled code, nested functions included.
+
+    Args:
+        code: types.CodeType
+            Code object.
+
+    Returns:
+        str:
+            Hexadecimal hash.
+    """
+    consts = tuple(
+        hash_code(const) if isinstance(const, types.CodeType) else repr(const)
+        for const in code.co_consts
+    )
+    return hash_function((code.co_code, consts, code.co_names))
+
+
+def make_obj_hash(obj: object, is_training: bool = False) -> str:
     """Hash an object.
 
+    Data frames, series and arrays are hashed exactly from their values,
+    functions from their compiled code and objects from their class and
+    attributes.
+
     Args:
         obj: object
             Object to be hashed.
-        mode: str
-            hash mode for pandas dataframes.
         is_training: bool
-            If True  joblib will be used.
-
+            If True joblib will be used for the objects that are not data
+            frames, series or arrays.
 
     Returns:
         str: hashed representation.
     """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return hash_pandas(data=obj)
+    if isinstance(obj, np.ndarray):
+        return hash_array(array=obj)
     if is_training:
         return joblib.hash(obj)
 
-    hash_value = 42
-
     try:
 
-        if isinstance(obj, (set, tuple, list)):
+        if isinstance(obj, (set, frozenset)):
+            hash_value = hash_function(
+                tuple(
+                    sorted(make_obj_hash(e) for e in obj)
+                    + [make_obj_hash(obj.__class__.__name__)]
+                )
+            )
+        elif isinstance(obj, (tuple, list)):
             hash_value = hash_function(
                 tuple(
                     [make_obj_hash(e) for e in obj]
@@ -127,67 +370,50 @@ def make_obj_hash(
                 )
             )
         elif isinstance(obj, dict):
-            new_o = {}
-            for k, v in obj.items():
-                try:
-                    new_o[k] = make_obj_hash(v)
-                except TypeError:
-                    pass
             hash_value = hash_function(
                 tuple(
-                    sorted(frozenset(new_o.items()))
+                    sorted(
+                        (make_obj_hash(k), make_obj_hash(v))
+                        for k, v in obj.items()
+                    )
                     + [make_obj_hash(obj.__class__.__name__)]
                 )
             )
-        elif isinstance(obj, np.ndarray):
-            hash_value = hash_function(str(obj))
-        elif isinstance(obj, pd.DataFrame):
-            if mode == "fast" and not obj.empty:
-                obj = obj.sample(n=100, random_state=42, replace=True)
-            index = tuple(obj.index)
-            columns = tuple(obj.columns)
-            values = tuple(make_obj_hash(x) for x in obj.values)
-            hash_value = hash_function(tuple([index, columns, values]))
-        elif isinstance(obj, pd.Series):
-            index = tuple(obj.index)
-            values = tuple(make_obj_hash(x) for x in obj.values)
-            hash_value = hash_function(tuple([index, values]))
-        elif isinstance(obj, types.FunctionType) or inspect.ismethod(obj):
-            hash_value = hash_function(getsource(obj))
+        elif isinstance(obj, types.FunctionType):
+            hash_value = hash_function(
+                (
+                    obj.__module__,
+                    obj.__qualname__,
+                    hash_code(obj.__code__),
+                    make_obj_hash(obj.__defaults__),
+                )
+            )
+        elif inspect.ismethod(obj):
+            hash_value = hash_function(
+                (make_obj_hash(obj.__func__), make_obj_hash(obj.__self__))
+            )
         elif isinstance(obj, types.BuiltinFunctionType):
             hash_value = hash_function(obj.__name__)
-        elif (
-            inspect.isclass(obj)
-            or inspect.ismodule(obj)
-            or inspect.getmodule(obj)
-        ):
-            class_dict = {}
-            hashables = (int, str, float, bool, list, dict, tuple, set)
-
-            def is_primitive(thing):
-                return isinstance(thing, hashables)
-
-            def has_sourcecode(thing):
-                try:
-                    getsource(thing)
-                    return True
-                except Exception:
-                    return False
-
-            for attr in dir(obj):
-                gattr = getattr(obj, attr)
-                if (
-                    (inspect.ismethod(gattr) and has_sourcecode(gattr))
-                    or inspect.isclass(gattr)
-                    or is_primitive(gattr)
-                    or (inspect.isfunction(gattr) and has_sourcecode(gattr))
-                ) and not attr.startswith("__"):
-                    class_dict[attr] = getattr(obj, attr)
-            class_dict["class"] = obj.__class__.__name__
-            class_dict["__name__"] = getattr(obj, "__name__", "")
-            hash_value = make_obj_hash(class_dict)
-        elif not obj:
-            hash_value = hash_function(str(obj))
+        elif inspect.ismodule(obj):
+            hash_value = hash_function(obj.__name__)
+        elif inspect.isclass(obj):
+            hash_value = hash_function(
+                (
+                    obj.__module__,
+                    obj.__qualname__,
+                    make_obj_hash(
+                        {
+                            name: value
+                            for name, value in vars(obj).items()
+                            if isinstance(value, types.FunctionType)
+                        }
+                    ),
+                )
+            )
+        elif hasattr(obj, "__dict__") and not isinstance(obj, enum.Enum):
+            hash_value = hash_function(
+                (make_obj_hash(type(obj)), make_obj_hash(vars(obj)))
+            )
         else:
             hash_value = hash_function(obj)
 
@@ -195,8 +421,3 @@ def make_obj_hash(
 
     except RecursionError:
         return "RecursionError"
-    except TypeError:
-        try:
-            return hash_function(tuple(hash_value))
-        except Exception as e:
-            raise e
@@ -0,0 +1,249 @@
+"""Content addressed store of the cached results."""
+import contextlib
+import os
+import pathlib
+import shutil
+import sqlite3
+import tempfile
+import time
+from typing import (
+    Any,
+    Iterator,
+    List,
+    Optional,
+)
+
+import pandas as pd
+
+from fraud.utils.file_lock import file_lock
+from fraud.utils.io import (
+    dump_artifacts,
+    dump_frame_columns,
+    is_columnar_frame,
+    load_artifacts,
+    load_frame_columns,
+    set_default_permissions,
+)
+from fraud.utils.logging import get_logger
+
+logger = get_logger()
+
+
+class CacheStore:
+    """Cached results stored as files, tracked in an SQLite index.
+
+    Every entry is named after its key, the index records its size and last
+    access time. Once the entries exceed max_bytes, the least recently used
+    ones are deleted.
+
+    Data frames supported by utils.is_columnar_frame are stored as a
+    directory of one .npy file per column and loaded memory-mapped, so only
+    the columns, and pages, actually used are read from disk. Other objects
+    are pickled.
+
+    Entries are written to temporary files then renamed, so concurrent
+    processes never read a partially written entry. lock gives a per-key
+    lock to make sure only one process computes a missing entry.
+    """
+
+    def __init__(self, path: pathlib.Path, max_bytes: Optional[int] = None):
+        """Open the store, creating its directory and index if needed.
+
+        Args:
+            path: pathlib.Path
+                Directory of the entries.
+            max_bytes: Optional[int]
+                Maximum total size of the entries, unbounded if None.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, "
+                "size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection to the index committing on success."""
+        connection = sqlite3.connect(self.path / "index.sqlite", timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _get_file_path(self, key: str) -> pathlib.Path:
+        """Get the pickle file of an entry."""
+        return self.path / f"{key}.pickle"
+
+    def _get_frame_path(self, key: str) -> pathlib.Path:
+        """Get the column directory of a data frame entry."""
+        return self.path / key
+
+    def _delete(self, key: str) -> None:
+        """Delete the files of an entry."""
+        self._get_file_path(key=key).unlink(missing_ok=True)
+        shutil.rmtree(self._get_frame_path(key=key), ignore_errors=True)
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Hold the lock of a key, shared by every process and thread.
+
+        Args:
+            key: str
+                Entry key.
+        """
+        with file_lock(file_path=self.path / "locks" / f"{key}.lock"):
+            yield
+
+    def load(self, key: str, columns: Optional[List[str]] = None) -> Any:
+        """Load an entry and mark it as recently used.
+
+        Args:
+            key: str
+                Entry key.
+            columns: Optional[List[str]]
+                Columns to load if the entry is a data frame, all of them if
+                None. Ignored for other objects.
+
+        Returns:
+            Any:
+                Cached object.
+
+        Raises:
+            KeyError:
+                If there is no entry.
+        """
+        with self._connect() as connection:
+            is_indexed = connection.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            ).rowcount
+        if not is_indexed:
+            raise KeyError(key)
+
+        frame_path = self._get_frame_path(key=key)
+        if (frame_path / "metadata.pickle").exists():
+            try:
+                return load_frame_columns(
+                    file_path=frame_path, columns=columns
+                )
+            except FileNotFoundError:
+                # Replaced or evicted by another process meanwhile.
+                raise KeyError(key)
+
+        file_path = self._get_file_path(key=key)
+        if not file_path.exists():
+            raise KeyError(key)
+
+        obj = load_artifacts(file_path=file_path)
+        if columns is not None and isinstance(obj, pd.DataFrame):
+            obj = obj[columns]
+
+        return obj
+
+    def dump(self, key: str, obj: Any) -> None:
+        """Store an entry, evicting the least recently used if needed.
+
+        Args:
+            key: str
+                Entry key.
+            obj: Any
+                Object to cache.
+
+        Returns:
+            None
+        """
+        frame_path = self._get_frame_path(key=key)
+        if is_columnar_frame(data=obj):
+            tmp_path = pathlib.Path(
+                tempfile.mkdtemp(dir=self.path, prefix=f".{key}.")
+            )
+            dump_frame_columns(data=obj, file_path=tmp_path)
+            set_default_permissions(path=tmp_path)
+            size = sum(
+                os.path.getsize(file_path) for file_path in tmp_path.iterdir()
+            )
+
+            self._delete(key=key)
+            try:
+                os.rename(tmp_path, frame_path)
+            except OSError:
+                # Another process wrote the entry since it was deleted.
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        else:
+            dump_artifacts(obj=obj, file_path=self.path, file_name=key)
+            size = os.path.getsize(self._get_file_path(key=key))
+            shutil.rmtree(frame_path, ignore_errors=True)
+
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, size, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, size, now, now),
+            )
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used entries beyond max_bytes."""
+        if self.max_bytes is None:
+            return
+
+        with self._connect() as connection:
+            total_size = self.get_total_size(connection=connection)
+            if total_size <= self.max_bytes:
+                return
+
+            evicted = []
+            for key, size in connection.execute(
+                "SELECT key, size FROM entries ORDER BY last_access"
+            ).fetchall():
+                if total_size <= self.max_bytes:
+                    break
+                evicted.append(key)
+                total_size -= size
+
+            connection.executemany(
+                "DELETE FROM entries WHERE key = ?",
+                [(key,) for key in evicted],
+            )
+
+        for key in evicted:
+            self._delete(key=key)
+        logger.info(f"Evicted {len(evicted)} cache entries")
+
+    def get_total_size(
+        self, connection: Optional[sqlite3.Connection] = None
+    ) -> int:
+        """Get the total size of the entries, in bytes.
+
+        Args:
+            connection: Optional[sqlite3.Connection]
+                Open connection to the index, a new one is opened if None.
+
+        Returns:
+            int:
+                Total size.
+        """
+        if connection is None:
+            with self._connect() as connection:
+                return self.get_total_size(connection=connection)
+
+        return connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        """Number of entries."""
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM entries"
+            ).fetchone()[0]
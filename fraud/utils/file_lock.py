@@ -0,0 +1,27 @@
+"""Locks shared between processes."""
+import contextlib
+import fcntl
+import pathlib
+from typing import Iterator
+
+
+@contextlib.contextmanager
+def file_lock(file_path: pathlib.Path) -> Iterator[None]:
+    """Hold an exclusive lock on a file, waiting for it if needed.
+
+    The lock is held through flock, so it is released by the kernel if the
+    holder dies, and it also excludes threads of the same process that
+    open the file on their own. The file is created if needed and never
+    deleted.
+
+    Args:
+        file_path: pathlib.Path
+            Lock file.
+    """
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(file=file_path, mode="a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
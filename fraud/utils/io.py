@@ -2,16 +2,49 @@
 import os
 import pathlib
 import pickle
-from typing import Any
+import tempfile
+from typing import (
+    Any,
+    List,
+    Optional,
+)
+
+import numpy as np
+import pandas as pd
 
 from fraud.utils.logging import get_logger
 
 logger = get_logger()
 
+# The umask can only be read by setting it, once at import time as it is
+# process-wide and another thread could create files in between.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def set_default_permissions(path: pathlib.Path) -> None:
+    """Give a path the permissions open() or os.makedirs() would have.
+
+    Temporary files and directories are created owner-only, 0600 and 0700,
+    they get the umask default before being renamed into place, so other
+    users, e.g., a serving container or shared cache readers, can read
+    them.
+
+    Args:
+        path: pathlib.Path
+            File or directory.
+    """
+    mode = 0o777 if os.path.isdir(path) else 0o666
+    os.chmod(path, mode & ~_UMASK)
+
 
 def dump_artifacts(obj: Any, file_path: pathlib.Path, file_name: str) -> None:
     """Dump object to pickle format.
 
+    The object is written to a temporary file then renamed, so readers
+    never see a partially written file, even with concurrent writers. The
+    file gets the umask default permissions.
+
     Args:
         obj: Any
             Object to save.
@@ -20,12 +53,21 @@ def dump_artifacts(obj: Any, file_path: pathlib.Path, file_name: str) -> None:
         file_name: str
             Name of the file
     """
-    if not os.path.exists(file_path):
-        os.makedirs(file_path)
+    os.makedirs(file_path, exist_ok=True)
 
     file_name += ".pickle"
-    with open(file=file_path / file_name, mode="wb") as handle:
-        pickle.dump(obj=obj, file=handle, protocol=pickle.HIGHEST_PROTOCOL)
+    with tempfile.NamedTemporaryFile(
+        mode="wb", dir=file_path, prefix=f".{file_name}.", delete=False
+    ) as handle:
+        try:
+            pickle.dump(obj=obj, file=handle, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            handle.close()
+            os.remove(handle.name)
+            raise
+
+    set_default_permissions(path=pathlib.Path(handle.name))
+    os.replace(handle.name, file_path / file_name)
 
 
 def load_artifacts(file_path: pathlib.Path) -> Any:
@@ -49,3 +91,115 @@ def load_artifacts(file_path: pathlib.Path) -> Any:
         obj = None
 
     return obj
+
+
+def is_columnar_frame(data: Any) -> bool:
+    """Check if a data frame can be stored as one array file per column.
+
+    Only data frames with unique column names whose columns and index are
+    backed by plain numpy arrays (numbers, booleans and naive datetimes) are
+    supported.
+
+    Args:
+        data: Any
+            Object to check.
+
+    Returns:
+        bool:
+            True if the object can be dumped with dump_frame_columns.
+    """
+    if not isinstance(data, pd.DataFrame) or not data.columns.is_unique:
+        return False
+
+    dtypes = list(data.dtypes)
+    if not isinstance(data.index, pd.RangeIndex):
+        dtypes.append(data.index.dtype)
+
+    return all(
+        isinstance(dtype, np.dtype) and dtype.kind in "biufmM"
+        for dtype in dtypes
+    )
+
+
+def dump_frame_columns(data: pd.DataFrame, file_path: pathlib.Path) -> None:
+    """Dump a data frame as one .npy array file per column.
+
+    Args:
+        data: pd.DataFrame
+            Data frame to save, see is_columnar_frame.
+        file_path: pathlib.Path
+            Directory where the columns will be saved.
+    """
+    if not os.path.exists(file_path):
+        os.makedirs(file_path)
+
+    metadata = {"columns": list(data.columns), "index_name": data.index.name}
+
+    if isinstance(data.index, pd.RangeIndex):
+        metadata["range_index"] = (
+            data.index.start,
+            data.index.stop,
+            data.index.step,
+        )
+    else:
+        np.save(file=file_path / "index.npy", arr=data.index.values)
+
+    for position, column in enumerate(data.columns):
+        np.save(
+            file=file_path / f"column_{position}.npy",
+            arr=data[column].values,
+        )
+
+    with open(file=file_path / "metadata.pickle", mode="wb") as handle:
+        pickle.dump(obj=metadata, file=handle)
+
+
+def load_frame_columns(
+    file_path: pathlib.Path,
+    columns: Optional[List[str]] = None,
+    mmap: bool = True,
+) -> pd.DataFrame:
+    """Load a data frame saved with dump_frame_columns.
+
+    Args:
+        file_path: pathlib.Path
+            Directory where the columns were saved.
+        columns: Optional[List[str]]
+            Columns to load, all of them if None.
+        mmap: bool
+            If True, the columns are memory-mapped copy-on-write instead of
+            being read into memory: only the pages used are read, and writes
+            stay in the process memory, the files are never modified.
+
+    Returns:
+        pd.DataFrame:
+            Saved data frame.
+    """
+    with open(file=file_path / "metadata.pickle", mode="rb") as handle:
+        metadata = pickle.load(handle)
+
+    mmap_mode = "c" if mmap else None
+
+    if "range_index" in metadata:
+        index = pd.RangeIndex(*metadata["range_index"])
+    else:
+        index = np.load(file=file_path / "index.npy", mmap_mode=mmap_mode)
+
+    if columns is None:
+        columns = metadata["columns"]
+
+    positions = {name: i for i, name in enumerate(metadata["columns"])}
+
+    data = pd.DataFrame(
+        {
+            column: np.load(
+                file=file_path / f"column_{positions[column]}.npy",
+                mmap_mode=mmap_mode,
+            )
+            for column in columns
+        },
+        index=pd.Index(index, name=metadata["index_name"]),
+        copy=False,
+    )
+
+    return data
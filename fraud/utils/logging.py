@@ -60,7 +60,8 @@ def log_model_results(logger: loguru._Logger, results: Dict[str, Any]) -> None:
             The logger instance used to log the formatted results.
         results Dict[str, Any]:
          A dictionary containing results' sections, including 'scores',
-         'estimator_params', and 'hashed_data'.
+         'estimator_params', 'hashed_data' and optionally
+         'confidence_intervals'.
 
     Returns:
         None
@@ -68,6 +69,14 @@ def log_model_results(logger: loguru._Logger, results: Dict[str, Any]) -> None:
     log_str = format_section(
         "Scores", {k: round(v, 3) for k, v in results["scores"].items()}
     )
+    if "confidence_intervals" in results:
+        log_str += format_section(
+            "Confidence Intervals",
+            {
+                k: f"[{v['lower']:.3f}, {v['upper']:.3f}]"
+                for k, v in results["confidence_intervals"].items()
+            },
+        )
     log_str += format_section(
         "Estimator Parameters", results["estimator_params"]
     )
@@ -0,0 +1,137 @@
+"""In-process cache of the cached results."""
+import collections
+import sys
+import threading
+from typing import (
+    Any,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+
+# Returned by MemoryCache.get on a miss, None being a valid cached result.
+MISSING = object()
+
+
+def get_size(obj: Any) -> int:
+    """Estimate the memory used by an object, in bytes.
+
+    Arrays and pandas objects are measured through their buffers, other
+    objects only through their shallow size.
+
+    Args:
+        obj: Any
+            Object to measure.
+
+    Returns:
+        int:
+            Estimated size.
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(get_size(item) for item in obj)
+
+    return sys.getsizeof(obj)
+
+
+def _detach(obj: Any) -> Any:
+    """Get a shallow copy of a pandas object, other objects as they are.
+
+    Columns added to, or dropped from, a returned data frame do not change
+    the cached one. Values modified in place are shared.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return obj.copy(deep=False)
+
+    return obj
+
+
+class MemoryCache:
+    """Least recently used entries of the process, bounded in bytes.
+
+    It sits in front of a CacheStore, so repeated calls within a process
+    do not go to disk. Objects larger than max_bytes are never kept.
+    """
+
+    def __init__(self, max_bytes: int):
+        """Instantiate an empty cache.
+
+        Args:
+            max_bytes: int
+                Maximum total size of the entries, see get_size.
+        """
+        self.max_bytes = max_bytes
+
+        self._entries: collections.OrderedDict[
+            str, Tuple[Any, int]
+        ] = collections.OrderedDict()
+        self._total_size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Get an entry and mark it as recently used.
+
+        Args:
+            key: str
+                Entry key.
+
+        Returns:
+            Any:
+                Cached object, MISSING if there is no entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+
+            self._entries.move_to_end(key)
+            return _detach(entry[0])
+
+    def set(self, key: str, obj: Any) -> None:
+        """Store an entry, evicting the least recently used if needed.
+
+        Args:
+            key: str
+                Entry key.
+            obj: Any
+                Object to cache.
+
+        Returns:
+            None
+        """
+        size = get_size(obj=obj)
+        with self._lock:
+            self._pop(key=key)
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (_detach(obj), size)
+            self._total_size += size
+            while self._total_size > self.max_bytes:
+                self._pop(key=next(iter(self._entries)))
+
+    def _pop(self, key: str) -> None:
+        """Drop an entry if it exists, the lock must be held."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_size -= entry[1]
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._total_size = 0
+
+    def get_total_size(self) -> int:
+        """Get the total size of the entries, in bytes."""
+        return self._total_size
+
+    def __len__(self) -> int:
+        """Number of entries."""
+        return len(self._entries)
@@ -0,0 +1,154 @@
+"""Data frames shared between processes."""
+from multiprocessing import shared_memory
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+
+from fraud.utils.io import is_columnar_frame
+
+
+class SharedFrame:
+    """Data frame whose arrays live in shared memory blocks.
+
+    The process creating it copies every column, and the index, into its own
+    block. Pickling only sends the block names and layout, so a worker
+    process unpickling it maps the same memory and gets the data frame with
+    no copy. The arrays of the attached frames are read-only.
+
+    The creator must call unlink once the workers are done, e.g., by using
+    the instance as a context manager.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        """Copy a data frame into shared memory.
+
+        Args:
+            data: pd.DataFrame
+                Data frame to share, see utils.is_columnar_frame.
+        """
+        if not is_columnar_frame(data=data):
+            raise ValueError(
+                "Only data frames of numbers, booleans and naive datetimes "
+                "can be shared"
+            )
+
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self._is_owner = True
+
+        self._columns = [
+            self._share(array=data[column].values) for column in data.columns
+        ]
+        self._column_names = list(data.columns)
+        self._index_name = data.index.name
+
+        self._range_index: Optional[Tuple[int, int, int]] = None
+        self._index: Optional[Tuple[str, str, int]] = None
+        if isinstance(data.index, pd.RangeIndex):
+            self._range_index = (
+                data.index.start,
+                data.index.stop,
+                data.index.step,
+            )
+        else:
+            self._index = self._share(array=data.index.values)
+
+    def _share(self, array: np.ndarray) -> Tuple[str, str, int]:
+        """Copy an array into a new block.
+
+        Args:
+            array: np.ndarray
+                1-D array.
+
+        Returns:
+            Tuple[str, str, int]:
+                Block name, dtype and length.
+        """
+        # Zero sized blocks are not allowed.
+        block = shared_memory.SharedMemory(
+            create=True, size=max(array.nbytes, 1)
+        )
+        self._blocks.append(block)
+
+        shared_array = np.ndarray(
+            shape=array.shape, dtype=array.dtype, buffer=block.buf
+        )
+        shared_array[:] = array
+
+        return block.name, array.dtype.str, len(array)
+
+    def _get_array(self, layout: Tuple[str, str, int]) -> np.ndarray:
+        """Get the read-only array of a block."""
+        name, dtype, length = layout
+        block = next(block for block in self._blocks if block.name == name)
+
+        array = np.ndarray(
+            shape=(length,), dtype=np.dtype(dtype), buffer=block.buf
+        )
+        array.flags.writeable = False
+        return array
+
+    def to_frame(self) -> pd.DataFrame:
+        """Get the data frame, backed by the shared memory.
+
+        Returns:
+            pd.DataFrame:
+                Shared data frame, the blocks must outlive it.
+        """
+        if self._range_index is not None:
+            index = pd.RangeIndex(*self._range_index)
+        else:
+            index = self._get_array(layout=self._index)
+
+        return pd.DataFrame(
+            {
+                column: self._get_array(layout=layout)
+                for column, layout in zip(self._column_names, self._columns)
+            },
+            index=pd.Index(index, name=self._index_name),
+            copy=False,
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the layout, not the blocks."""
+        state = self.__dict__.copy()
+        state["_blocks"] = [block.name for block in self._blocks]
+        state["_is_owner"] = False
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Attach the blocks of the layout."""
+        # Processes started by multiprocessing share the resource tracker of
+        # their parent, so attaching does not make a worker free the blocks
+        # when it exits.
+        state["_blocks"] = [
+            shared_memory.SharedMemory(name=name) for name in state["_blocks"]
+        ]
+        self.__dict__.update(state)
+
+    def close(self) -> None:
+        """Detach the blocks from this process."""
+        for block in self._blocks:
+            block.close()
+
+    def unlink(self) -> None:
+        """Detach and free the blocks, only the creator frees them."""
+        self.close()
+        if self._is_owner:
+            for block in self._blocks:
+                block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedFrame":
+        """Use the blocks within a context."""
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Free the blocks."""
+        self.unlink()
@@ -0,0 +1,131 @@
+"""Benchmark the NumPy tree ensemble against the native LightGBM predictor.
+
+Trains a booster with the default LightGBM parameters on random features,
+then times both predictors on batches of 1 to 100k rows.
+"""
+import argparse
+import time
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
+
+import lightgbm as lgb
+import numpy as np
+from numpy.typing import NDArray
+
+from fraud.ml.algorithms.algorithm_params import LightGBMParams
+from fraud.ml.algorithms.tree_ensemble import export_booster
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+
+
+def get_median_time(
+    predict: Callable[[NDArray], NDArray], features: NDArray, repeats: int
+) -> float:
+    """Get the median time of a predictor call, in seconds."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(features)
+        times.append(time.perf_counter() - start)
+
+    return float(np.median(times))
+
+
+def main(
+    n_features: int, n_train: int, repeats: int, seed: int
+) -> List[Dict[str, float]]:
+    """Execute the benchmark.
+
+    Args:
+        n_features: Number of features.
+        n_train: Number of training rows.
+        repeats: Number of timed calls per batch size.
+        seed: Random seed.
+
+    Returns:
+        Median time of both predictors for every batch size.
+    """
+    random_state = np.random.RandomState(seed)
+    features = random_state.randn(n_train, n_features)
+    target = (
+        features[:, 0] + features[:, 1] * random_state.randn(n_train) > 1
+    ).astype(int)
+
+    params = {**LightGBMParams().__dict__, "verbose": -1}
+    booster = lgb.train(
+        params=params, train_set=lgb.Dataset(data=features, label=target)
+    )
+    tree_ensemble = export_booster(booster=booster)
+
+    print(
+        f"{tree_ensemble.n_trees} trees, max depth {tree_ensemble.max_depth}"
+    )
+    print(
+        f"{'batch size':>10} {'native (ms)':>12} {'numpy (ms)':>12} "
+        f"{'speedup':>8} {'max abs diff':>13}"
+    )
+
+    results = []
+    for batch_size in BATCH_SIZES:
+        batch = random_state.randn(batch_size, n_features)
+        batch_repeats = max(repeats * 1_000 // max(batch_size, 1_000), 3)
+
+        native_time = get_median_time(
+            predict=booster.predict, features=batch, repeats=batch_repeats
+        )
+        numpy_time = get_median_time(
+            predict=tree_ensemble.predict,
+            features=batch,
+            repeats=batch_repeats,
+        )
+        max_diff = np.abs(
+            booster.predict(batch) - tree_ensemble.predict(batch)
+        ).max()
+
+        print(
+            f"{batch_size:>10} {native_time * 1e3:>12.4f} "
+            f"{numpy_time * 1e3:>12.4f} {native_time / numpy_time:>8.2f} "
+            f"{max_diff:>13.2e}"
+        )
+        results.append(
+            {
+                "batch_size": batch_size,
+                "native_time": native_time,
+                "numpy_time": numpy_time,
+                "max_diff": max_diff,
+            }
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the NumPy tree ensemble scorer."
+    )
+    parser.add_argument(
+        "--n-features", type=int, default=6, help="Number of features."
+    )
+    parser.add_argument(
+        "--n-train", type=int, default=50_000, help="Training rows."
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=200,
+        help="Timed calls for the batches of up to 1000 rows.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+
+    args = parser.parse_args()
+
+    main(
+        n_features=args.n_features,
+        n_train=args.n_train,
+        repeats=args.repeats,
+        seed=args.seed,
+    )
@@ -9,8 +9,16 @@ We set the following parameters:
 
 Parameter                Environment Variable              Default Value
 ---------                --------------------              -------------
-number of workers        MODEL_SERVER_WORKERS              the number of CPUs
+number of workers        MODEL_SERVER_WORKERS              the number of CPUs,
+                                                           1 with a feature
+                                                           store
 timeout                  MODEL_SERVER_TIMEOUT              60 seconds
+
+A model trained with an online feature store, train.py --feature-store, ships
+feature_store.pickle. The store lives in the worker process and every worker
+would only see its share of the transactions, so such a model is served by a
+single worker, and the server fails to start if MODEL_SERVER_WORKERS asks for
+more.
 """
 import multiprocessing
 import os
@@ -18,6 +26,7 @@ import signal
 import subprocess
 import sys
 
+from fraud.config import settings
 from fraud.utils import get_logger
 
 logger = get_logger()
@@ -26,8 +35,19 @@ logger.info("Starting score service")
 
 cpu_count = multiprocessing.cpu_count()
 
+has_feature_store = (settings.ASSETS_PATH / "feature_store.pickle").exists()
+
 model_server_timeout = os.environ.get("MODEL_SERVER_TIMEOUT", 60)
-model_server_workers = int(os.environ.get("MODEL_SERVER_WORKERS", cpu_count))
+default_workers = 1 if has_feature_store else cpu_count
+model_server_workers = int(
+    os.environ.get("MODEL_SERVER_WORKERS", default_workers)
+)
+
+if has_feature_store and model_server_workers > 1:
+    raise ValueError(
+        f"MODEL_SERVER_WORKERS={model_server_workers}, but the model ships "
+        "an online feature store, which only a single worker can serve"
+    )
 
 
 def sigterm_handler(nginx_pid: int, gunicorn_pid: int) -> None:
@@ -0,0 +1,101 @@
+"""Bootstrap confidence intervals tests."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from fraud.ml import metrics
+from fraud.ml.evaluators.bootstrap import bootstrap_metrics
+from fraud.ml.evaluators.bootstrap_config import (
+    BootstrapConfig,
+    ResamplingStrategy,
+)
+
+
+@pytest.fixture(scope="module")
+def scored_test_set():
+    """Scored transactions of customers whose cards get compromised."""
+    rng = np.random.default_rng(0)
+    n_customers, n_days = 600, 14
+
+    customer_id = np.repeat(np.arange(n_customers), n_days * 3)
+    day = np.tile(np.repeat(np.arange(n_days), 3), n_customers)
+    is_kept = rng.random(len(customer_id)) < 0.6
+    customer_id, day = customer_id[is_kept], day[is_kept]
+
+    compromised_day = np.where(
+        rng.random(n_customers) < 0.1,
+        rng.integers(0, n_days, n_customers),
+        n_days,
+    )
+    tx_fraud = (day >= compromised_day[customer_id]).astype(int)
+    scores = 1 / (1 + np.exp(3 - 2.5 * tx_fraud - rng.normal(size=len(day))))
+
+    tx_datetime = (
+        pd.Timestamp("2023-09-01")
+        + pd.to_timedelta(day, unit="D")
+        + pd.to_timedelta(rng.integers(1, 86400, len(day)), unit="s")
+    )
+
+    return (
+        metrics.Results(predictions=scores > 0.5, scores=scores),
+        metrics.TrueValues(
+            tx_fraud=pd.DataFrame({"tx_fraud": tx_fraud}),
+            tx_datetime=pd.DataFrame({"tx_datetime": tx_datetime}),
+            customer_id=pd.DataFrame({"customer_id": customer_id}),
+        ),
+    )
+
+
+@pytest.fixture(scope="module")
+def metric_list():
+    """Every metric."""
+    return [
+        metrics.MetricFactory().create(metric_type)
+        for metric_type in metrics.MetricType
+    ]
+
+
+def test_customer_resampling_covers_the_point_estimates(
+    scored_test_set, metric_list
+):
+    """The intervals cover the metrics of the whole test set."""
+    results, true_values = scored_test_set
+    context = metrics.MetricContext(results=results, true_values=true_values)
+
+    confidence_intervals = bootstrap_metrics(
+        metric_list=metric_list,
+        results=results,
+        true_values=true_values,
+        bootstrap_config=BootstrapConfig(
+            n_resamples=100, strategy=ResamplingStrategy.CUSTOMER
+        ),
+    )
+
+    for metric_instance in metric_list:
+        point = metric_instance.measure_context(context=context)
+        interval = confidence_intervals[metric_instance.name]
+        assert (
+            interval["lower"] <= point <= interval["upper"]
+        ), metric_instance.name
+
+
+@pytest.mark.parametrize(
+    "strategy",
+    [ResamplingStrategy.STRATIFIED, ResamplingStrategy.DAY_BLOCK],
+)
+def test_customer_metrics_need_customer_resampling(
+    scored_test_set, metric_list, strategy
+):
+    """Metrics following customers have no interval with other strategies."""
+    results, true_values = scored_test_set
+
+    confidence_intervals = bootstrap_metrics(
+        metric_list=metric_list,
+        results=results,
+        true_values=true_values,
+        bootstrap_config=BootstrapConfig(n_resamples=20, strategy=strategy),
+    )
+
+    for metric_instance in metric_list:
+        interval = confidence_intervals[metric_instance.name]
+        assert np.isnan(interval["lower"]) == metric_instance.is_by_customer
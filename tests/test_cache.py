@@ -0,0 +1,44 @@
+"""Cacher tests."""
+import pytest
+
+from fraud import config
+from fraud.utils import cache
+
+calls = []
+
+
+@cache.cacher
+def add(a, b=2):
+    """Add two numbers, recording the call."""
+    calls.append((a, b))
+    return a + b
+
+
+@pytest.fixture(autouse=True)
+def cache_path(tmp_path, monkeypatch):
+    """Cache the results under a temporary directory."""
+    monkeypatch.setattr(config.settings, "CACH_PATH", tmp_path)
+    cache.get_cache_store.cache_clear()
+    cache.get_memory_cache.cache_clear()
+    calls.clear()
+    yield tmp_path
+    cache.get_cache_store.cache_clear()
+    cache.get_memory_cache.cache_clear()
+
+
+def test_default_arguments_share_the_key():
+    """A call with a default argument given or left out is computed once."""
+    assert add(1) == 3
+    assert add(1, b=2) == 3
+    assert add(1, 2) == 3
+    assert add(a=1) == 3
+
+    assert calls == [(1, 2)]
+
+
+def test_other_arguments_get_other_keys():
+    """A call with another argument value is computed again."""
+    assert add(1) == 3
+    assert add(1, b=3) == 4
+
+    assert calls == [(1, 2), (1, 3)]
@@ -0,0 +1,110 @@
+"""Label feedback tests."""
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from fraud.domain import feature_transformations
+from fraud.services import sm_prediction_service
+
+FEATURES_PARAMS = [
+    feature_transformations.AggregatedFeatureParams(
+        grouping_column="terminal_id",
+        feature_name="tx_fraud",
+        windows_size_in_days=[5],
+        agg_func_list=[feature_transformations.AggFunc.SUM],
+        delay_period=7,
+    ),
+]
+
+LABELS_HEADERS = {
+    sm_prediction_service.CUSTOM_ATTRIBUTES_HEADER: (
+        sm_prediction_service.LABELS_ATTRIBUTE
+    )
+}
+
+START = pd.Timestamp("2023-09-01")
+
+
+@pytest.fixture
+def feature_store(monkeypatch):
+    """Feature store of the served model, with an unlabeled transaction."""
+    feature_store = feature_transformations.OnlineFeatureStore(
+        features_params=FEATURES_PARAMS
+    )
+    feature_store.record(
+        transaction={"tx_datetime": START, "terminal_id": 1},
+        transaction_id=10,
+    )
+    monkeypatch.setattr(
+        sm_prediction_service.ScoringService,
+        "model",
+        SimpleNamespace(feature_store=feature_store),
+    )
+
+    return feature_store
+
+
+def get_fraud_sum(feature_store):
+    """Get the terminal fraud feature of a transaction eight days later."""
+    features = feature_store.get_features(
+        transaction={
+            "tx_datetime": START + pd.Timedelta(days=8),
+            "terminal_id": 1,
+        }
+    )
+
+    return features["terminal_id_sum_tx_fraud_5_days"]
+
+
+def test_fed_back_labels_change_the_features(feature_store):
+    """A label sent to /invocations is counted by the label features."""
+    assert get_fraud_sum(feature_store) == 0
+
+    response = sm_prediction_service.app.test_client().post(
+        "/invocations",
+        data=json.dumps({"transaction_id": 10, "tx_fraud": 1}),
+        content_type="application/json",
+        headers=LABELS_HEADERS,
+    )
+
+    assert response.status_code == 200
+    assert response.get_json() == [True]
+    assert get_fraud_sum(feature_store) == 1
+
+
+def test_unknown_transactions_are_not_updated(feature_store):
+    """A label of a transaction never recorded changes nothing."""
+    response = sm_prediction_service.app.test_client().post(
+        "/invocations",
+        data="transaction_id,tx_fraud\n11,1\n",
+        content_type="text/csv",
+        headers=LABELS_HEADERS,
+    )
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == "False\n"
+    assert get_fraud_sum(feature_store) == 0
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"transaction_id": 10},
+        {"transaction_id": 10, "tx_fraud": 2},
+        {"transaction_id": 10, "tx_fraud": None},
+        {"transaction_id": "abc", "tx_fraud": 1},
+    ],
+)
+def test_malformed_labels_are_rejected(feature_store, body):
+    """Labels without an integer id and a 0 or 1 label get a 400."""
+    response = sm_prediction_service.app.test_client().post(
+        "/invocations",
+        data=json.dumps(body),
+        content_type="application/json",
+        headers=LABELS_HEADERS,
+    )
+
+    assert response.status_code == 400
+    assert get_fraud_sum(feature_store) == 0
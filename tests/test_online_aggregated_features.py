@@ -0,0 +1,155 @@
+"""Online aggregated features tests."""
+import pandas as pd
+import pytest
+
+from fraud.domain import (
+    data_simulator,
+    feature_transformations,
+)
+from fraud.domain.feature_transformations.online_aggregated_features import (
+    get_feature_windows,
+)
+
+FEATURES_PARAMS = [
+    feature_transformations.AggregatedFeatureParams(
+        grouping_column="customer_id",
+        feature_name="tx_amount",
+        windows_size_in_days=[1, 5],
+        agg_func_list=[
+            feature_transformations.AggFunc.MEAN,
+            feature_transformations.AggFunc.COUNT,
+        ],
+    ),
+    feature_transformations.AggregatedFeatureParams(
+        grouping_column="terminal_id",
+        feature_name="tx_fraud",
+        windows_size_in_days=[5],
+        agg_func_list=[
+            feature_transformations.AggFunc.MEAN,
+            feature_transformations.AggFunc.SUM,
+        ],
+        delay_period=7,
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def transactions_df():
+    """Thirty days of simulated transactions, in time order."""
+    transactions_df = (
+        data_simulator.simulate_credit_card_transactions_data.__wrapped__(
+            n_terminals=300,
+            n_customers=200,
+            geo_uniform_lower_bound=0,
+            geo_uniform_upper_bound=100,
+            amount_uniform_lower_bound=5,
+            amount_uniform_upper_bound=100,
+            trans_uniform_lower_bound=0,
+            trans_uniform_upper_bound=4,
+            radius=20,
+            start_date=pd.Timestamp("2023-09-01"),
+            nb_days=30,
+            random_state=0,
+            n_jobs=1,
+        )
+    )
+
+    return transactions_df.sort_values(
+        by="tx_datetime", kind="stable"
+    ).reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def batch_features(transactions_df):
+    """Aggregated features of the transactions, computed in batch."""
+    data = transactions_df.assign(row=transactions_df.index)
+    for params in FEATURES_PARAMS:
+        data = feature_transformations.aggregate_feature(
+            transactions_df=data,
+            windows_size_in_days=params.windows_size_in_days,
+            time_unit=params.time_unit,
+            feature_name=params.feature_name,
+            agg_func_list=params.agg_func_list,
+            datetime_col="tx_datetime",
+            index_name="transaction_id",
+            grouping_column=params.grouping_column,
+            delay_period=params.delay_period,
+        )
+
+    return data.set_index("row").sort_index()
+
+
+def get_feature_columns():
+    """Get the column names of every aggregated feature."""
+    return [
+        column
+        for params in FEATURES_PARAMS
+        for column, _, _, _ in get_feature_windows(params=params)
+    ]
+
+
+def test_recorded_features_match_batch_with_known_labels(
+    transactions_df, batch_features
+):
+    """Transactions recorded with their labels get the batch features.
+
+    The store is warmed with twenty days, then the next ten are recorded
+    one by one, each with its label.
+    """
+    warm_end = pd.Timestamp("2023-09-21")
+    is_warm = transactions_df.tx_datetime < warm_end
+    feature_store = feature_transformations.OnlineFeatureStore(
+        features_params=FEATURES_PARAMS
+    )
+    feature_store.warm(transactions_df=transactions_df[is_warm])
+
+    served = transactions_df[~is_warm]
+    online_features = {
+        row: feature_store.record(transaction=transaction, transaction_id=row)
+        for row, transaction in zip(served.index, served.to_dict("records"))
+    }
+
+    online_features = pd.DataFrame.from_dict(online_features, orient="index")
+    columns = get_feature_columns()
+
+    pd.testing.assert_frame_equal(
+        online_features[columns],
+        batch_features.loc[served.index, columns],
+        check_exact=True,
+        check_names=False,
+    )
+
+
+def test_delayed_batch_features_keep_their_definition(
+    transactions_df, batch_features
+):
+    """A delayed feature is agg(window + delay) - agg(delay).
+
+    The batch values match aggregate_feature_by_time_window, computed on
+    every terminal on its own.
+    """
+    params = FEATURES_PARAMS[1]
+    data = transactions_df.rename_axis("transaction_id")
+    terminal_ids = data.terminal_id.drop_duplicates().iloc[:20]
+
+    for terminal_id in terminal_ids:
+        expected = feature_transformations.aggregate_feature_by_time_window(
+            data=data[data.terminal_id == terminal_id],
+            windows_size_in_days=params.windows_size_in_days,
+            time_unit=params.time_unit,
+            feature_name=params.feature_name,
+            agg_func_list=params.agg_func_list,
+            datetime_col="tx_datetime",
+            index_name="transaction_id",
+            grouping_column=params.grouping_column,
+            delay_period=params.delay_period,
+        ).sort_index()
+
+        columns = [
+            column for column, _, _, _ in get_feature_windows(params=params)
+        ]
+        pd.testing.assert_frame_equal(
+            batch_features.loc[expected.index, columns],
+            expected[columns],
+            check_names=False,
+        )
@@ -0,0 +1,115 @@
+"""Flask prediction service request validation tests."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from fraud.domain import feature_transformations
+from fraud.services import sm_prediction_service
+
+FEATURES_PARAMS = [
+    feature_transformations.AggregatedFeatureParams(
+        grouping_column="customer_id",
+        feature_name="tx_amount",
+        windows_size_in_days=[5],
+        agg_func_list=[feature_transformations.AggFunc.MEAN],
+    ),
+    feature_transformations.AggregatedFeatureParams(
+        grouping_column="terminal_id",
+        feature_name="tx_fraud",
+        windows_size_in_days=[5],
+        agg_func_list=[feature_transformations.AggFunc.MEAN],
+        delay_period=7,
+    ),
+]
+
+TRANSACTION = {
+    "transaction_id": 1,
+    "tx_datetime": 1672271365000,
+    "tx_amount": 120.5,
+    "customer_id": 3,
+    "terminal_id": 7,
+}
+
+
+def use_model(monkeypatch, has_feature_store):
+    """Serve a model, with or without a feature store."""
+    feature_store = None
+    if has_feature_store:
+        feature_store = feature_transformations.OnlineFeatureStore(
+            features_params=FEATURES_PARAMS
+        )
+    monkeypatch.setattr(
+        sm_prediction_service.ScoringService,
+        "model",
+        SimpleNamespace(feature_store=feature_store),
+    )
+
+
+def post(body):
+    """Post a JSON body to /invocations."""
+    return sm_prediction_service.app.test_client().post(
+        "/invocations",
+        data=json.dumps(body),
+        content_type="application/json",
+    )
+
+
+@pytest.mark.parametrize(
+    "missing_field",
+    [
+        "customer_id_mean_tx_amount_5_days",
+        "terminal_id_mean_tx_fraud_5_days",
+    ],
+)
+def test_aggregated_features_are_required_without_store(
+    monkeypatch, missing_field
+):
+    """A model without a feature store needs the aggregated features."""
+    use_model(monkeypatch=monkeypatch, has_feature_store=False)
+    body = {
+        **TRANSACTION,
+        "customer_id_mean_tx_amount_5_days": 110.0,
+        "terminal_id_mean_tx_fraud_5_days": 0.0,
+    }
+    body.pop(missing_field)
+
+    response = post(body=body)
+
+    assert response.status_code == 400
+    assert missing_field in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize("missing_field", ["customer_id", "terminal_id"])
+def test_grouping_columns_are_required_with_store(monkeypatch, missing_field):
+    """A model with a feature store needs the entities to aggregate by."""
+    use_model(monkeypatch=monkeypatch, has_feature_store=True)
+    body = dict(TRANSACTION)
+    body.pop(missing_field)
+
+    response = post(body=body)
+
+    assert response.status_code == 400
+    assert missing_field in response.get_data(as_text=True)
+    feature_store = sm_prediction_service.ScoringService.model.feature_store
+    assert not feature_store.recorded
+
+
+@pytest.mark.parametrize("has_feature_store", [False, True])
+@pytest.mark.parametrize("tx_amount", ["abc", None])
+def test_invalid_amounts_are_rejected(
+    monkeypatch, has_feature_store, tx_amount
+):
+    """A non numeric or null amount is a client error."""
+    use_model(monkeypatch=monkeypatch, has_feature_store=has_feature_store)
+    body = {
+        **TRANSACTION,
+        "tx_amount": tx_amount,
+        "customer_id_mean_tx_amount_5_days": 110.0,
+        "terminal_id_mean_tx_fraud_5_days": 0.0,
+    }
+
+    response = post(body=body)
+
+    assert response.status_code == 400
+    assert "tx_amount" in response.get_data(as_text=True)
@@ -0,0 +1,62 @@
+"""Terminal grid index tests."""
+import numpy as np
+import pytest
+
+from fraud.domain.spatial_index import TerminalGridIndex
+
+
+def get_brute_force_terminals(x_y_terminals, x_y_points, radius):
+    """Get the terminals within the radius of every point, one by one."""
+    return [
+        np.flatnonzero(
+            np.sqrt(np.square(x_y_terminals - point).sum(axis=1)) < radius
+        )
+        for point in x_y_points
+    ]
+
+
+def get_index_terminals(index, x_y_points, radius):
+    """Get the terminals within the radius of every point from the index."""
+    available = index.query_radius(x_y_points=x_y_points, radius=radius)
+    return [
+        available.terminal_ids[available.offsets[i] : available.offsets[i + 1]]
+        for i in range(len(x_y_points))
+    ]
+
+
+def test_off_grid_points_reach_the_terminals():
+    """A point left of the terminals, further than the grid side."""
+    x_y_terminals = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]])
+    index = TerminalGridIndex(x_y_terminals=x_y_terminals, cell_size=1.0)
+
+    terminals = get_index_terminals(
+        index=index, x_y_points=np.array([[-3.5, 0.0]]), radius=5.0
+    )
+
+    np.testing.assert_array_equal(terminals[0], [0, 1])
+
+
+@pytest.mark.parametrize("cell_size", [0.5, 5.0, 20.0])
+def test_queries_match_brute_force(cell_size):
+    """Points within and around the terminals get the exact terminals."""
+    rng = np.random.default_rng(0)
+    x_y_terminals = rng.uniform(20, 80, size=(300, 2))
+    x_y_points = rng.uniform(-50, 150, size=(200, 2))
+    index = TerminalGridIndex(x_y_terminals=x_y_terminals, cell_size=cell_size)
+
+    for radius in [1.0, 10.0, 60.0]:
+        expected = get_brute_force_terminals(
+            x_y_terminals=x_y_terminals, x_y_points=x_y_points, radius=radius
+        )
+        terminals = get_index_terminals(
+            index=index, x_y_points=x_y_points, radius=radius
+        )
+
+        for point_terminals, point_expected in zip(terminals, expected):
+            np.testing.assert_array_equal(point_terminals, point_expected)
+
+
+def test_non_positive_cell_sizes_are_rejected():
+    """A cell size of 0 would divide by zero."""
+    with pytest.raises(ValueError):
+        TerminalGridIndex(x_y_terminals=np.zeros((1, 2)), cell_size=0.0)
@@ -0,0 +1,75 @@
+"""Tree ensemble export tests."""
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from fraud.ml.algorithms.tree_ensemble import export_booster
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    """Features with NaNs and zeros, and a binary target."""
+    rng = np.random.default_rng(0)
+    n_rows, n_features = 3000, 6
+
+    features = rng.normal(size=(n_rows, n_features))
+    features[rng.random(size=features.shape) < 0.1] = np.nan
+    features[rng.random(size=features.shape) < 0.1] = 0.0
+    features[:, 5] = rng.integers(0, 3, n_rows)
+
+    logits = np.nan_to_num(features[:, 0]) - np.nan_to_num(features[:, 1])
+    target = (logits + rng.normal(size=n_rows) > 0).astype(float)
+
+    return features, target
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"objective": "binary"},
+        {"objective": "binary", "sigmoid": 0.5},
+        {"objective": "xentropy"},
+        {"objective": "regression"},
+        {"objective": "binary", "zero_as_missing": True},
+        {"objective": "binary", "use_missing": False},
+        {"objective": "xentropy", "early_stopping_round": 5},
+    ],
+    ids=lambda params: "-".join(f"{k}={v}" for k, v in params.items()),
+)
+def test_exported_booster_predicts_as_lightgbm(dataset, params):
+    """The exported ensemble predicts as Booster.predict."""
+    features, target = dataset
+    train_set = lgb.Dataset(features[:2000], label=target[:2000])
+    valid_sets = None
+    if "early_stopping_round" in params:
+        valid_sets = [lgb.Dataset(features[2000:], label=target[2000:])]
+
+    booster = lgb.train(
+        params={
+            **params,
+            "num_leaves": 15,
+            "learning_rate": 0.3,
+            "min_data_in_leaf": 5,
+            "verbose": -1,
+        },
+        train_set=train_set,
+        num_boost_round=50,
+        valid_sets=valid_sets,
+    )
+    if valid_sets is not None:
+        assert 0 < booster.best_iteration < 50
+
+    tree_ensemble = export_booster(booster=booster)
+
+    # The raw scores are bit-identical, the output transforms may differ in
+    # the last bit, numpy and LightGBM have their own exp.
+    np.testing.assert_array_equal(
+        tree_ensemble.predict_raw(features=features),
+        booster.predict(features, raw_score=True),
+    )
+    np.testing.assert_allclose(
+        tree_ensemble.predict(features=features),
+        booster.predict(features),
+        rtol=1e-15,
+        atol=0,
+    )
@@ -1,14 +1,47 @@
 """Train script."""
 import argparse
-from fraud.data import repositories
+
 from fraud import ml
+from fraud.data import repositories
+from fraud.ml.evaluators.bootstrap_config import (
+    BootstrapConfig,
+    ResamplingStrategy,
+)
+from fraud.ml.hyperparam_optim.hpo_config import (
+    HPOConfig,
+    PruningStrategy,
+)
 
 
-def main(do_hpo: bool):
+def main(
+    do_hpo: bool,
+    hpo_n_jobs: int = 1,
+    hpo_batch_size: int = 1,
+    hpo_pruning: PruningStrategy = PruningStrategy.NONE,
+    hpo_early_stopping_rounds: int = 0,
+    bootstrap_resamples: int = 0,
+    bootstrap_n_jobs: int = 1,
+    bootstrap_strategy: ResamplingStrategy = ResamplingStrategy.CUSTOMER,
+    bootstrap_block_length: int = 1,
+    backtest_folds: int = 1,
+    backtest_n_jobs: int = 1,
+    feature_store: bool = False,
+):
     """Execute main script.
 
     Args:
         do_hpo: If true, the hyperparameters will be optimized.
+        hpo_n_jobs: Processes evaluating the hpo candidates.
+        hpo_batch_size: Hpo candidates evaluated concurrently.
+        hpo_pruning: Hpo trial pruning strategy.
+        hpo_early_stopping_rounds: Hpo trials early stopping rounds.
+        bootstrap_resamples: Test set resamples of the confidence intervals.
+        bootstrap_n_jobs: Processes computing the resamples.
+        bootstrap_strategy: Test set resampling strategy.
+        bootstrap_block_length: Days of the day block resampling blocks.
+        backtest_folds: Walk-forward backtesting folds, 1 disables it.
+        backtest_n_jobs: Processes running the backtesting folds.
+        feature_store: If true, an online feature store ships with the model.
 
     Returns:
         model scores.
@@ -16,10 +49,30 @@ def main(do_hpo: bool):
     estimator = ml.EstimatorFactory().create(
         estimator_type=ml.EstimatorType.ML_ESTIMATOR,
         data_repository_type=repositories.DataRepositoryType.LOCAL,
-        evaluator_type=ml.EvaluatorType.TIME_EVALUATOR,
+        evaluator_type=(
+            ml.EvaluatorType.WALK_FORWARD_EVALUATOR
+            if backtest_folds > 1
+            else ml.EvaluatorType.TIME_EVALUATOR
+        ),
         algorithm_type=ml.AlgorithmType.LIGHT_GBM,
         do_hpo=do_hpo,
     )
+    if backtest_folds > 1:
+        estimator.evaluator.n_folds = backtest_folds
+        estimator.evaluator.n_jobs = backtest_n_jobs
+    estimator.build_feature_store = feature_store
+    estimator.hpo_config = HPOConfig(
+        n_jobs=hpo_n_jobs,
+        batch_size=hpo_batch_size,
+        pruning=hpo_pruning,
+        early_stopping_rounds=hpo_early_stopping_rounds,
+    )
+    estimator.evaluator.bootstrap_config = BootstrapConfig(
+        n_resamples=bootstrap_resamples,
+        strategy=bootstrap_strategy,
+        block_length_in_days=bootstrap_block_length,
+        n_jobs=bootstrap_n_jobs,
+    )
 
     scores = estimator.creat_model()
 
@@ -37,9 +90,92 @@ if __name__ == "__main__":
         help="If indicated, the estimator will perform hpo routine.",
     )
 
+    parser.add_argument(
+        "--hpo-n-jobs",
+        type=int,
+        default=1,
+        help="Processes evaluating the hpo candidates, -1 uses all cores.",
+    )
+    parser.add_argument(
+        "--hpo-batch-size",
+        type=int,
+        default=1,
+        help="Hpo candidates proposed at once and evaluated concurrently.",
+    )
+    parser.add_argument(
+        "--hpo-pruning",
+        choices=[pruning.value for pruning in PruningStrategy],
+        default=PruningStrategy.NONE.value,
+        help="Hpo trial pruning strategy.",
+    )
+    parser.add_argument(
+        "--hpo-early-stopping-rounds",
+        type=int,
+        default=0,
+        help="Early stop the hpo trials, 0 disables early stopping.",
+    )
+    parser.add_argument(
+        "--bootstrap-resamples",
+        type=int,
+        default=0,
+        help="Test set resamples of the metrics confidence intervals, 0 "
+        "disables them.",
+    )
+    parser.add_argument(
+        "--bootstrap-n-jobs",
+        type=int,
+        default=1,
+        help="Processes computing the resamples, -1 uses all cores.",
+    )
+    parser.add_argument(
+        "--bootstrap-strategy",
+        choices=[strategy.value for strategy in ResamplingStrategy],
+        default=ResamplingStrategy.CUSTOMER.value,
+        help="Test set resampling strategy, only CUSTOMER gives intervals "
+        "to the card precision top-k metrics.",
+    )
+    parser.add_argument(
+        "--bootstrap-block-length",
+        type=int,
+        default=1,
+        help="Consecutive days of the DAY_BLOCK resampling blocks.",
+    )
+    parser.add_argument(
+        "--backtest-folds",
+        type=int,
+        default=1,
+        help="Walk-forward backtesting folds, 1 disables backtesting.",
+    )
+    parser.add_argument(
+        "--backtest-n-jobs",
+        type=int,
+        default=1,
+        help="Processes running the backtesting folds, -1 uses all cores.",
+    )
+    parser.add_argument(
+        "--feature-store",
+        action="store_true",
+        help="If indicated, an online feature store ships with the model, "
+        "it computes the aggregated features the requests omit. It is "
+        "served by a single worker.",
+    )
+
     args = parser.parse_args()
     if vars(args) == {}:
         parser.print_help()
         exit(1)
 
-    main(do_hpo=args.do_hpo)
+    main(
+        do_hpo=args.do_hpo,
+        hpo_n_jobs=args.hpo_n_jobs,
+        hpo_batch_size=args.hpo_batch_size,
+        hpo_pruning=PruningStrategy(args.hpo_pruning),
+        hpo_early_stopping_rounds=args.hpo_early_stopping_rounds,
+        bootstrap_resamples=args.bootstrap_resamples,
+        bootstrap_n_jobs=args.bootstrap_n_jobs,
+        bootstrap_strategy=ResamplingStrategy(args.bootstrap_strategy),
+        bootstrap_block_length=args.bootstrap_block_length,
+        backtest_folds=args.backtest_folds,
+        backtest_n_jobs=args.backtest_n_jobs,
+        feature_store=args.feature_store,
+    )